@@ -2,7 +2,7 @@
 API v1 路由聚合
 """
 from fastapi import APIRouter
-from app.api.v1 import rooms, plants, tasks, images, configs, task_types, shelves, suggestions, identifications
+from app.api.v1 import rooms, plants, tasks, images, configs, task_types, shelves, suggestions, identifications, metrics, exports, imports, jobs
 
 # 禁用自动斜杠重定向，避免外部访问时的localhost重定向问题
 api_router = APIRouter(redirect_slashes=False)
@@ -57,3 +57,29 @@ api_router.include_router(
     identifications.router,
     tags=["identifications"]
 )
+
+# 数据导出路由
+api_router.include_router(
+    exports.router,
+    tags=["export"]
+)
+
+# 数据导入路由
+api_router.include_router(
+    imports.router,
+    tags=["import"]
+)
+
+# 后台任务路由
+api_router.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["jobs"]
+)
+
+# 运行指标路由
+api_router.include_router(
+    metrics.router,
+    prefix="/metrics",
+    tags=["metrics"]
+)
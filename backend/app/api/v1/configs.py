@@ -7,13 +7,14 @@ from typing import Optional
 from datetime import datetime
 
 from app.core.database import get_db
+from app.core.etag import conditional_get
 from app.schemas.plant_config import PlantConfigCreate, PlantConfigUpdate, PlantConfigResponse
 from app.services.plant_config_service import PlantConfigService
 
 router = APIRouter()
 
 
-@router.get("/plants/{plant_id}/configs", response_model=dict)
+@router.get("/plants/{plant_id}/configs", response_model=dict, dependencies=[conditional_get("plant_configs", "task_types")])
 async def get_plant_configs(
     plant_id: int,
     db: Session = Depends(get_db)
@@ -0,0 +1,44 @@
+"""
+数据导出路由
+"""
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+
+from app.core.database import SessionLocal
+from app.services.export_service import ExportService
+
+router = APIRouter()
+
+
+@router.get("/export")
+async def export_data(
+    format: str = "ndjson",
+    room_id: Optional[int] = None,
+    updated_since: Optional[datetime] = None
+):
+    """
+    流式导出完整数据（房间、花架、植物、图片、养护配置、识别记录）
+
+    - **format**: 导出格式，目前仅支持 ndjson
+    - **room_id**: 可选，只导出指定房间
+    - **updated_since**: 可选，只导出此时间之后更新的植物、图片和识别记录
+    """
+    if format != "ndjson":
+        raise HTTPException(status_code=400, detail="不支持的导出格式，目前仅支持 ndjson")
+
+    def stream():
+        # 流式响应在请求依赖清理之后才开始发送，需要自行管理会话
+        db = SessionLocal()
+        try:
+            yield from ExportService(db).iter_ndjson(room_id=room_id, updated_since=updated_since)
+        finally:
+            db.close()
+
+    filename = f"plant-dtp-export-{datetime.now().strftime('%Y%m%d%H%M%S')}.ndjson"
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
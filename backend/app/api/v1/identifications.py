@@ -1,12 +1,13 @@
 """
 植物识别路由
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.rate_limiter import RateLimitExceeded
 from app.schemas.plant_identification import (
     IdentificationResult,
     IdentificationFeedback,
@@ -14,13 +15,19 @@ from app.schemas.plant_identification import (
     IdentificationResponse,
     IdentificationListResponse
 )
+from app.services.baidu_ai_service import rate_limiter
 from app.services.identification_service import IdentificationService
+from app.utils.upload_utils import UploadError, hash_upload
+
+# 允许识别的图片类型（按文件内容判断）
+IDENTIFICATION_IMAGE_TYPES = {"jpg", "png", "bmp", "gif", "webp"}
 
 router = APIRouter()
 
 
 @router.post("/identify", response_model=dict)
 async def identify_plant(
+    request: Request,
     file: UploadFile = File(...),
     include_details: bool = Form(True),
     db: Session = Depends(get_db)
@@ -33,7 +40,8 @@ async def identify_plant(
     - **file**: 图片文件（必填，最大4MB）
     - **include_details**: 是否返回百科信息（默认true）
 
-    返回识别结果，包含候选植物列表和置信度。
+    返回识别结果，包含候选植物列表和置信度；queue 为限流排队位置和等待时间。
+    识别请求超过 BAIDU_AI_QPS 时排队，排队已满时返回 429 和 Retry-After。
     """
     # 检查百度AI配置
     if not settings.BAIDU_AI_API_KEY or not settings.BAIDU_AI_SECRET_KEY:
@@ -42,29 +50,22 @@ async def identify_plant(
             detail="百度AI服务未配置，请联系管理员配置API密钥"
         )
 
-    # 验证文件大小
-    file_data = await file.read()
-    if len(file_data) > settings.MAX_IDENTIFICATION_IMAGE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"图片大小不能超过 {settings.MAX_IDENTIFICATION_IMAGE_SIZE // 1024 // 1024}MB"
-        )
-
-    # 验证文件类型
-    allowed_extensions = ["jpg", "jpeg", "png", "bmp", "gif", "webp"]
-    file_ext = file.filename.split(".")[-1].lower() if file.filename else ""
-    if file_ext not in allowed_extensions:
-        raise HTTPException(
-            status_code=400,
-            detail=f"不支持的文件格式，请上传以下格式: {', '.join(allowed_extensions)}"
+    # 分块计算哈希：按文件头识别类型，读取过程中检查大小；先按哈希查缓存，未命中时才写盘
+    try:
+        upload = await hash_upload(
+            file,
+            settings.MAX_IDENTIFICATION_IMAGE_SIZE,
+            IDENTIFICATION_IMAGE_TYPES
         )
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     try:
         service = IdentificationService(db)
         result = await service.identify_from_file(
-            file_data=file_data,
-            filename=file.filename,
-            include_details=include_details
+            upload=upload,
+            include_details=include_details,
+            client_id=request.headers.get("x-real-ip") or (request.client.host if request.client else "")
         )
 
         return {
@@ -72,6 +73,12 @@ async def identify_plant(
             "data": result
         }
 
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": e.retry_after_header}
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except RuntimeError as e:
@@ -80,28 +87,50 @@ async def identify_plant(
         raise HTTPException(status_code=500, detail=f"识别失败: {str(e)}")
 
 
+@router.get("/identify/queue", response_model=dict)
+async def get_identification_queue():
+    """
+    获取识别限流队列状态
+
+    返回当前排队数和新请求的预计等待时间（秒）。
+    """
+    return {
+        "success": True,
+        "data": rate_limiter.stats()
+    }
+
+
 @router.get("/identifications", response_model=dict)
 async def get_identification_history(
     page: int = 1,
     limit: int = 20,
     plant_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
     """
     获取识别历史记录
 
-    - **page**: 页码（默认1）
+    - **page**: 页码（默认1，使用 cursor 时忽略）
     - **limit**: 每页数量（默认20）
     - **plant_id**: 可选，筛选已创建的植物
+    - **cursor**: 可选，上一页返回的 nextCursor，用于无限滚动
+    - **include_total**: 是否统计总数（默认true）
 
     返回识别历史记录列表，支持分页。
     """
     service = IdentificationService(db)
-    result = service.get_identification_history(
-        page=page,
-        limit=limit,
-        plant_id=plant_id
-    )
+    try:
+        result = service.get_identification_history(
+            page=page,
+            limit=limit,
+            plant_id=plant_id,
+            cursor=cursor,
+            include_total=include_total
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
         "success": True,
@@ -170,7 +199,7 @@ async def submit_identification_feedback(
 
 
 @router.post("/identifications/{identification_id}/create-plant", response_model=dict)
-async def create_plant_from_identification(
+def create_plant_from_identification(
     identification_id: int,
     plant_data: CreatePlantFromIdentification,
     db: Session = Depends(get_db)
@@ -186,8 +215,10 @@ async def create_plant_from_identification(
     - **purchase_date**: 购买日期（可选）
     - **health_status**: 健康状态（默认healthy）
 
-    返回创建的植物信息。
+    返回创建的植物信息；photoStatus 为识别照片的处理状态：queued（后台任务处理中）、
+    added（已添加为主图）、busy（图片处理繁忙，未添加）、failed（未添加）。
     """
+    # 同步路由在线程池中执行，等待图片进程池处理识别照片时不会阻塞事件循环
     service = IdentificationService(db)
 
     try:
@@ -198,20 +229,19 @@ async def create_plant_from_identification(
             purchase_date=plant_data.purchase_date,
             health_status=plant_data.health_status
         )
-
-        return {
-            "success": True,
-            "message": "植物创建成功",
-            "data": {
-                "plant": result
-            }
-        }
-
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建植物失败: {str(e)}")
 
+    if result is None:
+        raise HTTPException(status_code=404, detail="识别记录不存在")
+    return {
+        "success": True,
+        "message": "植物创建成功",
+        "data": result
+    }
+
 
 @router.delete("/identifications/{identification_id}", response_model=dict)
 async def delete_identification(
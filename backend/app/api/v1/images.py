@@ -1,52 +1,63 @@
 """
 植物图片管理路由
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.responses import FileResponse, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import os
-import uuid
 from pathlib import Path
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.etag import conditional_get
+from app.core.image_cache import image_cache
+from app.core.image_executor import ImageQueueFull, image_executor
+from app.core.upload_files import IMMUTABLE_CACHE_CONTROL, versioned_url
 from app.schemas.plant_image import PlantImageCreate, PlantImageUpdate, PlantImageResponse
+from app.services.blob_service import BlobService, blob_dir, blob_thumbnail_path
+from app.services.job_service import JobService
 from app.services.plant_image_service import PlantImageService
+from app.utils.image_utils import RENDER_FORMATS, avif_supported, render_image
+from app.utils.upload_utils import UploadError, save_upload
 
 router = APIRouter()
 
 # Upload directory configuration
 UPLOAD_DIR = Path("uploads/plants")
 THUMBNAIL_DIR = Path("uploads/plants/thumbnails")
+VARIANT_DIR = Path("uploads/plants/variants")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+VARIANT_DIR.mkdir(parents=True, exist_ok=True)
 
 # File size limit (10MB)
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
-# Allowed file types
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
-ALLOWED_MIME_TYPES = {
-    "image/jpeg",
-    "image/jpg",
-    "image/png",
-    "image/gif",
-    "image/webp"
-}
+# Allowed image types (detected from file content)
+ALLOWED_IMAGE_TYPES = {"jpg", "png", "gif", "webp"}
 
+# On-demand resize limits
+MAX_RENDER_SIZE = 4096
+RENDER_MEDIA_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp", "avif": "image/avif", "png": "image/png"}
+RENDER_EXTENSIONS = {"jpeg": "jpg", "webp": "webp", "avif": "avif", "png": "png"}
+# Resized images requested without the source fingerprint are revalidated after this many seconds
+RENDER_MAX_AGE = 300
 
-def get_file_extension(filename: str) -> str:
-    """Get file extension from filename"""
-    return Path(filename).suffix.lower()
+LOCAL_UPLOAD_ROOT = Path("uploads").resolve()
 
 
-def generate_unique_filename(original_filename: str) -> str:
-    """Generate unique filename"""
-    ext = get_file_extension(original_filename)
-    unique_name = f"{uuid.uuid4()}{ext}"
-    return unique_name
+def resolve_local_image(url: str) -> Optional[Path]:
+    """Map an image URL (relative or absolute) to its file under uploads/"""
+    index = url.find("/uploads/")
+    if index == -1:
+        return None
+    path = Path(url[index + 1:].split("?")[0]).resolve()
+    if LOCAL_UPLOAD_ROOT not in path.parents or not path.is_file():
+        return None
+    return path
 
 
-@router.get("/plants/{plant_id}/images", response_model=dict)
+@router.get("/plants/{plant_id}/images", response_model=dict, dependencies=[conditional_get("plant_images")])
 async def get_plant_images(
     plant_id: int,
     db: Session = Depends(get_db)
@@ -115,7 +126,7 @@ async def upload_plant_image_file(
     import logging
     logger = logging.getLogger(__name__)
     from datetime import datetime
-    from app.utils.image_utils import create_thumbnail_from_bytes, get_image_dimensions
+    from app.utils.image_utils import probe_image
 
     # Debug logging
     logger.info(f"Upload request received:")
@@ -125,44 +136,37 @@ async def upload_plant_image_file(
     logger.info(f"  is_primary: {is_primary}")
     logger.info(f"  capture_date: {capture_date}")
 
-    # Validate file type
-    if file.content_type not in ALLOWED_MIME_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"不支持的文件类型。允许的类型: {', '.join(ALLOWED_MIME_TYPES)}"
-        )
-
-    # Read file content
-    content = await file.read()
-
-    # Validate file size
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"文件大小超过限制 (最大 {MAX_FILE_SIZE // (1024*1024)}MB)"
-        )
-
-    # Generate unique filename
-    filename = generate_unique_filename(file.filename or "image.jpg")
-    file_path = UPLOAD_DIR / filename
-
-    # Save original file
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # Stream to disk: type sniffed from magic bytes, size enforced while reading
+    try:
+        stored = await save_upload(file, UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_IMAGE_TYPES)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Generate thumbnail (remove original extension to avoid double .jpg.jpg)
-    filename_without_ext = filename.rsplit('.', 1)[0]  # Remove original extension
-    thumbnail_filename = f"thumb_{filename_without_ext}.jpg"
-    thumbnail_path = THUMBNAIL_DIR / thumbnail_filename
-    create_thumbnail_from_bytes(content, thumbnail_path, size=(300, 300), quality=85)
+    # Content-addressed storage: identical content is stored once and reference-counted
+    blob_service = BlobService(db)
+    blob, created = blob_service.store(stored)
+    thumbnail_path = blob_thumbnail_path(blob.sha256)
 
-    # Get image dimensions
-    dimensions = get_image_dimensions(file_path)
+    service = PlantImageService(db)
+    # Same content already processed: reuse its thumbnail and variants
+    probe = None if created else service.reuse_probe(blob.sha256)
+    deferred = probe is None and settings.BACKGROUND_JOBS_ENABLED
+    if deferred:
+        # Thumbnail and variants are generated by the background worker
+        probe = {"width": None, "height": None, "takenAt": None, "thumbnail": False, "variants": []}
+    elif probe is None:
+        # Single decode: dimensions, EXIF, thumbnail and responsive variants (150/300/800/1600px)
+        try:
+            probe = await image_executor.run(probe_image, Path(blob.path), thumbnail_path, blob_dir(blob.sha256))
+        except (ImageQueueFull, ValueError) as e:
+            blob_service.discard(blob.sha256)
+            status_code = 503 if isinstance(e, ImageQueueFull) else 400
+            raise HTTPException(status_code=status_code, detail=str(e))
 
     # Generate file URL (use relative path for production)
     # 浏览器会自动使用当前域名，通过 Nginx 代理到后端
-    file_url = f"/uploads/plants/{filename}"
-    thumbnail_url = f"/uploads/plants/thumbnails/{thumbnail_filename}"
+    file_url = blob.url
+    thumbnail_url = versioned_url(thumbnail_path) if probe["thumbnail"] else None
 
     # Parse capture date if provided
     parsed_capture_date = None
@@ -173,29 +177,32 @@ async def upload_plant_image_file(
             pass
 
     # Create image record
-    service = PlantImageService(db)
     try:
         image_data = PlantImageCreate(
             url=file_url,
             thumbnail_url=thumbnail_url,
             caption=description,
             is_primary=is_primary,
-            taken_at=parsed_capture_date,
-            file_size=len(content),
-            width=dimensions[0] if dimensions else None,
-            height=dimensions[1] if dimensions else None
+            taken_at=parsed_capture_date or probe["takenAt"],
+            file_size=stored.size,
+            width=probe["width"],
+            height=probe["height"]
+        )
+        new_image = service.create_image(
+            plant_id, image_data, probe["variants"], blob_sha256=blob.sha256, commit=not deferred
         )
-        new_image = service.create_image(plant_id, image_data)
+        if deferred:
+            # Enqueue in the same transaction as the image row: both are committed or neither is
+            JobService(db).enqueue("process_image", {"imageId": new_image["id"]}, priority=10, commit=False)
+            db.commit()
         return {
             "success": True,
             "data": new_image
         }
     except Exception as e:
-        # Delete files if database operation fails
-        if file_path.exists():
-            file_path.unlink()
-        if thumbnail_path.exists():
-            thumbnail_path.unlink()
+        # Drop the blob reference if the database operation fails
+        db.rollback()
+        blob_service.discard(blob.sha256)
         raise HTTPException(status_code=400, detail=str(e))
 
 
@@ -224,31 +231,14 @@ async def set_primary_image_endpoint(
     db: Session = Depends(get_db)
 ):
     """设置为主图"""
-    from app.models.plant_image import PlantImage
-
-    # Get the target image
-    image = db.query(PlantImage).filter(
-        PlantImage.id == image_id,
-        PlantImage.plant_id == plant_id
-    ).first()
-
+    service = PlantImageService(db)
+    image = service.set_primary_image(plant_id, image_id)
     if not image:
         raise HTTPException(status_code=404, detail="图片不存在")
 
-    # Unset all other primary images for this plant
-    db.query(PlantImage).filter(
-        PlantImage.plant_id == plant_id,
-        PlantImage.is_primary == True
-    ).update({"is_primary": False})
-
-    # Set this image as primary
-    image.is_primary = True
-    db.commit()
-    db.refresh(image)
-
     return {
         "success": True,
-        "data": image.to_dict()
+        "data": image
     }
 
 
@@ -270,13 +260,17 @@ async def delete_plant_image(
     if not image:
         raise HTTPException(status_code=404, detail="图片不存在")
 
-    # Try to delete the file if it's a local upload
+    # Try to delete the file if it's a local upload (blob files are removed with the last reference)
     try:
-        if "/uploads/plants/" in image.url:
-            filename = image.url.split("/")[-1]
-            file_path = UPLOAD_DIR / filename
-            if file_path.exists():
-                file_path.unlink()
+        if image.blob_sha256 is None:
+            if "/uploads/plants/" in image.url:
+                filename = image.url.split("/")[-1]
+                file_path = UPLOAD_DIR / filename
+                if file_path.exists():
+                    file_path.unlink()
+            for variant in image.variants:
+                if variant.url.startswith("/uploads/plants/variants/"):
+                    (VARIANT_DIR / variant.url.split("?")[0].split("/")[-1]).unlink(missing_ok=True)
     except:
         pass  # Continue with database deletion even if file deletion fails
 
@@ -305,3 +299,70 @@ async def get_primary_image(
         "success": True,
         "data": image
     }
+
+
+@router.get("/images/{image_id}")
+async def get_resized_image(
+    image_id: int,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=MAX_RENDER_SIZE),
+    h: Optional[int] = Query(None, ge=1, le=MAX_RENDER_SIZE),
+    fmt: str = "webp",
+    q: int = Query(80, ge=1, le=100),
+    v: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    按需缩放图片
+
+    - **w / h**: 最大宽度 / 高度（等比缩放，不放大）
+    - **fmt**: 输出格式 jpeg / webp / avif / png（默认 webp）
+    - **q**: 质量 1-100（默认 80）
+    - **v**: 原图内容指纹（图片数据中的 renderUrl 已带上），与原图一致时响应可被永久缓存
+
+    首次请求时渲染并写入磁盘缓存，之后直接返回缓存文件；
+    缓存键包含原图的大小和修改时间，原图变化后自动生成新文件。
+    不带指纹或指纹已过期的请求只缓存 RENDER_MAX_AGE 秒，之后按 ETag 重新验证。
+    """
+    from app.models.plant_image import PlantImage
+
+    if fmt not in RENDER_FORMATS or (fmt == "avif" and not avif_supported()):
+        raise HTTPException(status_code=400, detail="不支持的图片格式")
+
+    image = db.query(PlantImage).filter(PlantImage.id == image_id).first()
+    if not image:
+        raise HTTPException(status_code=404, detail="图片不存在")
+
+    source_path = resolve_local_image(image.url)
+    if source_path is None:
+        raise HTTPException(status_code=404, detail="原图文件不存在")
+
+    stat = source_path.stat()
+    key = image_cache.make_key(source_path, stat.st_size, stat.st_mtime_ns, w, h, fmt, q)
+    # blob 文件名即内容哈希；其他原图按大小和修改时间生成指纹
+    if image.blob_sha256 and source_path.name.startswith(image.blob_sha256):
+        fingerprint = image.blob_sha256[:12]
+    else:
+        fingerprint = image_cache.make_key(source_path, stat.st_size, stat.st_mtime_ns)[:12]
+    headers = {
+        "ETag": f'"{key[:32]}"',
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if v == fingerprint else f"public, max-age={RENDER_MAX_AGE}"
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    async def render(output_path: Path) -> bool:
+        return await image_executor.run(render_image, source_path, output_path, w, h, fmt, q)
+
+    try:
+        cached_path = await image_cache.get_or_render(key, RENDER_EXTENSIONS[fmt], render)
+    except ImageQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if cached_path is None:
+        raise HTTPException(status_code=422, detail="图片处理失败")
+
+    return FileResponse(
+        cached_path,
+        media_type=RENDER_MEDIA_TYPES[fmt],
+        headers=headers
+    )
@@ -0,0 +1,55 @@
+"""
+数据导入路由
+"""
+import io
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.database import get_db
+from app.services.import_service import ENTITY_BY_TYPE, ImportService, iter_csv_records, iter_ndjson_records
+
+router = APIRouter()
+
+
+@router.post("/import")
+def import_data(
+    file: UploadFile = File(...),
+    format: str = "ndjson",
+    type: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    批量导入数据（单个事务，COPY 写入）
+
+    - **file**: 数据文件（UTF-8）
+    - **format**: ndjson（与导出格式相同，可混合多种记录）或 csv（首行为字段名）
+    - **type**: CSV 文件的记录类型：room / shelf / plant / config
+
+    带 id 的记录按 id 更新或插入，可用于导出文件的恢复；逐行校验失败的记录不会导入，
+    在 errors 中按行号返回。导出文件中的 image / identification 记录（不含图片文件）
+    不导入，在 skipped 中计数。
+    """
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    if format == "ndjson":
+        records = iter_ndjson_records(lines)
+    elif format == "csv":
+        if type not in ENTITY_BY_TYPE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"CSV 导入需要指定 type，可选值: {', '.join(ENTITY_BY_TYPE)}"
+            )
+        records = iter_csv_records(lines, type)
+    else:
+        raise HTTPException(status_code=400, detail="不支持的导入格式，可选值: ndjson, csv")
+
+    try:
+        result = ImportService(db).import_records(records)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="文件编码错误，请使用 UTF-8")
+
+    return {
+        "success": True,
+        "data": result
+    }
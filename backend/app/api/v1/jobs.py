@@ -0,0 +1,45 @@
+"""
+后台任务路由
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.services import job_handlers  # noqa: F401  注册任务类型
+from app.services.job_service import JobService
+
+router = APIRouter()
+
+# 允许通过接口加入的任务类型（清理类任务只能由服务端代码通过 JobService 加入）
+PUBLIC_JOB_TYPES = {"process_image", "promote_identification_photo"}
+
+
+class JobCreate(BaseModel):
+    type: str = Field(..., description="任务类型")
+    payload: dict = Field(default_factory=dict, description="任务参数")
+    priority: int = Field(0, description="优先级，越大越先执行")
+
+
+@router.post("", response_model=dict)
+def create_job(job: JobCreate, db: Session = Depends(get_db)):
+    """加入后台任务，由 worker（python -m app.worker）异步执行"""
+    if job.type not in PUBLIC_JOB_TYPES:
+        raise HTTPException(status_code=400, detail=f"不支持的任务类型: {job.type}")
+    new_job = JobService(db).enqueue(job.type, job.payload, priority=job.priority)
+    return {
+        "success": True,
+        "data": new_job.to_dict()
+    }
+
+
+@router.get("/{job_id}", response_model=dict)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """查询任务状态"""
+    job = JobService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return {
+        "success": True,
+        "data": job
+    }
@@ -0,0 +1,61 @@
+"""
+运行指标路由
+"""
+from fastapi import APIRouter
+
+from app.core.identification_cache import identification_cache
+from app.core.image_cache import image_cache
+from app.core.image_executor import image_executor
+from app.core.response_cache import response_cache
+from app.core.single_flight import identification_flight
+from app.services.baidu_ai_service import baidu_ai_service
+
+router = APIRouter()
+
+
+@router.get("/cache", response_model=dict)
+async def get_cache_metrics():
+    """获取响应缓存命中率等统计"""
+    return {
+        "success": True,
+        "data": response_cache.stats()
+    }
+
+
+@router.get("/images", response_model=dict)
+async def get_image_executor_metrics():
+    """获取图片处理进程池的排队深度等统计"""
+    return {
+        "success": True,
+        "data": image_executor.stats()
+    }
+
+
+@router.get("/image-cache", response_model=dict)
+async def get_image_cache_metrics():
+    """获取按需缩放图片磁盘缓存的统计"""
+    return {
+        "success": True,
+        "data": image_cache.stats()
+    }
+
+
+@router.get("/identification-cache", response_model=dict)
+async def get_identification_cache_metrics():
+    """获取识别结果缓存（内存 + 数据库）的命中率和并发合并统计"""
+    return {
+        "success": True,
+        "data": {
+            **identification_cache.stats(),
+            "singleFlight": identification_flight.stats()
+        }
+    }
+
+
+@router.get("/identification-preprocess", response_model=dict)
+async def get_identification_preprocess_metrics():
+    """获取识别前图片压缩的统计（原图与实际发送的字节数）"""
+    return {
+        "success": True,
+        "data": baidu_ai_service.preprocess_stats()
+    }
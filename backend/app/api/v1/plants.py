@@ -1,18 +1,22 @@
 """
 植物管理路由
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.etag import conditional_get
 from app.schemas.plant import PlantCreate, PlantUpdate, PlantResponse
 from app.services.plant_service import PlantService
 
 router = APIRouter()
 
+# 批量接口单次最多条数
+BULK_MAX_ITEMS = 5000
 
-@router.get("")
+
+@router.get("", dependencies=[conditional_get("plants", "rooms", "plant_images")])
 async def get_plants(
     room_id: Optional[int] = None,
     health_status: Optional[str] = None,
@@ -20,6 +24,8 @@ async def get_plants(
     skip: int = 0,
     limit: int = 20,
     is_active: Optional[bool] = True,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
     """
@@ -29,35 +35,45 @@ async def get_plants(
     - **health_status**: 可选，健康状态筛选
     - **search**: 可选，搜索关键词
     - **is_active**: 可选，是否只获取活跃植物（默认true），设为false获取归档植物
-    - **skip**: 跳过记录数
+    - **skip**: 跳过记录数（使用 cursor 时忽略）
     - **limit**: 返回记录数
+    - **cursor**: 可选，上一页返回的 nextCursor，用于游标分页
+    - **include_total**: 是否统计总数（默认true），无限滚动时可设为false省去count查询
     """
     service = PlantService(db)
     # 如果is_active参数被明确指定
     active_filter = is_active if is_active is not None else True
-    plants = service.get_plants(
-        room_id=room_id,
-        health_status=health_status,
-        search=search,
-        skip=skip,
-        limit=limit,
-        is_active=active_filter
-    )
-    total = service.count_plants(
-        room_id=room_id,
-        health_status=health_status,
-        search=search,
-        is_active=active_filter
-    )
+    try:
+        page = service.get_plants(
+            room_id=room_id,
+            health_status=health_status,
+            search=search,
+            skip=skip,
+            limit=limit,
+            is_active=active_filter,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total = None
+    if include_total:
+        total = service.count_plants(
+            room_id=room_id,
+            health_status=health_status,
+            search=search,
+            is_active=active_filter
+        )
 
     return {
         "success": True,
         "data": {
-            "items": plants,
+            "items": page["items"],
             "pagination": {
                 "total": total,
                 "skip": skip,
-                "limit": limit
+                "limit": limit,
+                "nextCursor": page["nextCursor"]
             }
         }
     }
@@ -89,7 +105,48 @@ async def create_plant(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/{plant_id}")
+@router.post("/bulk")
+async def bulk_create_plants(
+    items: List[dict] = Body(...),
+    db: Session = Depends(get_db)
+):
+    """
+    批量创建植物
+
+    请求体为植物数组（字段同创建植物），单个事务写入。
+    校验失败的项不会写入，在 errors 中按数组下标返回原因。
+    """
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多提交 {BULK_MAX_ITEMS} 条")
+    service = PlantService(db)
+    result = service.bulk_create_plants(items)
+    return {
+        "success": True,
+        "data": result
+    }
+
+
+@router.patch("/bulk")
+async def bulk_update_plants(
+    items: List[dict] = Body(...),
+    db: Session = Depends(get_db)
+):
+    """
+    批量更新/归档植物
+
+    请求体为数组，每项需包含 id，其余字段同更新植物；is_active=false 表示归档。
+    """
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"单次最多提交 {BULK_MAX_ITEMS} 条")
+    service = PlantService(db)
+    result = service.bulk_update_plants(items)
+    return {
+        "success": True,
+        "data": result
+    }
+
+
+@router.get("/{plant_id}", dependencies=[conditional_get("plants")])
 async def get_plant(
     plant_id: int,
     db: Session = Depends(get_db)
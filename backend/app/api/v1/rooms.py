@@ -3,9 +3,11 @@
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.etag import conditional_get
+from app.core.response_cache import cached_response
 from app.schemas.room import RoomCreate, RoomUpdate, RoomResponse, RoomListResponse
 from app.services.room_service import RoomService
 from app.models.plant import Plant
@@ -13,32 +15,41 @@ from app.models.plant import Plant
 router = APIRouter()
 
 
-@router.get("", response_model=RoomListResponse)
+@router.get("", response_model=RoomListResponse, dependencies=[conditional_get("rooms", "plants")])
+@cached_response("rooms", "plants")
 async def get_rooms(
     location_type: str = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
     """
     获取房间列表
 
     - **location_type**: 可选，筛选位置类型（indoor/outdoor/balcony/garden）
-    - **skip**: 跳过记录数
+    - **skip**: 跳过记录数（使用 cursor 时忽略）
     - **limit**: 返回记录数
+    - **cursor**: 可选，上一页返回的 nextCursor
+    - **include_total**: 是否统计总数（默认true）
     """
     service = RoomService(db)
-    rooms = service.get_rooms(location_type=location_type, skip=skip, limit=limit)
-    total = service.count_rooms(location_type=location_type)
+    try:
+        page = service.get_rooms(location_type=location_type, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total = service.count_rooms(location_type=location_type) if include_total else None
 
     return {
         "success": True,
         "data": {
-            "items": rooms,
+            "items": page["items"],
             "pagination": {
                 "total": total,
                 "skip": skip,
-                "limit": limit
+                "limit": limit,
+                "nextCursor": page["nextCursor"]
             }
         }
     }
@@ -70,7 +81,7 @@ async def create_room(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/{room_id}", response_model=RoomResponse)
+@router.get("/{room_id}", response_model=RoomResponse, dependencies=[conditional_get("rooms", "plants")])
 async def get_room(
     room_id: int,
     db: Session = Depends(get_db)
@@ -130,7 +141,7 @@ async def delete_room(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/{room_id}/stats")
+@router.get("/{room_id}/stats", dependencies=[conditional_get("rooms", "plants")])
 async def get_room_stats(
     room_id: int,
     db: Session = Depends(get_db)
@@ -6,13 +6,16 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.core.database import get_db
+from app.core.etag import conditional_get
+from app.core.response_cache import cached_response
 from app.schemas.plant_shelf import PlantShelfCreate, PlantShelfUpdate, PlantShelfResponse
 from app.services.plant_shelf_service import PlantShelfService
 
 router = APIRouter()
 
 
-@router.get("/rooms/{room_id}/shelves", response_model=dict)
+@router.get("/rooms/{room_id}/shelves", response_model=dict, dependencies=[conditional_get("plant_shelves", "plants")])
+@cached_response("plant_shelves", "plants")
 async def get_room_shelves(
     room_id: int,
     db: Session = Depends(get_db)
@@ -28,7 +31,7 @@ async def get_room_shelves(
     }
 
 
-@router.get("/shelves/{shelf_id}", response_model=dict)
+@router.get("/shelves/{shelf_id}", response_model=dict, dependencies=[conditional_get("plant_shelves", "plants")])
 async def get_shelf(
     shelf_id: int,
     db: Session = Depends(get_db)
@@ -16,21 +16,34 @@ router = APIRouter()
 async def get_suggestions(
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: Session = Depends(get_db)
 ):
-    """获取建议列表"""
+    """
+    获取建议列表
+
+    - **skip**: 跳过记录数（使用 cursor 时忽略）
+    - **limit**: 返回记录数
+    - **cursor**: 可选，上一页返回的 nextCursor
+    - **include_total**: 是否统计总数（默认true）
+    """
     service = SuggestionService(db)
-    suggestions = service.get_suggestions(skip=skip, limit=limit)
-    total = service.count_suggestions()
+    try:
+        page = service.get_suggestions(skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total = service.count_suggestions() if include_total else None
 
     return {
         "success": True,
         "data": {
-            "items": suggestions,
+            "items": page["items"],
             "pagination": {
                 "total": total,
                 "skip": skip,
-                "limit": limit
+                "limit": limit,
+                "nextCursor": page["nextCursor"]
             }
         }
     }
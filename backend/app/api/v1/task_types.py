@@ -5,12 +5,15 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.etag import conditional_get
+from app.core.response_cache import cached_response
 from app.models.task_type import TaskType
 
 router = APIRouter()
 
 
-@router.get("/task-types", response_model=dict)
+@router.get("/task-types", response_model=dict, dependencies=[conditional_get("task_types")])
+@cached_response("task_types")
 async def get_task_types(
     db: Session = Depends(get_db)
 ):
@@ -7,12 +7,15 @@ from typing import Optional
 from datetime import date, datetime
 
 from app.core.database import get_db
+from app.core.etag import conditional_get
+from app.core.response_cache import cached_response
 from app.services.task_service import TaskService
 
 router = APIRouter()
 
 
-@router.get("/today")
+@router.get("/today", dependencies=[conditional_get("plant_configs", "plants", "task_types", daily=True)])
+@cached_response("plant_configs", "plants", "task_types", daily=True)
 async def get_today_tasks(
     db: Session = Depends(get_db)
 ):
@@ -27,7 +30,7 @@ async def get_today_tasks(
     }
 
 
-@router.get("/upcoming")
+@router.get("/upcoming", dependencies=[conditional_get("plant_configs", "plants", "task_types", daily=True)])
 async def get_upcoming_tasks(
     days: int = 7,
     db: Session = Depends(get_db)
@@ -47,7 +50,7 @@ async def get_upcoming_tasks(
     }
 
 
-@router.get("/overdue")
+@router.get("/overdue", dependencies=[conditional_get("plant_configs", "plants", "task_types", daily=True)])
 async def get_overdue_tasks(
     db: Session = Depends(get_db)
 ):
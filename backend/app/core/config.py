@@ -38,6 +38,29 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 5242880  # 5MB
     ALLOWED_IMAGE_EXTENSIONS: List[str] = ["jpg", "jpeg", "png", "gif", "webp"]
 
+    # /uploads 静态文件服务
+    UPLOADS_CACHE_MAX_AGE: int = 86400  # 不带内容指纹的文件的缓存秒数（带指纹的永久缓存）
+    UPLOADS_ACCEL_REDIRECT_PREFIX: str = ""  # 如 /protected-uploads/，设置后由 nginx 发送文件
+
+    # 图片处理进程池配置
+    IMAGE_WORKERS: int = 0  # 0 表示使用 CPU 核数
+    IMAGE_QUEUE_SIZE: int = 32  # 排队任务上限，超出时返回 503
+
+    # 按需缩放图片的磁盘缓存
+    IMAGE_CACHE_DIR: str = "./cache/images"
+    IMAGE_CACHE_MAX_BYTES: int = 1073741824  # 1GB
+
+    # 后台任务队列配置（启用后缩略图生成等耗时操作交给 python -m app.worker 执行）
+    BACKGROUND_JOBS_ENABLED: bool = False
+    JOB_VISIBILITY_TIMEOUT: int = 300  # 领取后超过此秒数未完成，可被其他 worker 重新领取
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_DELAY: int = 10  # 重试退避基数（秒），按 2 的幂增长
+    JOB_POLL_INTERVAL: float = 1.0  # 队列为空时的轮询间隔（秒）
+
+    # 响应缓存配置
+    RESPONSE_CACHE_MAX_BYTES: int = 33554432  # 32MB
+    RESPONSE_CACHE_TTL: int = 300  # 5分钟
+
     # 日志配置
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
@@ -50,13 +73,24 @@ class Settings(BaseSettings):
     BAIDU_AI_API_KEY: str = ""
     BAIDU_AI_SECRET_KEY: str = ""
     BAIDU_AI_PLANT_URL: str = "https://aip.baidubce.com/rest/2.0/image-classify/v1/plant"
+    BAIDU_AI_TOKEN_URL: str = "https://aip.baidubce.com/oauth/2.0/token"
 
     # 植物识别配置
-    IDENTIFICATION_CACHE_TTL: int = 86400  # 24小时
+    IDENTIFICATION_CACHE_TTL: int = 86400  # 24小时，过期后重新识别并刷新结果
+    IDENTIFICATION_MEMORY_CACHE_SIZE: int = 1024  # 进程内识别结果缓存条目数
+    IDENTIFICATION_LEASE_ENABLED: bool = False  # 多 worker 部署时通过数据库租约合并同一图片的识别
+    IDENTIFICATION_LEASE_TTL: int = 60  # 租约有效期（秒），持有者崩溃后其他进程可接管
     MAX_IDENTIFICATION_IMAGE_SIZE: int = 4194304  # 4MB
+    IDENTIFICATION_MAX_EDGE: int = 1024  # 发送识别前把长边缩到此尺寸以内，0 表示发送原图
+    IDENTIFICATION_MAX_BYTES: int = 307200  # 发送识别的图片字节预算（300KB）
+    IDENTIFICATION_JPEG_QUALITY: int = 85  # 发送识别前重新压缩的初始 JPEG 质量
     IDENTIFICATION_TEMP_DIR: str = "uploads/identifications"
     BAIDU_AI_QPS: int = 2  # 每秒并发请求数
+    BAIDU_AI_BURST: int = 2  # 令牌桶容量（允许的瞬时突发请求数）
+    BAIDU_AI_QUEUE_SIZE: int = 20  # 限流等待队列上限，超出时返回 429
+    BAIDU_AI_RATE_LIMIT_SHARED: bool = False  # 多个 worker 进程通过 PostgreSQL 共享 QPS 配额
     BAIDU_AI_TIMEOUT: int = 10  # 请求超时时间（秒）
+    BAIDU_AI_MAX_CONCURRENCY: int = 4  # 同时进行的识别请求数上限
 
     # 时区
     TIMEZONE: str = "Asia/Shanghai"
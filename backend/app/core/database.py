@@ -7,6 +7,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 
 from app.core.config import settings
+from app.core.versioning import register_version_tracking
 
 # 创建数据库引擎
 engine = create_engine(
@@ -19,6 +20,9 @@ engine = create_engine(
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 提交时自动递增被修改表的版本号（用于 ETag）
+register_version_tracking(SessionLocal)
+
 # 创建基础模型类
 Base = declarative_base()
 
@@ -0,0 +1,51 @@
+"""
+条件请求（ETag / If-None-Match）支持
+
+ETag 由请求地址和相关数据表的版本号计算得出，数据未变化时
+在构建响应之前直接返回 304。
+"""
+import hashlib
+from datetime import date
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.versioning import current_table_versions
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def conditional_get(*tables: str, daily: bool = False):
+    """
+    读接口的 ETag 依赖
+
+    用法：@router.get("", dependencies=[conditional_get("rooms", "plants")])
+
+    Args:
+        tables: 响应数据依赖的表
+        daily: 响应是否随日期变化（如今日任务）
+    """
+    def dependency(request: Request, response: Response, db: Session = Depends(get_db)):
+        versions = current_table_versions(db, tables)
+        seed = "|".join(
+            [request.url.path, str(sorted(request.query_params.multi_items()))]
+            + [f"{name}:{versions[name]}" for name in sorted(versions)]
+            + ([date.today().isoformat()] if daily else [])
+        )
+        etag = f'"{hashlib.sha1(seed.encode()).hexdigest()}"'
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
+        # 允许客户端缓存，但每次使用前需带 If-None-Match 重新验证
+        response.headers["Cache-Control"] = "no-cache"
+
+    return Depends(dependency)
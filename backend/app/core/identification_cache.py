@@ -0,0 +1,90 @@
+"""
+植物识别结果的进程内缓存（图片 MD5 → 识别结果）
+
+位于数据库缓存（plant_identifications.image_hash）之前：同一张照片重复识别时
+不读写磁盘、不查数据库、不调用百度。条目在识别结果获取时间 + IDENTIFICATION_CACHE_TTL 后过期，
+与数据库缓存使用同一个过期时间；过期后由 IdentificationService 重新识别并刷新两级缓存。
+
+注意：只在本进程内生效，删除识别记录时其他 worker 的条目最长在 TTL 后过期。
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class IdentificationCache:
+    """按条目数淘汰的 LRU 缓存，带两级命中率统计"""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memoryHits": 0, "dbHits": 0, "misses": 0, "refreshes": 0, "evictions": 0}
+
+    def get(self, image_hash: str) -> Optional[Dict[str, Any]]:
+        """获取未过期的识别结果（返回副本），未命中不计数，由调用方在查数据库后记录"""
+        with self._lock:
+            entry = self._entries.get(image_hash)
+            if entry is None:
+                return None
+            result, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[image_hash]
+                return None
+            self._entries.move_to_end(image_hash)
+            self._stats["memoryHits"] += 1
+            return copy.deepcopy(result)
+
+    def set(self, image_hash: str, result: Dict[str, Any], identified_at: Optional[datetime]) -> None:
+        """
+        写入识别结果
+
+        Args:
+            image_hash: 图片 MD5
+            result: 识别结果
+            identified_at: 结果获取时间（与数据库中的时间一致，保证两级缓存同时过期）
+        """
+        age = (datetime.now() - identified_at).total_seconds() if identified_at else 0
+        expires_at = time.time() + self.ttl - max(age, 0)
+        if expires_at <= time.time() or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[image_hash] = (copy.deepcopy(result), expires_at)
+            self._entries.move_to_end(image_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, image_hash: Optional[str]) -> None:
+        if image_hash:
+            with self._lock:
+                self._entries.pop(image_hash, None)
+
+    def record(self, outcome: str) -> None:
+        """记录数据库层的结果：dbHits / misses / refreshes（过期后重新识别）"""
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+        lookups = stats["memoryHits"] + stats["dbHits"] + stats["misses"] + stats["refreshes"]
+        return {
+            **stats,
+            "entries": entries,
+            "maxEntries": self.max_entries,
+            "ttl": self.ttl,
+            "memoryHitRatio": round(stats["memoryHits"] / lookups, 4) if lookups else None,
+            "hitRatio": round((stats["memoryHits"] + stats["dbHits"]) / lookups, 4) if lookups else None,
+        }
+
+
+# 全局单例
+identification_cache = IdentificationCache(settings.IDENTIFICATION_MEMORY_CACHE_SIZE, settings.IDENTIFICATION_CACHE_TTL)
@@ -0,0 +1,125 @@
+"""
+按需缩放图片的磁盘缓存
+
+缓存文件按 键（源文件指纹 + 缩放参数 的 SHA-256）分两级目录存放，
+总大小超过预算时按最近使用时间（LRU）淘汰。同一个键的并发请求只渲染一次，
+其余请求等待同一个渲染任务的结果。
+
+注意：LRU 顺序和进行中的渲染只在本进程内维护，启动时按文件修改时间重建。
+"""
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class ImageCache:
+    """带字节预算的 LRU 磁盘缓存"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._entries: Optional["OrderedDict[str, int]"] = None
+        self._size = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {"hits": 0, "misses": 0, "collapsed": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+    def path_for(self, key: str, ext: str) -> Path:
+        return self.directory / key[:2] / f"{key}.{ext}"
+
+    async def get_or_render(
+        self,
+        key: str,
+        ext: str,
+        render: Callable[[Path], Awaitable[bool]]
+    ) -> Optional[Path]:
+        """
+        获取缓存文件，不存在时调用 render 生成
+
+        Args:
+            key: 缓存键（make_key 生成）
+            ext: 文件扩展名
+            render: 接收目标路径、负责写入文件的协程函数，返回是否成功
+
+        Returns:
+            缓存文件路径，渲染失败时返回 None
+        """
+        self._load()
+        path = self.path_for(key, ext)
+        if key in self._entries:
+            if path.exists():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return path
+            # 文件被外部删除
+            self._size -= self._entries.pop(key)
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._stats["misses"] += 1
+            task = asyncio.ensure_future(self._render(key, path, render))
+            self._inflight[key] = task
+        else:
+            self._stats["collapsed"] += 1
+        # shield：某个请求被取消（客户端断开）不影响其他等待者
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "entries": len(self._entries or ()),
+            "inflight": len(self._inflight),
+            "sizeBytes": self._size,
+            "maxBytes": self.max_bytes,
+        }
+
+    async def _render(self, key: str, path: Path, render: Callable[[Path], Awaitable[bool]]) -> Optional[Path]:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not await render(path):
+                return None
+            size = path.stat().st_size
+            self._entries[key] = size
+            self._size += size
+            self._evict()
+            return path
+        finally:
+            del self._inflight[key]
+
+    def _load(self) -> None:
+        """首次使用时扫描缓存目录，按修改时间重建 LRU 顺序"""
+        if self._entries is not None:
+            return
+        files = []
+        if self.directory.exists():
+            for shard in os.scandir(self.directory):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.is_file() and not entry.name.startswith("."):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, entry.name.split(".")[0], stat.st_size))
+        files.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in files)
+        self._size = sum(size for _, _, size in files)
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            self._stats["evictions"] += 1
+            for path in (self.directory / key[:2]).glob(f"{key}.*"):
+                path.unlink(missing_ok=True)
+
+
+# 全局单例
+image_cache = ImageCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
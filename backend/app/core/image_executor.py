@@ -0,0 +1,89 @@
+"""
+图片处理进程池
+
+Pillow 解码和缩放是 CPU 密集操作，在 async 路由中直接执行会阻塞整个事件循环。
+这里用有界的 ProcessPoolExecutor 承担这些工作，对外提供 async 接口：
+排队任务数超过上限时立即拒绝（ImageQueueFull → 503），而不是无限堆积。
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class ImageQueueFull(RuntimeError):
+    """图片处理队列已满"""
+
+
+class ImageExecutor:
+    """带排队上限和统计的图片处理进程池"""
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        提交任务（同步接口，供脚本和同步 Service 使用）
+
+        Raises:
+            ImageQueueFull: 排队中的任务数已达上限
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise ImageQueueFull("图片处理繁忙，请稍后重试")
+            if self._executor is None:
+                # spawn 启动的子进程不继承数据库连接和线程状态
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            self._pending += 1
+            self._stats["submitted"] += 1
+        future = self._executor.submit(func, *args, **kwargs)
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """在进程池中执行 func 并等待结果，不阻塞事件循环"""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """在进程池中执行 func 并阻塞等待结果（仅用于非事件循环线程）"""
+        return self.submit(func, *args, **kwargs).result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "pending": self._pending,
+                "maxPending": self.max_pending,
+                "workers": self.max_workers,
+            }
+
+    def _on_done(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._stats["failed"] += 1
+            else:
+                self._stats["completed"] += 1
+
+
+# 全局单例（进程池在第一次提交任务时创建）
+image_executor = ImageExecutor(settings.IMAGE_WORKERS, settings.IMAGE_QUEUE_SIZE)
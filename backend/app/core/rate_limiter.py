@@ -0,0 +1,187 @@
+"""
+令牌桶限流器（公平排队）
+
+令牌按 rate 每秒补充，最多积累 burst 个；没有令牌时请求进入有界等待队列，
+按客户端轮转出队，单个客户端的连续请求不会饿死其他客户端；队列满时立即拒绝，
+并给出预计的重试时间（→ 429 Retry-After）。
+
+可选的 SharedRateLimit 通过 PostgreSQL advisory lock 在多个 worker 进程之间共享配额。
+"""
+import asyncio
+import math
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+
+class RateLimitExceeded(Exception):
+    """等待队列已满"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("识别请求过多，请稍后重试")
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class SharedRateLimit:
+    """
+    跨进程限流：slots 个 advisory lock 槽位，每个请求占用一个槽位 1 秒，
+    所有进程合计每秒最多发出 slots 个请求。进程退出时连接断开，锁自动释放。
+    """
+
+    def __init__(self, engine: Engine, name: str, slots: int):
+        self.engine = engine
+        self.key = zlib.crc32(name.encode()) & 0x7fffffff
+        self.slots = max(slots, 1)
+
+    def acquire(self) -> None:
+        """阻塞直到获得一个槽位（在线程池中调用）"""
+        conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            while True:
+                for slot in range(self.slots):
+                    locked = conn.execute(
+                        text("SELECT pg_try_advisory_lock(:key, :slot)"),
+                        {"key": self.key, "slot": slot}
+                    ).scalar()
+                    if locked:
+                        threading.Timer(1.0, self._release, (conn, slot)).start()
+                        conn = None
+                        return
+                time.sleep(1 / self.slots)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _release(self, conn, slot: int) -> None:
+        try:
+            conn.execute(text("SELECT pg_advisory_unlock(:key, :slot)"), {"key": self.key, "slot": slot})
+        finally:
+            conn.close()
+
+
+class TokenBucketLimiter:
+    """按客户端公平排队的令牌桶"""
+
+    def __init__(self, rate: float, burst: int, max_queue: int, shared: Optional[SharedRateLimit] = None):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_queue = max_queue
+        self.shared = shared
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        # 客户端 → 等待中的 future，按轮转顺序排列
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._stats = {"granted": 0, "queued": 0, "rejected": 0, "totalWaitSeconds": 0.0}
+
+    async def acquire(self, client_id: str = "") -> Dict[str, Any]:
+        """
+        获取一个令牌，需要时排队等待
+
+        Args:
+            client_id: 客户端标识（如 IP），排队时按客户端轮转
+
+        Returns:
+            {"position": 进入队列时的位置（0 表示无需排队）, "waitSeconds": 实际等待秒数}
+
+        Raises:
+            RateLimitExceeded: 等待队列已满
+        """
+        self._refill()
+        if self.shared is None and not self._queued and self._tokens >= 1:
+            self._tokens -= 1
+            self._stats["granted"] += 1
+            return {"position": 0, "waitSeconds": 0.0}
+
+        if self._queued >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise RateLimitExceeded(self.estimate_wait(self._queued + 1))
+
+        position = self._position(client_id)
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(client_id, deque()).append(future)
+        self._queued += 1
+        self._stats["queued"] += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        started = time.monotonic()
+        # 等待者被取消（客户端断开）时 future 随之取消，出队时跳过
+        await future
+        waited = time.monotonic() - started
+        self._stats["granted"] += 1
+        self._stats["totalWaitSeconds"] += waited
+        return {"position": position, "waitSeconds": round(waited, 2)}
+
+    def estimate_wait(self, position: int) -> float:
+        """排在第 position 位（从 1 开始）的请求预计等待秒数"""
+        self._refill()
+        return max(0.0, (position - self._tokens) / self.rate)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "totalWaitSeconds": round(self._stats["totalWaitSeconds"], 2),
+            "queueLength": self._queued,
+            "maxQueue": self.max_queue,
+            "clients": len(self._queues),
+            "rate": self.rate,
+            "burst": self.burst,
+            "estimatedWait": round(self.estimate_wait(self._queued + 1), 2),
+            "shared": self.shared is not None,
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _position(self, client_id: str) -> int:
+        """新请求在轮转调度下的位置：每个客户端排在它前面的最多 k+1 个请求（k 为本客户端已排队数）"""
+        ahead = len(self._queues.get(client_id, ()))
+        return sum(
+            min(len(queue), ahead + 1)
+            for other, queue in self._queues.items()
+            if other != client_id
+        ) + ahead + 1
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        """按客户端轮转取出下一个仍在等待的请求"""
+        while self._queues:
+            client_id, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._queues.move_to_end(client_id)
+            else:
+                del self._queues[client_id]
+            if not future.done():
+                return future
+        return None
+
+    async def _dispatch(self) -> None:
+        while self._queued:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            future = self._next_waiter()
+            if future is None:
+                break
+            if self.shared is not None:
+                await run_in_threadpool(self.shared.acquire)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
@@ -0,0 +1,165 @@
+"""
+进程内响应缓存
+
+按路由和规范化后的请求参数缓存接口返回的数据，支持 TTL 和按内存预算的 LRU 淘汰。
+每个缓存条目带有标签（所依赖的表名）。缓存键包含这些表在数据库中的版本号
+（与 ETag 相同的 table_versions），任何进程、后台任务或脚本的写入提交后，
+读取都会换用新键，不会拿到旧数据；本进程的提交还会立即删除对应条目，释放内存。
+"""
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import BackgroundTasks, Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.versioning import current_table_versions, on_tables_committed
+
+
+class ResponseCache:
+    """带标签失效的 LRU + TTL 缓存"""
+
+    def __init__(self, max_bytes: int, default_ttl: int):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[Any, float, Tuple[str, ...], int]]" = OrderedDict()
+        self._tag_keys: Dict[str, Set[str]] = {}
+        # 标签代数：读取期间发生写入时，丢弃这次读取的结果，避免缓存旧数据
+        self._tag_generations: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            value, expires_at, _, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def generations(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._tag_generations.get(tag, 0) for tag in tags)
+
+    def set(self, key: str, value: Any, tags: Tuple[str, ...], ttl: Optional[int] = None,
+            generations: Optional[Tuple[int, ...]] = None) -> None:
+        size = len(json.dumps(value, default=str, ensure_ascii=False).encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generations is not None and generations != tuple(
+                self._tag_generations.get(tag, 0) for tag in tags
+            ):
+                return
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.monotonic() + (ttl or self.default_ttl)
+            self._entries[key] = (value, expires_at, tags, size)
+            self._size += size
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+                for key in self._tag_keys.pop(tag, set()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tag_keys.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hitRatio": round(self._stats["hits"] / lookups, 4) if lookups else None,
+                "entries": len(self._entries),
+                "sizeBytes": self._size,
+                "maxBytes": self.max_bytes,
+            }
+
+    def _remove(self, key: str) -> None:
+        _, _, tags, size = self._entries.pop(key)
+        self._size -= size
+        for tag in tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+
+# 全局单例
+response_cache = ResponseCache(settings.RESPONSE_CACHE_MAX_BYTES, settings.RESPONSE_CACHE_TTL)
+on_tables_committed(response_cache.invalidate_tags)
+
+# 不参与缓存键的依赖注入参数
+_NON_KEY_TYPES = (Session, Request, Response, BackgroundTasks)
+
+
+def cached_response(*tags: str, ttl: Optional[int] = None, daily: bool = False):
+    """
+    为 GET 路由启用响应缓存
+
+    用法（放在路由装饰器下方）：
+        @router.get("/task-types")
+        @cached_response("task_types", ttl=600)
+        async def get_task_types(...): ...
+
+    Args:
+        tags: 响应数据依赖的表，任一表有写入提交时失效
+        ttl: 过期时间（秒），默认 RESPONSE_CACHE_TTL
+        daily: 响应是否随日期变化（如今日任务）
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            params = sorted(
+                (name, repr(value)) for name, value in kwargs.items()
+                if not isinstance(value, _NON_KEY_TYPES)
+            )
+            key = f"{func.__module__}.{func.__qualname__}:{params}"
+            db = next((value for value in kwargs.values() if isinstance(value, Session)), None)
+            if db is not None:
+                # 其他进程的写入不会触发本进程的失效回调，按数据库中的版本号区分条目
+                versions = current_table_versions(db, tags)
+                key = f"{key}:{sorted(versions.items())}"
+            if daily:
+                key = f"{key}:{date.today().isoformat()}"
+
+            cached = response_cache.get(key)
+            if cached is not None:
+                return cached
+
+            generations = response_cache.generations(tags)
+            result = await func(*args, **kwargs)
+            response_cache.set(key, result, tags, ttl=ttl, generations=generations)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,63 @@
+"""
+进程内请求合并（single-flight）
+
+同一个键的并发调用只执行一次：第一个调用者执行，其余调用者等待同一个结果
+（包括异常）。执行者被取消（客户端断开）时，等待者中的一个接替执行。
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {"leaders": 0, "coalesced": 0, "takeovers": 0}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        执行 func，同一个键已有进行中的调用时等待其结果
+
+        Returns:
+            (结果, 是否复用了其他调用的结果)
+        """
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    # 本请求自身被取消
+                    raise
+                # 执行者被取消，重新竞争执行
+                self._stats["takeovers"] += 1
+                continue
+            self._stats["coalesced"] += 1
+            return result, True
+
+        future = asyncio.get_running_loop().create_future()
+        # 没有等待者时也标记异常已读取，避免 "exception was never retrieved" 日志
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        self._stats["leaders"] += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "inflight": len(self._inflight)}
+
+
+# 识别请求按图片 MD5 合并
+identification_flight = SingleFlight()
@@ -0,0 +1,243 @@
+"""
+上传文件静态服务
+
+在 StaticFiles（路径解析、目录穿越防护、404）的基础上补齐浏览器缓存和大文件传输：
+- 内容寻址的 URL（blob 原图，或 ?v= 与文件当前内容指纹一致的缩略图和衍生图）返回
+  Cache-Control: immutable，其余文件短期缓存，过期后用 ETag 重新验证
+- 强 ETag + Last-Modified，If-None-Match / If-Modified-Since 命中时返回 304
+- 单区间 Range 请求（206 / 416），支持 If-Range
+- 存在 .br / .gz 预压缩文件且客户端接受时直接返回压缩版本（仅非图片类型）
+- 服务器支持 ASGI zerocopysend 扩展时用 sendfile 零拷贝发送，否则分块读取
+- 配置 UPLOADS_ACCEL_REDIRECT_PREFIX 后只返回 X-Accel-Redirect 头，由 nginx 发送文件
+"""
+import functools
+import hashlib
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# 内容指纹查询参数
+FINGERPRINT_PARAM = "v"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 分块发送大小（不支持 zerocopysend 时）
+CHUNK_SIZE = 256 * 1024
+
+# 文件名本身就是内容哈希（blob 原图 <sha256>.<扩展名>）
+_CONTENT_HASH_NAME = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+
+# 预压缩文件：Accept-Encoding 编码 → 文件后缀（按优先级）
+_PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _content_fingerprint(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_fingerprint(path: str, mtime_ns: int, size: int) -> str:
+    # 按修改时间和大小缓存，文件被替换后重新计算
+    return _content_fingerprint(path)
+
+
+def versioned_url(path: Path) -> str:
+    """
+    生成带内容指纹的文件 URL（/uploads/...?v=<SHA-256 前 12 位>）
+
+    文件重新生成（如缩略图尺寸调整）后指纹随之变化，浏览器可以永久缓存旧 URL。
+    """
+    return f"/{path.as_posix()}?{FINGERPRINT_PARAM}={_content_fingerprint(path)}"
+
+
+class RangeNotSatisfiable(Exception):
+    """Range 请求超出文件范围"""
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单区间 Range 头
+
+    Returns:
+        (起始字节, 结束字节)（均包含），多区间或无法解析时返回 None（按完整文件返回）
+
+    Raises:
+        RangeNotSatisfiable: 区间超出文件范围
+    """
+    match = _RANGE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    start, end = match.groups()
+    if start == "":
+        # bytes=-N：最后 N 个字节
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match 使用弱比较
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def _not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class FileRangeResponse(Response):
+    """发送文件的一个字节区间，优先使用 zerocopysend"""
+
+    def __init__(self, path: str, start: int, length: int, status_code: int, headers: Dict[str, str]):
+        super().__init__(status_code=status_code, headers=headers)
+        self.path = path
+        self.start = start
+        self.length = length
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False
+                })
+            return
+
+        remaining = self.length
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    # 文件在发送过程中被截断
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadFiles(StaticFiles):
+    """/uploads 静态文件服务"""
+
+    def __init__(self, directory: str, accel_redirect_prefix: str = "", max_age: int = 0):
+        super().__init__(directory=directory)
+        self.root = os.path.realpath(directory)
+        self.accel_redirect_prefix = accel_redirect_prefix
+        self.max_age = max_age
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        media_type = guess_type(full_path)[0] or "text/plain"
+        name = os.path.basename(full_path)
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        fingerprint = query.get(FINGERPRINT_PARAM, [None])[0]
+        # 只有与文件当前内容一致的指纹才可永久缓存，任意 ?v= 不能把可变文件钉在共享缓存里
+        immutable = bool(_CONTENT_HASH_NAME.match(name)) or (
+            fingerprint is not None
+            and fingerprint == _cached_fingerprint(full_path, stat_result.st_mtime_ns, stat_result.st_size)
+        )
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else f"public, max-age={self.max_age}",
+            "Accept-Ranges": "bytes",
+        }
+
+        # 文本类文件（SVG、JSON 等）优先返回预压缩版本；图片本身已压缩，不做额外查找
+        encoding = None
+        range_header = request_headers.get("range")
+        if not media_type.startswith("image/") or media_type == "image/svg+xml":
+            headers["Vary"] = "Accept-Encoding"
+            if range_header is None:
+                accepted = request_headers.get("accept-encoding", "")
+                for candidate, suffix in _PRECOMPRESSED:
+                    if candidate in accepted:
+                        try:
+                            compressed_stat = os.stat(full_path + suffix)
+                        except OSError:
+                            continue
+                        encoding, full_path, stat_result = candidate, full_path + suffix, compressed_stat
+                        headers["Content-Encoding"] = encoding
+                        break
+
+        if _CONTENT_HASH_NAME.match(name) and encoding is None:
+            etag = f'"{name.split(".")[0]}"'
+        else:
+            etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}{"-" + encoding if encoding else ""}"'
+        headers["ETag"] = etag
+        headers["Last-Modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+
+        if status_code == 200 and _not_modified(request_headers, etag, stat_result.st_mtime):
+            return Response(status_code=304, headers=headers)
+
+        if self.accel_redirect_prefix:
+            # nginx 内部 location 负责 Range 和 sendfile
+            relative_path = os.path.relpath(os.path.realpath(full_path), self.root)
+            headers["X-Accel-Redirect"] = self.accel_redirect_prefix.rstrip("/") + "/" + relative_path
+            headers["Content-Type"] = media_type
+            return Response(status_code=status_code, headers=headers)
+
+        size = stat_result.st_size
+        start, end = 0, size - 1
+        if range_header is not None and status_code == 200:
+            if_range = request_headers.get("if-range")
+            if if_range is None or if_range.strip() in (etag, headers["Last-Modified"]):
+                try:
+                    byte_range = parse_range(range_header, size)
+                except RangeNotSatisfiable:
+                    return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+                if byte_range is not None:
+                    start, end = byte_range
+                    status_code = 206
+                    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        headers["Content-Type"] = media_type
+        headers["Content-Length"] = str(end - start + 1)
+        return FileRangeResponse(full_path, start, end - start + 1, status_code, headers)
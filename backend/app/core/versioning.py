@@ -0,0 +1,151 @@
+"""
+数据表版本号跟踪
+
+会话 flush 时记录被写入的表，提交前在同一事务中把这些表的版本号加一。
+读接口据此生成 ETag，无需构建响应即可判断数据是否变化。
+"""
+from typing import Callable, Dict, Iterable, List, Set
+
+from sqlalchemy import BigInteger, Column, MetaData, String, Table, event, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+# 与 app.models.table_version.TableVersion 对应的表结构（此处不导入模型，避免循环依赖）
+table_versions = Table(
+    "table_versions",
+    MetaData(),
+    Column("table_name", String(64), primary_key=True),
+    Column("version", BigInteger, nullable=False),
+)
+
+# 数据库外键级联：删除父表记录时子表也会变化
+_DELETE_CASCADES = {
+    "rooms": ("plant_shelves", "plants"),
+    "plant_shelves": ("plants",),
+    "plants": ("plant_images", "plant_configs", "plant_identifications"),
+    "plant_images": ("plant_image_variants",),
+}
+
+# 不参与版本号跟踪的表：任务队列和识别租约写入频繁且没有读接口依赖，
+# 若跟踪会让所有 worker 争用同一行版本号，抵消 SKIP LOCKED 的并发
+_UNTRACKED_TABLES = {"jobs", "identification_leases"}
+
+_INFO_KEY = "changed_tables"
+_COMMITTED_KEY = "committed_tables"
+# 本会话已查询过的版本号（同一请求内 ETag 和响应缓存共用，提交或回滚后清空）
+_LOADED_KEY = "loaded_table_versions"
+
+# 事务提交成功后的回调，参数为本次提交修改过的表名集合
+_commit_listeners: List[Callable[[Set[str]], None]] = []
+
+
+def _mark_changed(session: Session, table_name: str, deleted: bool = False) -> None:
+    if table_name in _UNTRACKED_TABLES:
+        return
+    changed = session.info.setdefault(_INFO_KEY, set())
+    changed.add(table_name)
+    if deleted:
+        for child in _DELETE_CASCADES.get(table_name, ()):
+            _mark_changed(session, child, deleted=True)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    for obj in session.new:
+        _mark_changed(session, obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            _mark_changed(session, obj.__table__.name)
+    for obj in session.deleted:
+        _mark_changed(session, obj.__table__.name, deleted=True)
+
+
+def _on_orm_execute(orm_execute_state) -> None:
+    # Query.update()/delete() 和 ORM 批量 insert 等语句不经过 flush，单独记录
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        _mark_changed(
+            orm_execute_state.session,
+            mapper.local_table.name,
+            deleted=orm_execute_state.is_delete
+        )
+
+
+def _before_commit(session: Session) -> None:
+    session.flush()
+    changed = session.info.pop(_INFO_KEY, None)
+    if changed:
+        bump_versions(session, changed)
+        session.info[_COMMITTED_KEY] = changed
+
+
+def _after_commit(session: Session) -> None:
+    session.info.pop(_LOADED_KEY, None)
+    changed = session.info.pop(_COMMITTED_KEY, None)
+    if changed:
+        for listener in _commit_listeners:
+            listener(changed)
+
+
+def _discard_changes(session: Session, *args) -> None:
+    session.info.pop(_INFO_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
+    session.info.pop(_LOADED_KEY, None)
+
+
+def on_tables_committed(listener: Callable[[Set[str]], None]) -> None:
+    """注册提交回调（如进程内缓存失效）"""
+    _commit_listeners.append(listener)
+
+
+def mark_tables_changed(session: Session, tables: Iterable[str]) -> None:
+    """手动标记被修改的表（用于 ORM 无法识别的原生 SQL 写入）"""
+    for table_name in tables:
+        _mark_changed(session, table_name)
+
+
+def bump_versions(session: Session, tables: Iterable[str]) -> None:
+    """将指定表的版本号加一（按表名排序加锁，避免死锁）"""
+    rows = [{"table_name": name, "version": 1} for name in sorted(set(tables))]
+    stmt = insert(table_versions).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table_versions.c.table_name],
+        set_={"version": table_versions.c.version + 1}
+    )
+    session.execute(stmt)
+
+
+def get_table_versions(session: Session, tables: Iterable[str]) -> Dict[str, int]:
+    """查询表版本号，从未写入过的表版本号为 0"""
+    tables: Set[str] = set(tables)
+    rows = session.execute(
+        select(table_versions.c.table_name, table_versions.c.version)
+        .where(table_versions.c.table_name.in_(tables))
+    ).all()
+    versions = {name: 0 for name in tables}
+    versions.update({name: version for name, version in rows})
+    return versions
+
+
+def current_table_versions(session: Session, tables: Iterable[str]) -> Dict[str, int]:
+    """
+    查询表版本号，同一会话内已查询过的表直接复用（如 conditional_get 之后的响应缓存）
+
+    会话提交或回滚后清空，之后重新查询。
+    """
+    tables = set(tables)
+    loaded = session.info.setdefault(_LOADED_KEY, {})
+    missing = tables - loaded.keys()
+    if missing:
+        loaded.update(get_table_versions(session, missing))
+    return {name: loaded[name] for name in tables}
+
+
+def register_version_tracking(session_factory) -> None:
+    """为会话工厂注册版本号跟踪事件"""
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "do_orm_execute", _on_orm_execute)
+    event.listen(session_factory, "before_commit", _before_commit)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _discard_changes)
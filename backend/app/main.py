@@ -4,7 +4,6 @@ FastAPI应用主入口
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import logging
 from pathlib import Path
@@ -12,13 +11,20 @@ from pathlib import Path
 from app.core.config import settings
 from app.api.v1 import api_router
 from app.core.database import engine, Base
+from app.core.image_executor import image_executor
+from app.core.upload_files import UploadFiles
+from app.services.baidu_ai_service import baidu_ai_service
 
 # 导入所有模型（确保它们注册到 Base.metadata）
 # 顺序很重要：先导入被引用的表，后导入引用其他表的表
-from app.models import room, task_type  # 基础表，无外键
+from app.models import room, task_type, blob  # 基础表，无外键
 from app.models import plant_shelf  # 依赖 room
 from app.models import plant  # 依赖 room 和 plant_shelf
 from app.models import plant_image, plant_config  # 依赖 plant 和 task_type
+from app.models import plant_image_variant  # 依赖 plant_image
+from app.models import table_version  # ETag 版本号
+from app.models import job  # 后台任务队列
+from app.models import identification_lease  # 识别租约
 
 # 配置日志
 logging.basicConfig(
@@ -44,6 +50,8 @@ async def lifespan(app: FastAPI):
     yield
     # 关闭时
     logger.info("👋 Shutting down Plant DTP API...")
+    image_executor.shutdown()
+    await baidu_ai_service.close()
 
 
 # 创建FastAPI应用
@@ -119,7 +127,15 @@ app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 # 挂载静态文件服务
 uploads_dir = Path("uploads")
 uploads_dir.mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(uploads_dir)), name="uploads")
+app.mount(
+    "/uploads",
+    UploadFiles(
+        directory=str(uploads_dir),
+        accel_redirect_prefix=settings.UPLOADS_ACCEL_REDIRECT_PREFIX,
+        max_age=settings.UPLOADS_CACHE_MAX_AGE
+    ),
+    name="uploads"
+)
 
 
 # 全局异常处理
@@ -0,0 +1,34 @@
+"""
+内容寻址文件模型
+
+上传的图片按 SHA-256 存储一份，PlantImage / PlantIdentification 通过 blob_sha256 引用，
+ref_count 记录引用数，最后一个引用释放时删除文件。
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String(500), nullable=False)  # 相对路径，如 uploads/blobs/ab/cd/<sha256>.jpg
+    size = Column(BigInteger, nullable=False)
+    image_type = Column(String(10), nullable=True)  # jpg / png / gif / webp / bmp
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @property
+    def url(self) -> str:
+        return f"/{self.path}"
+
+    def to_dict(self):
+        return {
+            "sha256": self.sha256,
+            "url": self.url,
+            "size": self.size,
+            "imageType": self.image_type,
+            "refCount": self.ref_count,
+            "createdAt": self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,16 @@
+"""
+识别租约模型
+
+多进程部署时，同一图片的识别由持有租约的进程执行，其他进程等待其结果；
+租约过期（持有者崩溃）后可被接管。
+"""
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+
+class IdentificationLease(Base):
+    __tablename__ = "identification_leases"
+
+    image_hash = Column(String(64), primary_key=True)  # 图片MD5
+    owner = Column(String(100), nullable=False)  # 主机名:进程号:随机串
+    expires_at = Column(DateTime(timezone=True), nullable=False)
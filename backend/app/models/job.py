@@ -0,0 +1,51 @@
+"""
+后台任务模型（PostgreSQL 任务队列）
+"""
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(BigInteger, primary_key=True, index=True)
+    type = Column(String(50), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    status = Column(String(20), default="queued", nullable=False)  # queued | running | succeeded | failed
+    priority = Column(Integer, default=0, nullable=False)  # 越大越先执行
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # 最早执行时间（重试退避）
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # 可见性超时，过期后可被其他 worker 重新领取
+    last_error = Column(Text, nullable=True)
+    result = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # 只索引未完成的任务，已完成任务再多也不影响出队
+        Index('idx_jobs_dequeue', 'status', 'priority', 'run_at',
+              postgresql_where=text("status IN ('queued', 'running')")),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "type": self.type,
+            "payload": self.payload,
+            "status": self.status,
+            "priority": self.priority,
+            "attempts": self.attempts,
+            "maxAttempts": self.max_attempts,
+            "runAt": self.run_at.isoformat() if self.run_at else None,
+            "lockedBy": self.locked_by,
+            "lastError": self.last_error,
+            "result": self.result,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "updatedAt": self.updated_at.isoformat() if self.updated_at else None,
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -1,10 +1,12 @@
 """
 植物模型
 """
-from sqlalchemy import Column, Integer, String, Text, Date, ForeignKey, Boolean, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, ForeignKey, Boolean, DateTime, Index, event, inspect
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.utils.search_utils import build_search_vector
 
 
 class Plant(Base):
@@ -22,19 +24,29 @@ class Plant(Base):
     identification_id = Column(Integer, ForeignKey("plant_identifications.id"), nullable=True)
     source = Column(String(20), default="manual", nullable=False)  # manual | identify
     is_active = Column(Boolean, default=True)
+    # 封面图（主图，否则最早的图片），由 PlantImageService 在图片写入时同步维护
+    primary_image_id = Column(
+        Integer, ForeignKey("plant_images.id", ondelete="SET NULL", use_alter=True), nullable=True
+    )
+    primary_thumbnail_url = Column(String(500), nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+    # 名称/学名/描述的搜索向量，由下方的 mapper 事件自动维护
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
-    def to_dict(self, include_images=False, room_name=None):
+    __table_args__ = (
+        Index('idx_plants_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+
+    def to_dict(self, include_images=False, room_name=None, cover=None):
         """
         转换为字典格式
 
         Args:
             include_images: 是否包含主图信息
             room_name: 房间名称（需要在外部查询时传入）
+            cover: 主图和图片数量（由调用方批量查询后传入）
         """
-        from app.models.plant_image import PlantImage
-
         data = {
             "id": self.id,
             "roomId": self.room_id,
@@ -48,6 +60,8 @@ class Plant(Base):
             "identificationId": self.identification_id,
             "source": self.source,
             "isActive": self.is_active,
+            "primaryImageId": self.primary_image_id,
+            "primaryThumbnailUrl": self.primary_thumbnail_url,
             "createdAt": self.created_at.isoformat() if self.created_at else None,
             "updatedAt": self.updated_at.isoformat() if self.updated_at else None
         }
@@ -58,49 +72,24 @@ class Plant(Base):
 
         # 添加主图信息
         if include_images:
-            # 先查找标记为主图的图片
-            primary_image = self.db.query(PlantImage).filter(
-                PlantImage.plant_id == self.id,
-                PlantImage.is_primary == True
-            ).first()
-
-            # 如果没有主图，使用第一张图片（按创建时间排序）
-            if not primary_image:
-                primary_image = self.db.query(PlantImage).filter(
-                    PlantImage.plant_id == self.id
-                ).order_by(PlantImage.created_at).first()
+            cover = cover or {}
+            data["primaryImage"] = cover.get("primaryImage")
+            data["imageCount"] = cover.get("imageCount", 0)
 
-            if primary_image:
-                data["primaryImage"] = primary_image.to_dict()
-            else:
-                data["primaryImage"] = None
+        return data
 
-            # 添加图片数量
-            data["imageCount"] = self.db.query(PlantImage).filter(
-                PlantImage.plant_id == self.id
-            ).count()
 
-        return data
+# 影响搜索向量的字段
+_SEARCH_FIELDS = ("name", "scientific_name", "description")
 
-    def get_primary_image_url(self):
-        """获取主图URL"""
-        from app.models.plant_image import PlantImage
-        from app.core.database import get_db
 
-        db = next(get_db())
-        try:
-            # 先查找标记为主图的图片
-            primary_image = db.query(PlantImage).filter(
-                PlantImage.plant_id == self.id,
-                PlantImage.is_primary == True
-            ).first()
+@event.listens_for(Plant, "before_insert")
+def _set_search_vector_on_insert(mapper, connection, target):
+    target.search_vector = build_search_vector(target.name, target.scientific_name, target.description)
 
-            # 如果没有主图，使用第一张图片
-            if not primary_image:
-                primary_image = db.query(PlantImage).filter(
-                    PlantImage.plant_id == self.id
-                ).order_by(PlantImage.created_at).first()
 
-            return primary_image.url if primary_image else None
-        finally:
-            db.close()
+@event.listens_for(Plant, "before_update")
+def _set_search_vector_on_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _SEARCH_FIELDS):
+        target.search_vector = build_search_vector(target.name, target.scientific_name, target.description)
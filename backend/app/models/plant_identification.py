@@ -13,6 +13,7 @@ class PlantIdentification(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=True)  # 单用户应用，预留字段但不设置外键
     image_url = Column(String(500), nullable=False)
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True)  # 内容寻址存储的原图
     image_hash = Column(String(64), nullable=True, unique=True)  # MD5哈希，用于去重
     api_provider = Column(String(50), default="baidu", nullable=False)
     request_id = Column(String(100), nullable=True)
@@ -22,25 +23,28 @@ class PlantIdentification(Base):
     correct_name = Column(String(200), nullable=True)
     processing_time = Column(DECIMAL(5, 2), nullable=True)
     cached = Column(Boolean, default=False, nullable=False)
+    identified_at = Column(DateTime, server_default=func.now(), nullable=False)  # 识别结果获取时间，缓存 TTL 由此计算
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    # 关系
-    plant = relationship("Plant", foreign_keys=[selected_plant_id])
+    # 关系（禁止隐式懒加载，列表场景由 IdentificationService 批量查询）
+    plant = relationship("Plant", foreign_keys=[selected_plant_id], lazy="raise")
 
     __table_args__ = (
         Index('idx_identifications_user', 'user_id'),
         Index('idx_identifications_image_hash', 'image_hash'),
         Index('idx_identifications_selected_plant', 'selected_plant_id'),
         Index('idx_identifications_created_at', 'created_at'),
+        Index('idx_identifications_created_at_id', 'created_at', 'id'),
+        Index('idx_identifications_blob_sha256', 'blob_sha256'),
     )
 
-    def to_dict(self, include_plant=False):
+    def to_dict(self, selected_plant=None):
         """
         转换为字典格式
 
         Args:
-            include_plant: 是否包含关联的植物信息
+            selected_plant: 关联的植物信息（由 IdentificationService 批量查询后传入）
         """
         import json
 
@@ -56,17 +60,14 @@ class PlantIdentification(Base):
             "correctName": self.correct_name,
             "processingTime": float(self.processing_time) if self.processing_time else None,
             "cached": self.cached,
+            "identifiedAt": self.identified_at.isoformat() if self.identified_at else None,
             "createdAt": self.created_at.isoformat() if self.created_at else None,
             "updatedAt": self.updated_at.isoformat() if self.updated_at else None,
         }
 
         # 添加关联的植物信息
-        if include_plant and self.plant:
-            data["selectedPlant"] = {
-                "id": self.plant.id,
-                "name": self.plant.name,
-                "primaryImageUrl": self.plant.get_primary_image_url()
-            }
+        if selected_plant:
+            data["selectedPlant"] = selected_plant
 
         return data
 
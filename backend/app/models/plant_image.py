@@ -1,9 +1,12 @@
 """
 植物图片模型
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from app.core.config import settings
 from app.core.database import Base
+from app.models.plant_image_variant import PlantImageVariant
 
 
 class PlantImage(Base):
@@ -12,6 +15,7 @@ class PlantImage(Base):
     id = Column(Integer, primary_key=True, index=True)
     plant_id = Column(Integer, ForeignKey("plants.id", ondelete="CASCADE"), nullable=False)
     url = Column(String(500), nullable=False)
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True)  # 内容寻址存储的原图
     thumbnail_url = Column(String(500), nullable=True)
     caption = Column(String(200), nullable=True)
     is_primary = Column(Boolean, default=False, nullable=False)
@@ -22,6 +26,39 @@ class PlantImage(Base):
     sort_order = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # 列表中的图片通过一次 IN 查询批量加载衍生图
+    variants = relationship(
+        PlantImageVariant,
+        lazy="selectin",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by=PlantImageVariant.width
+    )
+
+    __table_args__ = (
+        Index('idx_plant_images_plant_id', 'plant_id'),
+        Index('idx_plant_images_blob_sha256', 'blob_sha256'),
+    )
+
+    def render_url(self) -> str:
+        """
+        按需缩放接口地址，客户端追加 w / h / fmt / q 参数
+
+        原图为 blob 时带内容指纹（?v=<SHA-256 前 12 位>），响应可被永久缓存；
+        其他原图不带指纹，响应只短期缓存并按 ETag 重新验证。
+        """
+        url = f"{settings.API_V1_PREFIX}/images/{self.id}"
+        if self.blob_sha256 and self.blob_sha256 in self.url:
+            url = f"{url}?v={self.blob_sha256[:12]}"
+        return url
+
+    def srcset(self) -> dict:
+        """按格式生成 srcset，如 {"webp": "/a_150w.webp 150w, /a_300w.webp 300w"}"""
+        srcset = {}
+        for variant in self.variants:
+            srcset.setdefault(variant.format, []).append(f"{variant.url} {variant.width}w")
+        return {fmt: ", ".join(entries) for fmt, entries in srcset.items()}
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -35,5 +72,8 @@ class PlantImage(Base):
             "height": self.height,
             "takenAt": self.taken_at.isoformat() if self.taken_at else None,
             "sortOrder": self.sort_order,
+            "variants": [variant.to_dict() for variant in self.variants],
+            "srcset": self.srcset(),
+            "renderUrl": self.render_url(),
             "createdAt": self.created_at.isoformat() if self.created_at else None
         }
@@ -0,0 +1,32 @@
+"""
+植物图片衍生图模型（多尺寸、多格式的响应式图片）
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PlantImageVariant(Base):
+    __tablename__ = "plant_image_variants"
+
+    id = Column(Integer, primary_key=True, index=True)
+    image_id = Column(Integer, ForeignKey("plant_images.id", ondelete="CASCADE"), nullable=False)
+    format = Column(String(10), nullable=False)  # jpeg / webp / avif
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    url = Column(String(500), nullable=False)
+    file_size = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('image_id', 'format', 'width', name='uq_plant_image_variants_image_format_width'),
+    )
+
+    def to_dict(self):
+        return {
+            "format": self.format,
+            "width": self.width,
+            "height": self.height,
+            "url": self.url,
+            "fileSize": self.file_size
+        }
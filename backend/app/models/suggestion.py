@@ -1,7 +1,7 @@
 """
 建议/反馈模型
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -19,6 +19,10 @@ class Suggestion(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index('idx_suggestions_created_at_id', 'created_at', 'id'),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -0,0 +1,13 @@
+"""
+数据表版本号模型
+"""
+from sqlalchemy import Column, String, BigInteger
+from app.core.database import Base
+
+
+class TableVersion(Base):
+    """每张业务表一行，表内数据每次提交变更时版本号加一（用于 ETag）"""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -28,6 +28,12 @@ class PlantUpdate(BaseModel):
     health_status: Optional[str] = None
 
 
+class PlantBulkUpdate(PlantUpdate):
+    """批量更新中的单项（is_active=false 即归档）"""
+    id: int
+    is_active: Optional[bool] = None
+
+
 class PlantResponse(BaseModel):
     success: bool
     data: dict
@@ -139,6 +139,7 @@ class IdentificationResponse(BaseModel):
 class IdentificationListResponse(BaseModel):
     """识别记录列表响应"""
     items: List[IdentificationResponse]
-    total: int
+    total: Optional[int]
     page: int
     limit: int
+    next_cursor: Optional[str] = None
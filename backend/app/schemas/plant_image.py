@@ -14,7 +14,11 @@ class PlantImageBase(BaseModel):
 
 
 class PlantImageCreate(PlantImageBase):
-    pass  # plant_id从URL路径获取
+    # plant_id从URL路径获取；以下字段由上传处理时探测填充
+    thumbnail_url: Optional[str] = Field(None, max_length=500)
+    file_size: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
 
 
 class PlantImageUpdate(BaseModel):
@@ -1,58 +1,122 @@
 """
 百度AI植物识别服务
+
+直接调用百度 REST 接口（不使用同步的 baidu-aip SDK）：
+共享一个 keep-alive 连接池的异步 HTTP 客户端，识别请求不阻塞事件循环；
+访问令牌缓存在进程内，过期前自动刷新，令牌失效时刷新后重试一次；
+同时进行的识别请求数受 BAIDU_AI_MAX_CONCURRENCY 限制，每次请求受 BAIDU_AI_TIMEOUT 限制。
+发出请求前经过令牌桶限流（BAIDU_AI_QPS），超出的请求按客户端公平排队。
+图片在图片进程池中缩小到 IDENTIFICATION_MAX_EDGE、压缩到 IDENTIFICATION_MAX_BYTES 以内后再发送，
+手机原图（3-4MB，base64 后再大三分之一）不再原样上传。
 """
+import asyncio
+import base64
 import hashlib
 import time
-import json
-from typing import List, Dict, Optional
-from aip import AipImageClassify
+from pathlib import Path
+from typing import Any, List, Dict, Optional, Union
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
 from app.core.config import settings
+from app.core.database import engine
+from app.core.image_executor import ImageQueueFull, image_executor
+from app.core.rate_limiter import SharedRateLimit, TokenBucketLimiter
+from app.utils.image_utils import prepare_identification_image
+
+# 访问令牌提前刷新的秒数（令牌有效期通常为 30 天）
+TOKEN_REFRESH_MARGIN = 3600
+
+# 访问令牌无效或过期的错误码
+_TOKEN_ERROR_CODES = {110, 111}
+
+# 识别请求限流（多进程部署时可通过 PostgreSQL 共享配额）
+rate_limiter = TokenBucketLimiter(
+    rate=settings.BAIDU_AI_QPS,
+    burst=settings.BAIDU_AI_BURST,
+    max_queue=settings.BAIDU_AI_QUEUE_SIZE,
+    shared=SharedRateLimit(engine, "baidu_ai", settings.BAIDU_AI_QPS) if settings.BAIDU_AI_RATE_LIMIT_SHARED else None
+)
 
 
 class BaiduAIService:
     """百度AI植物识别服务"""
 
     def __init__(self):
-        """初始化百度AI客户端"""
-        self.client = AipImageClassify(
-            settings.BAIDU_AI_APP_ID,
-            settings.BAIDU_AI_API_KEY,
-            settings.BAIDU_AI_SECRET_KEY
-        )
+        """初始化（HTTP 客户端在第一次请求时创建）"""
+        self._client: Optional[httpx.AsyncClient] = None
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(settings.BAIDU_AI_MAX_CONCURRENCY)
+        self._preprocess_stats = {"images": 0, "skipped": 0, "originalBytes": 0, "sentBytes": 0, "totalSeconds": 0.0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.BAIDU_AI_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.BAIDU_AI_MAX_CONCURRENCY + 1,  # 额外一个留给令牌刷新
+                    max_keepalive_connections=settings.BAIDU_AI_MAX_CONCURRENCY
+                )
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """关闭连接池（应用退出时调用）"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
 
     async def identify_plant(
         self,
-        image_data: bytes,
-        baike_num: int = 1
+        image: Union[bytes, Path],
+        baike_num: int = 1,
+        image_hash: Optional[str] = None,
+        client_id: str = ""
     ) -> Dict:
         """
         调用百度植物识别API
 
         Args:
-            image_data: 图片二进制数据
+            image: 图片二进制数据或已保存的图片文件（文件不整体读入内存，只读取压缩后的结果）
             baike_num: 返回百科信息数量（0-5）
+            image_hash: 图片MD5（调用方已计算时传入，避免重复计算）
+            client_id: 客户端标识，限流排队时按客户端轮转
 
         Returns:
-            包含识别结果的字典
+            包含识别结果的字典（queue 为排队位置和等待时间）
 
         Raises:
             ValueError: 图片格式或大小不符合要求
+            RateLimitExceeded: 限流等待队列已满
             RuntimeError: API调用失败
         """
         # 验证图片大小
-        if len(image_data) > settings.MAX_IDENTIFICATION_IMAGE_SIZE:
+        image_size = len(image) if isinstance(image, bytes) else image.stat().st_size
+        if image_size > settings.MAX_IDENTIFICATION_IMAGE_SIZE:
             raise ValueError(f"图片大小不能超过 {settings.MAX_IDENTIFICATION_IMAGE_SIZE // 1024 // 1024}MB")
 
-        # 计算图片哈希（用于去重）
-        image_hash = hashlib.md5(image_data).hexdigest()
+        # 缩小并重新压缩（在排队之前完成，不占用令牌）
+        image_data = await self._prepare_image(image)
+
+        # 计算图片哈希（用于去重；传入文件且未给出哈希时按发送的数据计算）
+        image_hash = image_hash or hashlib.md5(image if isinstance(image, bytes) else image_data).hexdigest()
+
+        # 限流：没有令牌时排队，队列已满时抛出 RateLimitExceeded
+        queue = await rate_limiter.acquire(client_id)
 
         # 调用API
         try:
-            start_time = time.time()
-            # plantDetect使用options字典传递参数
-            options = {"baike_num": baike_num}
-            result = self.client.plantDetect(image_data, options)
-            processing_time = time.time() - start_time
+            async with self._semaphore:
+                start_time = time.time()
+                result = await asyncio.wait_for(
+                    self._plant_detect(image_data, baike_num),
+                    timeout=settings.BAIDU_AI_TIMEOUT
+                )
+                processing_time = time.time() - start_time
 
             # 检查API错误
             if "error_code" in result:
@@ -67,12 +131,74 @@ class BaiduAIService:
                 "predictions": predictions,
                 "processing_time": round(processing_time, 2),
                 "cached": False,
-                "image_hash": image_hash
+                "image_hash": image_hash,
+                "queue": queue
             }
 
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            raise RuntimeError(f"植物识别失败: 请求超时（{settings.BAIDU_AI_TIMEOUT}秒）")
         except Exception as e:
             raise RuntimeError(f"植物识别失败: {str(e)}")
 
+    async def _prepare_image(self, image: Union[bytes, Path]) -> bytes:
+        """缩小并重新压缩待识别的图片；未启用、进程池队列已满或无法解析时发送原图"""
+        if settings.IDENTIFICATION_MAX_EDGE <= 0:
+            return await self._original_bytes(image)
+        start_time = time.time()
+        try:
+            prepared = await image_executor.run(
+                prepare_identification_image,
+                image,
+                settings.IDENTIFICATION_MAX_EDGE,
+                settings.IDENTIFICATION_MAX_BYTES,
+                settings.IDENTIFICATION_JPEG_QUALITY
+            )
+        except (ValueError, ImageQueueFull):
+            self._preprocess_stats["skipped"] += 1
+            return await self._original_bytes(image)
+        self._preprocess_stats["images"] += 1
+        self._preprocess_stats["originalBytes"] += prepared["originalBytes"]
+        self._preprocess_stats["sentBytes"] += prepared["bytes"]
+        self._preprocess_stats["totalSeconds"] += time.time() - start_time
+        return prepared["data"]
+
+    @staticmethod
+    async def _original_bytes(image: Union[bytes, Path]) -> bytes:
+        return image if isinstance(image, bytes) else await run_in_threadpool(image.read_bytes)
+
+    def preprocess_stats(self) -> Dict[str, Any]:
+        """识别前图片压缩的统计（累计节省的上传字节数等）"""
+        stats = self._preprocess_stats
+        saved = stats["originalBytes"] - stats["sentBytes"]
+        return {
+            **stats,
+            "totalSeconds": round(stats["totalSeconds"], 2),
+            "savedBytes": saved,
+            "savedRatio": round(saved / stats["originalBytes"], 4) if stats["originalBytes"] else None,
+            "maxEdge": settings.IDENTIFICATION_MAX_EDGE,
+            "maxBytes": settings.IDENTIFICATION_MAX_BYTES,
+        }
+
+    async def _plant_detect(self, image_data: bytes, baike_num: int) -> dict:
+        """发送识别请求，令牌失效时刷新后重试一次"""
+        form = {
+            "image": base64.b64encode(image_data).decode(),
+            "baike_num": baike_num
+        }
+        token = await self.get_access_token()
+        for attempt in range(2):
+            response = await self.client.post(
+                settings.BAIDU_AI_PLANT_URL,
+                params={"access_token": token},
+                data=form
+            )
+            response.raise_for_status()
+            result = response.json()
+            if attempt == 0 and result.get("error_code") in _TOKEN_ERROR_CODES:
+                token = await self.get_access_token(stale_token=token)
+                continue
+            return result
+
     def _parse_result(self, api_result: dict) -> List[Dict]:
         """
         解析百度API返回结果
@@ -108,15 +234,45 @@ class BaiduAIService:
 
         return predictions
 
-    def get_access_token(self) -> str:
+    async def get_access_token(self, stale_token: Optional[str] = None) -> str:
         """
-        获取访问令牌（OAuth 2.0）
+        获取访问令牌（OAuth 2.0 client_credentials）
+
+        令牌缓存在进程内，临近过期或传入的 stale_token 被服务端拒绝时刷新；
+        并发请求只刷新一次。
 
         Returns:
             访问令牌字符串
+
+        Raises:
+            RuntimeError: 获取令牌失败
         """
-        # baidu-aip SDK会自动处理token，这个方法预留用于手动获取
-        return ""
+        if self._token_valid(stale_token):
+            return self._token
+        async with self._token_lock:
+            if self._token_valid(stale_token):
+                return self._token
+            response = await self.client.post(
+                settings.BAIDU_AI_TOKEN_URL,
+                params={
+                    "grant_type": "client_credentials",
+                    "client_id": settings.BAIDU_AI_API_KEY,
+                    "client_secret": settings.BAIDU_AI_SECRET_KEY
+                }
+            )
+            data = response.json()
+            if "access_token" not in data:
+                raise RuntimeError(f"获取百度访问令牌失败: {data.get('error_description') or data}")
+            self._token = data["access_token"]
+            self._token_expires_at = time.time() + int(data.get("expires_in", 2592000))
+            return self._token
+
+    def _token_valid(self, stale_token: Optional[str]) -> bool:
+        return (
+            self._token is not None
+            and self._token != stale_token
+            and time.time() < self._token_expires_at - TOKEN_REFRESH_MARGIN
+        )
 
     def check_health(self) -> bool:
         """
@@ -0,0 +1,141 @@
+"""
+内容寻址文件 Service
+
+文件按 SHA-256 分两级目录存放：uploads/blobs/<前2位>/<3-4位>/<sha256>.<扩展名>，
+缩略图和衍生图以 <sha256>_ 为前缀放在同一目录，随 blob 一起删除。
+同一个 blob 的引用计数变更通过事务级 advisory lock 串行化。
+文件在删除 blob 记录的事务提交之后才删除（purge），提交失败时文件仍在；
+提交后、删除文件前进程退出留下的文件由 UploadSweeper 清理。
+"""
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.blob import Blob
+from app.utils.upload_utils import StoredUpload
+
+BLOB_ROOT = Path(settings.UPLOAD_DIR) / "blobs"
+
+
+def blob_dir(sha256: str) -> Path:
+    """blob 及其衍生文件所在目录"""
+    return BLOB_ROOT / sha256[:2] / sha256[2:4]
+
+
+def blob_thumbnail_path(sha256: str) -> Path:
+    """blob 的缩略图路径"""
+    return blob_dir(sha256) / f"{sha256}_thumb.jpg"
+
+
+class BlobService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def store(self, upload: StoredUpload) -> Tuple[Blob, bool]:
+        """
+        将上传文件存为 blob 并增加一次引用（立即提交）
+
+        内容已存在时丢弃本次上传的文件，只增加引用计数。
+        后续步骤失败时调用方需 release 并提交。
+
+        Returns:
+            (blob, 是否新建)
+        """
+        self._lock(upload.sha256)
+        blob = self.db.query(Blob).filter(Blob.sha256 == upload.sha256).first()
+        created = blob is None
+        if created:
+            path = blob_dir(upload.sha256) / f"{upload.sha256}.{upload.image_type}"
+            blob = Blob(
+                sha256=upload.sha256,
+                path=path.as_posix(),
+                size=upload.size,
+                image_type=upload.image_type,
+                ref_count=0
+            )
+            self.db.add(blob)
+
+        path = Path(blob.path)
+        if path.exists():
+            upload.path.unlink(missing_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(upload.path, path)
+
+        blob.ref_count += 1
+        self.db.commit()
+        return blob, created
+
+    def acquire(self, sha256: str) -> Optional[Blob]:
+        """增加一次引用（立即提交），blob 不存在时返回 None"""
+        self._lock(sha256)
+        blob = self.db.query(Blob).filter(Blob.sha256 == sha256).first()
+        if not blob:
+            self.db.rollback()
+            return None
+        blob.ref_count += 1
+        self.db.commit()
+        return blob
+
+    def release(self, sha256: str, count: int = 1) -> bool:
+        """
+        减少引用（不提交，与调用方删除引用记录在同一事务中生效）
+
+        最后一个引用释放时删除 blob 记录，文件需在提交后调用 purge 删除。
+        调用前需先 flush 引用记录的删除。
+
+        Returns:
+            是否释放了最后一个引用（需要 purge）
+        """
+        self._lock(sha256)
+        blob = self.db.query(Blob).filter(Blob.sha256 == sha256).first()
+        if not blob:
+            return False
+        blob.ref_count -= count
+        if blob.ref_count > 0:
+            return False
+        self.db.delete(blob)
+        self.db.flush()
+        return True
+
+    def purge(self, sha256: str) -> bool:
+        """
+        删除已无记录的 blob 的原文件和所有衍生文件（释放引用的事务提交后调用，立即提交）
+
+        在锁内确认记录仍不存在，不会删除并发上传同一内容时刚重新创建的 blob。
+
+        Returns:
+            是否删除了文件
+        """
+        orphan = self.is_orphan(sha256)
+        if orphan:
+            for path in blob_dir(sha256).glob(f"{sha256}*"):
+                path.unlink(missing_ok=True)
+        self.db.commit()
+        return orphan
+
+    def discard(self, sha256: str) -> None:
+        """撤销一次 store / acquire：释放引用并立即提交，需要时删除文件（用于后续步骤失败）"""
+        released = self.release(sha256)
+        self.db.commit()
+        if released:
+            self.purge(sha256)
+
+    def is_orphan(self, sha256: str) -> bool:
+        """
+        加锁检查 blob 记录是否不存在（用于清理残留文件）
+
+        锁持续到调用方提交，期间同一内容的上传会等待，不会复用即将被删除的文件。
+        """
+        self._lock(sha256)
+        return self.db.query(Blob.sha256).filter(Blob.sha256 == sha256).first() is None
+
+    def _lock(self, sha256: str) -> None:
+        self.db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+            {"key": f"blob:{sha256}"}
+        )
@@ -0,0 +1,97 @@
+"""
+数据导出 Service
+"""
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.room import Room
+from app.models.plant_shelf import PlantShelf
+from app.models.plant import Plant
+from app.models.plant_image import PlantImage
+from app.models.plant_config import PlantConfig
+from app.models.plant_identification import PlantIdentification
+
+# 服务端游标每批读取的行数
+EXPORT_BATCH_SIZE = 1000
+# 输出缓冲区大小，攒够后再写出，减少流式响应的分块开销
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+
+class ExportService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def iter_ndjson(self, room_id: Optional[int] = None,
+                    updated_since: Optional[datetime] = None) -> Iterator[bytes]:
+        """
+        以 NDJSON 流式导出完整数字孪生数据
+
+        按 房间 → 花架 → 植物 → 图片 → 养护配置 → 识别记录 的顺序输出，
+        每行一个 {"type": ..., "data": ...} 对象。所有查询在同一个
+        REPEATABLE READ 事务中通过服务端游标分批读取，内存占用与数据量无关。
+
+        Args:
+            room_id: 只导出指定房间的数据
+            updated_since: 只导出此时间之后更新的植物/识别记录（图片按创建时间）；
+                房间、花架、养护配置没有更新时间，始终全部导出
+
+        Yields:
+            NDJSON 字节块
+        """
+        # 保证跨表数据一致（同一快照）
+        self.db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+        buffer = []
+        buffered = 0
+        for record_type, query in self._queries(room_id, updated_since):
+            stream = query.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+            for obj in stream:
+                line = json.dumps(
+                    {"type": record_type, "data": obj.to_dict()},
+                    ensure_ascii=False, default=str
+                ).encode() + b"\n"
+                buffer.append(line)
+                buffered += len(line)
+                if buffered >= EXPORT_BUFFER_SIZE:
+                    yield b"".join(buffer)
+                    buffer, buffered = [], 0
+            # 每种对象导出完即释放身份映射，避免会话累积所有对象
+            self.db.expunge_all()
+        if buffer:
+            yield b"".join(buffer)
+
+    def _queries(self, room_id: Optional[int], updated_since: Optional[datetime]):
+        rooms = self.db.query(Room).order_by(Room.id)
+        shelves = self.db.query(PlantShelf).order_by(PlantShelf.id)
+        plants = self.db.query(Plant).order_by(Plant.id)
+        images = self.db.query(PlantImage).order_by(PlantImage.id)
+        configs = self.db.query(PlantConfig).order_by(PlantConfig.id)
+        identifications = self.db.query(PlantIdentification).order_by(PlantIdentification.id)
+
+        if room_id:
+            room_plant_ids = self.db.query(Plant.id).filter(Plant.room_id == room_id)
+            rooms = rooms.filter(Room.id == room_id)
+            shelves = shelves.filter(PlantShelf.room_id == room_id)
+            plants = plants.filter(Plant.room_id == room_id)
+            images = images.filter(PlantImage.plant_id.in_(room_plant_ids))
+            configs = configs.filter(PlantConfig.plant_id.in_(room_plant_ids))
+            identifications = identifications.filter(
+                PlantIdentification.selected_plant_id.in_(room_plant_ids)
+            )
+
+        if updated_since:
+            plants = plants.filter(Plant.updated_at >= updated_since)
+            images = images.filter(PlantImage.created_at >= updated_since)
+            identifications = identifications.filter(PlantIdentification.updated_at >= updated_since)
+
+        return [
+            ("room", rooms),
+            ("shelf", shelves),
+            ("plant", plants),
+            ("image", images),
+            ("config", configs),
+            ("identification", identifications),
+        ]
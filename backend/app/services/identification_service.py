@@ -1,24 +1,42 @@
 """
 植物识别业务服务
 """
+import asyncio
+import logging
 import os
 import json
-import hashlib
+import socket
 import uuid
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, literal_column
+from sqlalchemy.dialects.postgresql import insert
 
+from app.models.identification_lease import IdentificationLease
 from app.models.plant_identification import PlantIdentification
 from app.models.plant import Plant
 from app.models.plant_image import PlantImage
 from app.services.baidu_ai_service import baidu_ai_service
+from app.services.blob_service import BlobService, blob_dir, blob_thumbnail_path
+from app.services.job_service import JobService
+from app.services.plant_image_service import PlantImageService
 from app.core.config import settings
-from app.utils.image_utils import create_thumbnail, get_image_dimensions
+from app.core.identification_cache import identification_cache
+from app.core.single_flight import identification_flight
+from app.core.image_executor import ImageQueueFull, image_executor
+from app.core.upload_files import versioned_url
+from app.utils.image_utils import probe_image
+from app.utils.pagination import apply_cursor, split_page
+from app.utils.upload_utils import HashedUpload
 from pathlib import Path
 import shutil
 
+logger = logging.getLogger(__name__)
+
+# 等待其他进程释放识别租约时的轮询间隔（秒）
+LEASE_POLL_INTERVAL = 0.25
+
 
 class IdentificationService:
     """植物识别业务服务"""
@@ -28,96 +46,257 @@ class IdentificationService:
 
     async def identify_from_file(
         self,
-        file_data: bytes,
-        filename: str,
+        upload: HashedUpload,
         user_id: Optional[int] = None,
-        include_details: bool = True
+        include_details: bool = True,
+        client_id: str = ""
     ) -> Dict:
         """
         从上传的文件识别植物
 
+        两级缓存：进程内 LRU → 数据库（按图片 MD5）。缓存命中时图片不写盘；
+        数据库记录超过 IDENTIFICATION_CACHE_TTL 时重新识别，并在原记录上刷新结果。
+
         Args:
-            file_data: 图片二进制数据
-            filename: 原始文件名
+            upload: 已计算哈希、尚未写盘的图片（含 MD5、SHA-256）
             user_id: 用户ID（可选）
             include_details: 是否包含详细信息
+            client_id: 客户端标识（限流排队时按客户端轮转）
 
         Returns:
             识别结果字典
         """
-        # 1. 保存图片到临时目录
-        image_url = await self._save_temp_image(file_data, filename)
-
-        # 2. 计算图片哈希
-        image_hash = hashlib.md5(file_data).hexdigest()
-
-        # 3. 检查是否有相同图片的识别记录（缓存）
-        cached_result = await self._check_cache(image_hash)
+        # 1. 进程内缓存：不访问磁盘和数据库
+        cached_result = identification_cache.get(upload.md5)
         if cached_result:
-            # 返回缓存结果
-            cached_result["cached"] = True
-            return cached_result
+            return {**cached_result, "cached": True}
+
+        # 2. 数据库缓存
+        existing = self._find_by_hash(upload.md5)
+        if existing and self._is_fresh(existing):
+            cached_result = self._cache_entry(existing)
+            identification_cache.set(upload.md5, cached_result, existing.identified_at)
+            identification_cache.record("dbHits")
+            return {**cached_result, "cached": True}
+
+        # 3. 同一图片的并发识别只调用一次百度AI，其余请求等待同一结果
+        result, coalesced = await identification_flight.do(
+            upload.md5,
+            lambda: self._identify_with_lease(upload, existing, user_id, include_details, client_id)
+        )
+        if coalesced:
+            return {**self._without_queue(result), "cached": True}
+        return result
 
-        # 4. 调用百度AI识别
+    async def _identify_with_lease(
+        self,
+        upload: HashedUpload,
+        existing: Optional[PlantIdentification],
+        user_id: Optional[int],
+        include_details: bool,
+        client_id: str
+    ) -> Dict:
+        """
+        持有数据库租约后识别（IDENTIFICATION_LEASE_ENABLED 时），跨进程合并同一图片的识别
+
+        租约被其他进程持有时等待其释放，并直接使用其写入的识别结果。
+        """
+        if not settings.IDENTIFICATION_LEASE_ENABLED:
+            return await self._identify_and_save(upload, existing, user_id, include_details, client_id)
+
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        while not self._acquire_lease(upload.md5, owner):
+            cached_result = await self._wait_for_lease(upload.md5)
+            if cached_result:
+                return {**cached_result, "cached": True}
         try:
-            baike_num = 1 if include_details else 0
-            api_result = await baidu_ai_service.identify_plant(file_data, baike_num)
+            # 获得租约前其他进程可能刚完成识别
+            existing = self._find_by_hash(upload.md5)
+            if existing and self._is_fresh(existing):
+                cached_result = self._cache_entry(existing)
+                identification_cache.set(upload.md5, cached_result, existing.identified_at)
+                return {**cached_result, "cached": True}
+            return await self._identify_and_save(upload, existing, user_id, include_details, client_id)
+        finally:
+            self._release_lease(upload.md5, owner)
+
+    async def _identify_and_save(
+        self,
+        upload: HashedUpload,
+        existing: Optional[PlantIdentification],
+        user_id: Optional[int],
+        include_details: bool,
+        client_id: str
+    ) -> Dict:
+        """调用百度AI识别并保存（过期记录在原记录上刷新）"""
+        identification_cache.record("refreshes" if existing else "misses")
 
-            # 5. 保存识别记录到数据库
-            identification = PlantIdentification(
-                user_id=user_id,
-                image_url=image_url,
-                image_hash=image_hash,
-                api_provider="baidu",
-                request_id=api_result["request_id"],
-                predictions=json.dumps(api_result["predictions"]),
-                processing_time=api_result["processing_time"],
-                cached=False
+        # 缓存未命中：流式写盘后调用百度AI识别（图片在进程池中读取并压缩，不整体读入内存）
+        stored = await upload.save(Path(settings.IDENTIFICATION_TEMP_DIR))
+        baike_num = 1 if include_details else 0
+        try:
+            api_result = await baidu_ai_service.identify_plant(
+                stored.path, baike_num, image_hash=upload.md5, client_id=client_id
+            )
+        except BaseException:
+            stored.path.unlink(missing_ok=True)
+            raise
+
+        # 保存识别记录：过期记录沿用原图片，否则按内容寻址保存图片（相同内容只存一份）
+        blob_service = BlobService(self.db)
+        blob = None
+        if existing:
+            stored.path.unlink(missing_ok=True)
+            image_url, blob_sha256 = existing.image_url, existing.blob_sha256
+        else:
+            blob, _ = blob_service.store(stored)
+            image_url, blob_sha256 = blob.url, blob.sha256
+
+        released = False
+        try:
+            identification_id, identified_at, inserted = self._upsert_identification(
+                upload.md5, image_url, blob_sha256, user_id, api_result
             )
-            self.db.add(identification)
+            if blob and not inserted:
+                # 并发请求已插入同一图片的记录，本次保存的图片引用不再需要
+                released = blob_service.release(blob_sha256)
             self.db.commit()
-            self.db.refresh(identification)
-
-            # 6. 返回结果
-            return {
-                "requestId": api_result["request_id"],
-                "predictions": api_result["predictions"],
-                "processingTime": api_result["processing_time"],
-                "cached": False,
-                "identificationId": identification.id
-            }
-
-        except Exception as e:
-            # 识别失败，删除已保存的图片
-            self._delete_temp_image(image_url)
-            raise e
-
-    async def _save_temp_image(self, file_data: bytes, filename: str) -> str:
-        """
-        保存临时图片文件
+        except Exception:
+            # 保存失败，释放图片引用
+            self.db.rollback()
+            if blob:
+                blob_service.discard(blob_sha256)
+            raise
+        if released:
+            blob_service.purge(blob_sha256)
+
+        # 写入进程内缓存并返回结果
+        cached_result = {
+            "requestId": api_result["request_id"],
+            "predictions": api_result["predictions"],
+            "processingTime": api_result["processing_time"],
+            "identificationId": identification_id
+        }
+        identification_cache.set(upload.md5, cached_result, identified_at)
+        return {**cached_result, "cached": False, "queue": api_result["queue"]}
+
+    def _find_by_hash(self, image_hash: str) -> Optional[PlantIdentification]:
+        return self.db.query(PlantIdentification).filter(
+            PlantIdentification.image_hash == image_hash
+        ).populate_existing().first()
+
+    def _acquire_lease(self, image_hash: str, owner: str) -> bool:
+        """获取识别租约（立即提交），租约由其他进程持有且未过期时返回 False"""
+        expires_at = func.now() + timedelta(seconds=settings.IDENTIFICATION_LEASE_TTL)
+        stmt = (
+            insert(IdentificationLease)
+            .values(image_hash=image_hash, owner=owner, expires_at=expires_at)
+            .on_conflict_do_update(
+                index_elements=[IdentificationLease.image_hash],
+                set_={"owner": owner, "expires_at": expires_at},
+                where=IdentificationLease.expires_at < func.now()
+            )
+            .returning(IdentificationLease.owner)
+        )
+        acquired = self.db.execute(stmt).first() is not None
+        self.db.commit()
+        return acquired
 
-        Args:
-            file_data: 图片二进制数据
-            filename: 原始文件名
+    def _release_lease(self, image_hash: str, owner: str) -> None:
+        try:
+            self.db.query(IdentificationLease).filter(
+                IdentificationLease.image_hash == image_hash,
+                IdentificationLease.owner == owner
+            ).delete(synchronize_session=False)
+            self.db.commit()
+        except Exception:
+            # 释放失败时租约到期后自动失效
+            self.db.rollback()
+
+    async def _wait_for_lease(self, image_hash: str) -> Optional[Dict]:
+        """
+        等待其他进程释放租约
 
         Returns:
-            图片URL
+            对方写入的识别结果；对方失败或租约过期时返回 None（由调用方接管）
+        """
+        while True:
+            await asyncio.sleep(LEASE_POLL_INTERVAL)
+            held = self.db.query(IdentificationLease.owner).filter(
+                IdentificationLease.image_hash == image_hash,
+                IdentificationLease.expires_at > func.now()
+            ).first()
+            self.db.commit()
+            if not held:
+                break
+        identification = self._find_by_hash(image_hash)
+        self.db.commit()
+        if identification and self._is_fresh(identification):
+            cached_result = self._cache_entry(identification)
+            identification_cache.set(image_hash, cached_result, identification.identified_at)
+            return cached_result
+        return None
+
+    @staticmethod
+    def _without_queue(result: Dict) -> Dict:
+        return {key: value for key, value in result.items() if key != "queue"}
+
+    def _upsert_identification(
+        self,
+        image_hash: str,
+        image_url: str,
+        blob_sha256: Optional[str],
+        user_id: Optional[int],
+        api_result: Dict
+    ) -> Tuple[int, datetime, bool]:
         """
-        # 创建临时目录
-        temp_dir = settings.IDENTIFICATION_TEMP_DIR
-        os.makedirs(temp_dir, exist_ok=True)
+        按 image_hash 插入或刷新识别记录（不提交）
 
-        # 生成唯一文件名
-        ext = os.path.splitext(filename)[1]
-        unique_filename = f"{uuid.uuid4().hex}{ext}"
-        file_path = os.path.join(temp_dir, unique_filename)
+        Returns:
+            (记录ID, 识别时间, 是否新插入)
+        """
+        result = {
+            "request_id": api_result["request_id"],
+            "predictions": json.dumps(api_result["predictions"]),
+            "processing_time": api_result["processing_time"],
+            "cached": False,
+        }
+        stmt = (
+            insert(PlantIdentification)
+            .values(
+                user_id=user_id,
+                image_url=image_url,
+                blob_sha256=blob_sha256,
+                image_hash=image_hash,
+                api_provider="baidu",
+                **result
+            )
+            .on_conflict_do_update(
+                index_elements=[PlantIdentification.image_hash],
+                set_={**result, "identified_at": func.now(), "updated_at": func.now()}
+            )
+            .returning(
+                PlantIdentification.id,
+                PlantIdentification.identified_at,
+                literal_column("xmax = 0")
+            )
+        )
+        row = self.db.execute(stmt).one()
+        return row[0], row[1], row[2]
 
-        # 保存文件
-        with open(file_path, "wb") as f:
-            f.write(file_data)
+    @staticmethod
+    def _is_fresh(identification: PlantIdentification) -> bool:
+        identified_at = identification.identified_at or identification.created_at
+        return identified_at >= datetime.now() - timedelta(seconds=settings.IDENTIFICATION_CACHE_TTL)
 
-        # 返回URL（相对路径）
-        return f"/{temp_dir}/{unique_filename}"
+    @staticmethod
+    def _cache_entry(identification: PlantIdentification) -> Dict:
+        return {
+            "requestId": identification.request_id,
+            "predictions": json.loads(identification.predictions),
+            "processingTime": float(identification.processing_time) if identification.processing_time else 0,
+            "identificationId": identification.id
+        }
 
     def _delete_temp_image(self, image_url: str) -> bool:
         """
@@ -138,47 +317,14 @@ class IdentificationService:
         except Exception:
             return False
 
-    async def _check_cache(self, image_hash: str) -> Optional[Dict]:
-        """
-        检查是否有缓存的识别结果
-
-        Args:
-            image_hash: 图片MD5哈希
-
-        Returns:
-            缓存的识别结果，如果没有则返回None
-        """
-        # 查询24小时内的相同图片记录
-        from datetime import timedelta
-        from sqlalchemy import and_
-
-        time_threshold = datetime.now() - timedelta(seconds=settings.IDENTIFICATION_CACHE_TTL)
-
-        cached = self.db.query(PlantIdentification).filter(
-            and_(
-                PlantIdentification.image_hash == image_hash,
-                PlantIdentification.created_at >= time_threshold
-            )
-        ).first()
-
-        if cached:
-            predictions = json.loads(cached.predictions)
-            return {
-                "requestId": cached.request_id,
-                "predictions": predictions,
-                "processingTime": float(cached.processing_time) if cached.processing_time else 0,
-                "cached": True,
-                "identificationId": cached.id
-            }
-
-        return None
-
     def get_identification_history(
         self,
         user_id: Optional[int] = None,
         plant_id: Optional[int] = None,
         page: int = 1,
-        limit: int = 20
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        include_total: bool = True
     ) -> Dict:
         """
         获取识别历史记录
@@ -186,11 +332,16 @@ class IdentificationService:
         Args:
             user_id: 用户ID筛选
             plant_id: 关联的植物ID筛选
-            page: 页码
+            page: 页码（使用 cursor 时忽略）
             limit: 每页数量
+            cursor: 上一页返回的 nextCursor，按 (created_at, id) 游标分页
+            include_total: 是否统计总数
 
         Returns:
             分页的识别记录
+
+        Raises:
+            ValueError: 游标无效
         """
         query = self.db.query(PlantIdentification)
 
@@ -200,17 +351,32 @@ class IdentificationService:
         if plant_id:
             query = query.filter(PlantIdentification.selected_plant_id == plant_id)
 
+        total = query.count() if include_total else None
+
         # 排序和分页
-        query = query.order_by(desc(PlantIdentification.created_at))
-        total = query.count()
-        items = query.offset((page - 1) * limit).limit(limit).all()
+        query = query.order_by(desc(PlantIdentification.created_at), desc(PlantIdentification.id))
+        if cursor:
+            query = apply_cursor(
+                query, [PlantIdentification.created_at, PlantIdentification.id], cursor
+            )
+        elif page > 1:
+            query = query.offset((page - 1) * limit)
+        items, next_cursor = split_page(
+            query.limit(limit + 1).all(), limit, key=lambda item: [item.created_at, item.id]
+        )
+
+        selected_plants = self._load_selected_plants(items)
 
         return {
-            "items": [item.to_dict(include_plant=True) for item in items],
+            "items": [
+                item.to_dict(selected_plant=selected_plants.get(item.selected_plant_id))
+                for item in items
+            ],
             "total": total,
             "page": page,
             "limit": limit,
-            "totalPages": (total + limit - 1) // limit
+            "totalPages": (total + limit - 1) // limit if total is not None else None,
+            "nextCursor": next_cursor
         }
 
     def get_identification_by_id(self, identification_id: int) -> Optional[Dict]:
@@ -228,9 +394,34 @@ class IdentificationService:
         ).first()
 
         if identification:
-            return identification.to_dict(include_plant=True)
+            selected_plants = self._load_selected_plants([identification])
+            return identification.to_dict(
+                selected_plant=selected_plants.get(identification.selected_plant_id)
+            )
         return None
 
+    def _load_selected_plants(self, identifications: List[PlantIdentification]) -> Dict[int, Dict]:
+        """
+        批量查询识别记录关联的植物及其封面图（单次查询，复用当前会话）
+
+        Returns:
+            {plant_id: {"id", "name", "primaryImageUrl"}}
+        """
+        plant_ids = {item.selected_plant_id for item in identifications if item.selected_plant_id}
+        if not plant_ids:
+            return {}
+
+        rows = (
+            self.db.query(Plant.id, Plant.name, PlantImage.url)
+            .outerjoin(PlantImage, Plant.primary_image_id == PlantImage.id)
+            .filter(Plant.id.in_(plant_ids))
+            .all()
+        )
+        return {
+            plant_id: {"id": plant_id, "name": name, "primaryImageUrl": url}
+            for plant_id, name, url in rows
+        }
+
     def submit_feedback(
         self,
         identification_id: int,
@@ -287,7 +478,12 @@ class IdentificationService:
             health_status: 健康状态
 
         Returns:
-            创建的植物字典
+            {"plant": 创建的植物, "photoStatus": 识别照片的处理状态}；photoStatus 为
+            queued（已交给后台任务）、added（已添加为主图）、busy（图片处理队列已满，未添加）
+            或 failed（识别照片不存在或处理失败，未添加）
+
+        Raises:
+            ValueError: 没有可用的识别结果
         """
         # 获取识别记录
         identification = self.db.query(PlantIdentification).filter(
@@ -327,28 +523,41 @@ class IdentificationService:
         )
 
         self.db.add(plant)
-        self.db.commit()
-        self.db.refresh(plant)
-
-        # 将识别照片添加为植物的主图
-        try:
-            print(f"[DEBUG] 开始添加识别照片 identification_id={identification.id}, plant_id={plant.id}")
-            self._add_identification_image_to_plant(identification.id, plant.id)
-            print("[DEBUG] 识别照片添加成功")
-        except Exception as e:
-            # 图片添加失败不影响植物创建
-            import traceback
-            print(f"添加识别照片失败: {e}")
-            traceback.print_exc()
+        self.db.flush()
 
         # 更新识别记录的反馈
         identification.feedback = "correct"
         identification.selected_plant_id = plant.id
+
+        if settings.BACKGROUND_JOBS_ENABLED:
+            # 将识别照片添加为主图的任务与植物在同一事务中提交，加入失败时植物也不会创建
+            JobService(self.db).enqueue(
+                "promote_identification_photo",
+                {"identificationId": identification.id, "plantId": plant.id},
+                priority=10,
+                commit=False
+            )
+            self.db.commit()
+            self.db.refresh(plant)
+            return {"plant": plant.to_dict(include_images=False), "photoStatus": "queued"}
+
         self.db.commit()
+        self.db.refresh(plant)
+        plant_dict = plant.to_dict(include_images=False)
 
-        return plant.to_dict(include_images=False)
+        # 同步添加识别照片；失败时植物已创建，通过 photoStatus 告知调用方
+        try:
+            added = self.add_identification_image_to_plant(identification_id, plant_dict["id"])
+            photo_status = "added" if added else "failed"
+        except ImageQueueFull as e:
+            logger.warning(f"识别照片未添加到植物 {plant_dict['id']}: {e}")
+            photo_status = "busy"
+        except Exception:
+            logger.exception(f"添加识别照片到植物 {plant_dict['id']} 失败")
+            photo_status = "failed"
+        return {"plant": plant_dict, "photoStatus": photo_status}
 
-    def _add_identification_image_to_plant(
+    def add_identification_image_to_plant(
         self,
         identification_id: int,
         plant_id: int
@@ -371,47 +580,61 @@ class IdentificationService:
         if not identification or not identification.image_url:
             return False
 
-        # 原图路径（去掉开头的 /）
-        source_path_str = identification.image_url.lstrip('/')
-        source_path = Path(source_path_str)
-
-        if not source_path.exists():
-            print(f"识别图片不存在: {source_path}")
-            return False
-
-        # 创建植物图片目录
-        plant_images_dir = Path(settings.UPLOAD_DIR) / "plant_images" / str(plant_id)
-        plant_images_dir.mkdir(parents=True, exist_ok=True)
-
-        # 生成新文件名
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        ext = source_path.suffix
-        new_filename = f"identification_{identification_id}_{timestamp}{ext}"
-        target_path = plant_images_dir / new_filename
-
-        # 复制图片文件
-        try:
-            shutil.copy2(source_path, target_path)
-        except Exception as e:
-            print(f"复制图片失败: {e}")
-            return False
-
-        # 创建缩略图
-        thumbnail_path = plant_images_dir / f"thumb_{new_filename}"
-        thumbnail_created = create_thumbnail(target_path, thumbnail_path)
+        blob = None
+        if identification.blob_sha256:
+            # 后台任务可能重复执行：已添加过则直接返回
+            if self.db.query(PlantImage.id).filter(
+                PlantImage.plant_id == plant_id,
+                PlantImage.blob_sha256 == identification.blob_sha256
+            ).first():
+                return True
+            # 内容寻址存储：植物图片直接引用识别照片的 blob，不复制文件
+            blob = BlobService(self.db).acquire(identification.blob_sha256)
+
+        if blob:
+            target_path = Path(blob.path)
+            thumbnail_path = blob_thumbnail_path(blob.sha256)
+            variant_dir = blob_dir(blob.sha256)
+            url_path = blob.url
+        else:
+            # 旧数据：识别照片在临时目录，复制到植物图片目录
+            source_path = Path(identification.image_url.lstrip('/'))
+            if not source_path.exists():
+                logger.warning(f"识别图片不存在: {source_path}")
+                return False
+
+            plant_images_dir = Path(settings.UPLOAD_DIR) / "plant_images" / str(plant_id)
+            plant_images_dir.mkdir(parents=True, exist_ok=True)
+
+            # 生成新文件名
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            new_filename = f"identification_{identification_id}_{timestamp}{source_path.suffix}"
+            target_path = plant_images_dir / new_filename
 
-        # 获取图片尺寸
-        dimensions = get_image_dimensions(target_path)
-        width, height = dimensions if dimensions else (None, None)
+            try:
+                shutil.copy2(source_path, target_path)
+            except Exception as e:
+                logger.warning(f"复制图片失败: {e}")
+                return False
+
+            thumbnail_path = plant_images_dir / f"thumb_{new_filename}"
+            variant_dir = plant_images_dir / "variants"
+            url_path = f"/{target_path}"
+
+        # 一次解码：尺寸、拍摄时间、缩略图和响应式衍生图（同一内容已处理过时直接复用）
+        image_service = PlantImageService(self.db)
+        probe = image_service.reuse_probe(blob.sha256) if blob else None
+        if probe is None:
+            try:
+                probe = image_executor.call(probe_image, target_path, thumbnail_path, variant_dir)
+            except ValueError as e:
+                logger.warning(f"处理识别照片失败: {e}")
+                probe = {"width": None, "height": None, "takenAt": None, "thumbnail": False, "variants": []}
 
-        # 获取文件大小
         file_size = target_path.stat().st_size
+        thumbnail_url_path = versioned_url(thumbnail_path) if probe["thumbnail"] else None
 
-        # 生成URL路径
-        url_path = f"/{target_path}"
-        thumbnail_url_path = f"/{thumbnail_path}" if thumbnail_created else None
-
-        # 创建图片记录（作为主图）
+        # 创建图片记录（作为主图，同时更新植物封面）
         plant_image = PlantImage(
             plant_id=plant_id,
             url=url_path,
@@ -419,16 +642,21 @@ class IdentificationService:
             caption=f"识别照片 - {identification.predictions and json.loads(identification.predictions)[0].get('name', '未知植物')}",
             is_primary=True,  # 设置为主图
             file_size=file_size,
-            width=width,
-            height=height,
-            taken_at=identification.created_at,
-            sort_order=0
+            width=probe["width"],
+            height=probe["height"],
+            taken_at=probe["takenAt"] or identification.created_at,
+            sort_order=0,
+            blob_sha256=blob.sha256 if blob else None
         )
+        try:
+            image_service.add_image(plant_image, probe["variants"])
+        except Exception:
+            if blob:
+                self.db.rollback()
+                BlobService(self.db).discard(blob.sha256)
+            raise
 
-        self.db.add(plant_image)
-        self.db.commit()
-
-        print(f"成功添加识别照片到植物 {plant_id}: {url_path}")
+        logger.info(f"成功添加识别照片到植物 {plant_id}: {url_path}")
         return True
 
     def delete_identification(self, identification_id: int) -> bool:
@@ -448,8 +676,9 @@ class IdentificationService:
         if not identification:
             return False
 
-        # 删除图片文件
-        self._delete_temp_image(identification.image_url)
+        # 删除图片文件（blob 在最后一个引用释放时删除）
+        if not identification.blob_sha256:
+            self._delete_temp_image(identification.image_url)
 
         # 如果有关联的植物，更新其identification_id
         if identification.selected_plant_id:
@@ -459,8 +688,17 @@ class IdentificationService:
             if plant:
                 plant.identification_id = None
 
-        # 删除记录
+        # 删除记录（blob 文件在提交后删除）
+        blob_sha256, image_hash = identification.blob_sha256, identification.image_hash
+        blob_service = BlobService(self.db)
         self.db.delete(identification)
+        released = False
+        if blob_sha256:
+            self.db.flush()
+            released = blob_service.release(blob_sha256)
         self.db.commit()
+        if released:
+            blob_service.purge(blob_sha256)
+        identification_cache.invalidate(image_hash)
 
         return True
@@ -0,0 +1,386 @@
+"""
+数据批量导入 Service
+
+流式读取 CSV/NDJSON，逐行校验后用 COPY 分批写入临时暂存表，
+再在数据库内按 房间 → 花架 → 植物 → 养护配置 的顺序校验外键并 upsert，
+全部在一个事务中完成。
+
+导出文件中的 image / identification 记录只含文件 URL、不含图片文件本身，
+导入时跳过并在结果的 skipped 中计数，导出文件可以直接导入而不会逐行报错。
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.versioning import mark_tables_changed
+from app.utils.search_utils import search_vector_text
+
+# 每次 COPY 写入暂存表的行数
+IMPORT_CHUNK_SIZE = 5000
+# 响应中最多返回的错误条数
+MAX_REPORTED_ERRORS = 1000
+
+
+def _to_str(value) -> Optional[str]:
+    value = str(value).strip()
+    return value or None
+
+
+def _to_int(value) -> int:
+    return int(value)
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in ("true", "1", "yes", "y", "t"):
+        return True
+    if normalized in ("false", "0", "no", "n", "f"):
+        return False
+    raise ValueError(f"无效的布尔值: {value}")
+
+
+def _to_date(value) -> date:
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+def _to_datetime(value) -> datetime:
+    return datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+
+
+class _Field:
+    def __init__(self, column: str, sql_type: str, convert: Callable, required: bool = False,
+                 default=None, max_length: Optional[int] = None):
+        self.column = column
+        self.sql_type = sql_type
+        self.convert = convert
+        self.required = required
+        self.default = default
+        self.max_length = max_length
+        # 同时接受 snake_case 和导出格式中的 camelCase 字段名
+        head, *rest = column.split("_")
+        self.alias = head + "".join(part.title() for part in rest)
+
+
+class _Entity:
+    def __init__(self, record_type: str, table: str, fields: List[_Field],
+                 checks: List[Tuple[str, str]], prepare: Optional[Callable[[dict], dict]] = None):
+        self.record_type = record_type
+        self.table = table
+        self.fields = fields
+        # (错误信息, 找不到引用时为真的 SQL 条件)，s 为暂存表别名
+        self.checks = checks
+        self.prepare = prepare
+        self.staging = f"import_{table}"
+
+    @property
+    def columns(self) -> List[str]:
+        return [field.column for field in self.fields] + (["search_vector"] if self.prepare else [])
+
+
+def _plant_search_vector(row: dict) -> dict:
+    row["search_vector"] = search_vector_text(row["name"], row["scientific_name"], row["description"])
+    return row
+
+
+# 按依赖顺序排列
+ENTITIES = [
+    _Entity("room", "rooms", [
+        _Field("id", "INTEGER", _to_int),
+        _Field("name", "VARCHAR(50)", _to_str, required=True, max_length=50),
+        _Field("description", "TEXT", _to_str),
+        _Field("location_type", "VARCHAR(20)", _to_str, default="indoor", max_length=20),
+        _Field("icon", "VARCHAR(50)", _to_str, max_length=50),
+        _Field("color", "VARCHAR(7)", _to_str, max_length=7),
+        _Field("sort_order", "INTEGER", _to_int, default=0),
+    ], checks=[]),
+    _Entity("shelf", "plant_shelves", [
+        _Field("id", "INTEGER", _to_int),
+        _Field("room_id", "INTEGER", _to_int, required=True),
+        _Field("name", "VARCHAR(100)", _to_str, required=True, max_length=100),
+        _Field("description", "TEXT", _to_str),
+        _Field("sort_order", "INTEGER", _to_int, default=0),
+        _Field("capacity", "INTEGER", _to_int, default=10),
+        _Field("is_active", "BOOLEAN", _to_bool, default=True),
+        _Field("is_default", "BOOLEAN", _to_bool, default=False),
+    ], checks=[
+        ("房间不存在", "NOT EXISTS (SELECT 1 FROM rooms r WHERE r.id = s.room_id)"),
+    ]),
+    _Entity("plant", "plants", [
+        _Field("id", "INTEGER", _to_int),
+        _Field("room_id", "INTEGER", _to_int, required=True),
+        _Field("shelf_id", "INTEGER", _to_int),
+        _Field("shelf_order", "INTEGER", _to_int),
+        _Field("name", "VARCHAR(100)", _to_str, required=True, max_length=100),
+        _Field("scientific_name", "VARCHAR(100)", _to_str, max_length=100),
+        _Field("description", "TEXT", _to_str),
+        _Field("purchase_date", "DATE", _to_date),
+        _Field("health_status", "VARCHAR(20)", _to_str, default="healthy", max_length=20),
+        _Field("source", "VARCHAR(20)", _to_str, default="manual", max_length=20),
+        _Field("is_active", "BOOLEAN", _to_bool, default=True),
+    ], checks=[
+        ("房间不存在", "NOT EXISTS (SELECT 1 FROM rooms r WHERE r.id = s.room_id)"),
+        ("花架不存在或不属于该房间",
+         "s.shelf_id IS NOT NULL AND NOT EXISTS "
+         "(SELECT 1 FROM plant_shelves ps WHERE ps.id = s.shelf_id AND ps.room_id = s.room_id)"),
+    ], prepare=_plant_search_vector),
+    _Entity("config", "plant_configs", [
+        _Field("id", "INTEGER", _to_int),
+        _Field("plant_id", "INTEGER", _to_int, required=True),
+        _Field("task_type_id", "INTEGER", _to_int, required=True),
+        _Field("interval_days", "INTEGER", _to_int, default=7),
+        _Field("window_period", "INTEGER", _to_int, default=0),
+        _Field("last_done_at", "TIMESTAMPTZ", _to_datetime),
+        _Field("next_due_at", "TIMESTAMPTZ", _to_datetime),
+        _Field("is_active", "BOOLEAN", _to_bool, default=True),
+        _Field("season", "VARCHAR(10)", _to_str, max_length=10),
+        _Field("notes", "TEXT", _to_str),
+    ], checks=[
+        ("植物不存在", "NOT EXISTS (SELECT 1 FROM plants p WHERE p.id = s.plant_id)"),
+        ("任务类型不存在", "NOT EXISTS (SELECT 1 FROM task_types t WHERE t.id = s.task_type_id)"),
+    ]),
+]
+ENTITY_BY_TYPE = {entity.record_type: entity for entity in ENTITIES}
+
+# 导出格式中有、但不导入的记录类型（依赖不在导出文件中的图片文件）
+SKIPPED_RECORD_TYPES = ("image", "identification")
+
+
+def iter_ndjson_records(lines: Iterable[str]) -> Iterator[Tuple[int, Optional[str], object]]:
+    """
+    解析 NDJSON（与导出格式相同：每行 {"type": ..., "data": {...}}）
+
+    Yields:
+        (行号, 记录类型, 数据字典或解析错误信息)
+    """
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            yield line_no, record.get("type"), record.get("data")
+        except (ValueError, AttributeError) as e:
+            yield line_no, None, f"JSON 解析失败: {e}"
+
+
+def iter_csv_records(lines: Iterable[str], record_type: str) -> Iterator[Tuple[int, Optional[str], object]]:
+    """
+    解析 CSV（首行为字段名，一个文件只包含一种记录）
+
+    Yields:
+        (行号, 记录类型, 数据字典)
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, record_type, row
+
+
+class ImportService:
+    def __init__(self, db: Session):
+        self.db = db
+        self._errors: List[dict] = []
+        self._error_count = 0
+
+    def import_records(self, records: Iterable[Tuple[int, Optional[str], object]]) -> dict:
+        """
+        导入记录（单个事务）
+
+        带 id 的记录按 id upsert（已存在则更新），不带 id 的记录新建。
+
+        Args:
+            records: iter_ndjson_records / iter_csv_records 的输出
+
+        Returns:
+            {"imported": {类型: 行数}, "skipped": {类型: 行数},
+             "errors": [{"line", "type", "message"}], "errorCount": int}
+        """
+        cursor = self.db.connection().connection.cursor()
+        try:
+            for entity in ENTITIES:
+                columns = ", ".join(
+                    ["line INTEGER"]
+                    + [f"{field.column} {field.sql_type}" for field in entity.fields]
+                    + (["search_vector TSVECTOR"] if entity.prepare else [])
+                )
+                cursor.execute(f"CREATE TEMP TABLE {entity.staging} ({columns}) ON COMMIT DROP")
+
+            buffers: Dict[str, List[list]] = {entity.record_type: [] for entity in ENTITIES}
+            skipped = {record_type: 0 for record_type in SKIPPED_RECORD_TYPES}
+            for line_no, record_type, data in records:
+                entity = ENTITY_BY_TYPE.get(record_type)
+                if isinstance(data, str):
+                    self._add_error(line_no, record_type, data)
+                    continue
+                if record_type in skipped:
+                    skipped[record_type] += 1
+                    continue
+                if entity is None:
+                    self._add_error(line_no, record_type, f"未知的记录类型: {record_type}")
+                    continue
+                row = self._validate(line_no, entity, data)
+                if row is None:
+                    continue
+                buffer = buffers[record_type]
+                buffer.append(row)
+                if len(buffer) >= IMPORT_CHUNK_SIZE:
+                    self._copy(cursor, entity, buffer)
+                    buffer.clear()
+
+            for entity in ENTITIES:
+                if buffers[entity.record_type]:
+                    self._copy(cursor, entity, buffers[entity.record_type])
+
+            imported = {}
+            for entity in ENTITIES:
+                imported[entity.record_type] = self._upsert(cursor, entity)
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        mark_tables_changed(self.db, [entity.table for entity in ENTITIES if imported[entity.record_type]])
+        self.db.commit()
+        self._errors.sort(key=lambda error: error["line"])
+        return {
+            "imported": imported,
+            "skipped": skipped,
+            "errors": self._errors,
+            "errorCount": self._error_count
+        }
+
+    def _add_error(self, line: int, record_type: Optional[str], message: str) -> None:
+        self._error_count += 1
+        if len(self._errors) < MAX_REPORTED_ERRORS:
+            self._errors.append({"line": line, "type": record_type, "message": message})
+
+    def _validate(self, line_no: int, entity: _Entity, data) -> Optional[list]:
+        if not isinstance(data, dict):
+            self._add_error(line_no, entity.record_type, "数据格式错误")
+            return None
+        row = {}
+        for field in entity.fields:
+            raw = data.get(field.column, data.get(field.alias))
+            if raw is None or raw == "":
+                if field.required:
+                    self._add_error(line_no, entity.record_type, f"缺少必填字段: {field.column}")
+                    return None
+                row[field.column] = field.default
+                continue
+            try:
+                value = field.convert(raw)
+            except (ValueError, TypeError):
+                self._add_error(line_no, entity.record_type, f"字段格式错误: {field.column}={raw!r}")
+                return None
+            if field.max_length and value and len(value) > field.max_length:
+                self._add_error(line_no, entity.record_type, f"字段过长: {field.column}（最多 {field.max_length} 字符）")
+                return None
+            row[field.column] = value
+        if entity.prepare:
+            row = entity.prepare(row)
+        return [line_no] + [row[column] for column in entity.columns]
+
+    def _copy(self, cursor, entity: _Entity, rows: List[list]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(
+                "" if value is None else value.isoformat() if isinstance(value, (date, datetime)) else value
+                for value in row
+            )
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {entity.staging} (line, {', '.join(entity.columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+    def _reject(self, cursor, entity: _Entity, message: str, condition: str) -> None:
+        cursor.execute(f"DELETE FROM {entity.staging} s WHERE {condition} RETURNING s.line")
+        for (line,) in cursor.fetchall():
+            self._add_error(line, entity.record_type, message)
+
+    def _upsert(self, cursor, entity: _Entity) -> int:
+        table, staging = entity.table, entity.staging
+
+        # 同一 id 出现多次时以最后一行为准
+        self._reject(
+            cursor, entity, "id 重复，已被后面的行覆盖",
+            f"s.id IS NOT NULL AND EXISTS (SELECT 1 FROM {staging} d WHERE d.id = s.id AND d.line > s.line)"
+        )
+
+        if entity.record_type == "plant":
+            # 未指定花架的植物放入所在房间的默认花架
+            cursor.execute(f"""
+                UPDATE {staging} s SET shelf_id = ps.id
+                FROM plant_shelves ps
+                WHERE s.shelf_id IS NULL AND ps.room_id = s.room_id AND ps.is_default
+            """)
+
+        for message, condition in entity.checks:
+            self._reject(cursor, entity, message, condition)
+
+        if entity.record_type == "plant":
+            # 未指定顺序时：已存在且花架不变的植物保留原顺序，
+            # 其余与 PlantService.create_plant 一致，接在花架现有植物之后依次排列
+            cursor.execute(f"""
+                UPDATE {staging} s SET shelf_order = p.shelf_order
+                FROM plants p
+                WHERE s.shelf_order IS NULL AND p.id = s.id AND p.shelf_id = s.shelf_id
+            """)
+            cursor.execute(f"""
+                UPDATE {staging} s SET shelf_order = o.shelf_order
+                FROM (
+                    SELECT t.line,
+                           CASE WHEN t.shelf_id IS NULL THEN 0
+                                ELSE (SELECT count(*) FROM plants p WHERE p.shelf_id = t.shelf_id)
+                                     + row_number() OVER (PARTITION BY t.shelf_id ORDER BY t.line) - 1
+                           END AS shelf_order
+                    FROM {staging} t
+                    WHERE t.shelf_order IS NULL
+                ) o
+                WHERE s.line = o.line
+            """)
+
+        columns = entity.columns
+        select_list = ", ".join(
+            [f"COALESCE(id, nextval(pg_get_serial_sequence('{table}', 'id')))"] + columns[1:]
+        )
+        updates = [f"{column} = EXCLUDED.{column}" for column in columns[1:]]
+        if table == "plants":
+            updates.append("updated_at = now()")
+
+        returning = ""
+        if table == "rooms":
+            returning = "RETURNING id, name"
+        cursor.execute(f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            SELECT {select_list} FROM {staging}
+            ON CONFLICT (id) DO UPDATE SET {', '.join(updates)}
+            {returning}
+        """)
+        count = cursor.rowcount
+
+        if table == "rooms" and count:
+            # 与 RoomService.create_room 一致：每个房间都有默认花架
+            room_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("""
+                INSERT INTO plant_shelves (room_id, name, is_default, sort_order, capacity, is_active)
+                SELECT r.id, r.name || '默认花架', TRUE, 0, 50, TRUE
+                FROM rooms r
+                WHERE r.id = ANY(%s)
+                  AND NOT EXISTS (SELECT 1 FROM plant_shelves ps WHERE ps.room_id = r.id AND ps.is_default)
+            """, (room_ids,))
+            mark_tables_changed(self.db, ["plant_shelves"])
+
+        # 显式 id 写入后推进自增序列，避免后续新建记录主键冲突
+        cursor.execute(f"""
+            SELECT setval(pg_get_serial_sequence('{table}', 'id'),
+                          GREATEST((SELECT COALESCE(MAX(id), 0) FROM {table}), 1))
+        """)
+        return count
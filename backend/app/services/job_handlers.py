@@ -0,0 +1,43 @@
+"""
+后台任务处理函数
+
+由 app.worker 导入注册；任务可能重复执行，处理函数需保持幂等。
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.services.identification_service import IdentificationService
+from app.services.job_service import JobError, job_handler
+from app.services.plant_image_service import PlantImageService
+from app.services.upload_sweeper import DEFAULT_GRACE_PERIOD, UploadSweeper
+
+
+@job_handler("process_image")
+def process_image(db: Session, payload: dict) -> Optional[dict]:
+    """生成上传图片的缩略图和衍生图 {"imageId": int}"""
+    return PlantImageService(db).process_image(payload["imageId"])
+
+
+@job_handler("promote_identification_photo")
+def promote_identification_photo(db: Session, payload: dict) -> Optional[dict]:
+    """将识别照片添加为植物主图 {"identificationId": int, "plantId": int}"""
+    added = IdentificationService(db).add_identification_image_to_plant(
+        payload["identificationId"], payload["plantId"]
+    )
+    if not added:
+        raise JobError("识别照片不存在或无法添加")
+    return {"added": True}
+
+
+@job_handler("sweep_uploads")
+def sweep_uploads(db: Session, payload: dict) -> Optional[dict]:
+    """清理未被引用的上传文件 {"gracePeriod": 秒, "dryRun": bool}"""
+    sweeper = UploadSweeper(db)
+    sweeper.mark()
+    report = sweeper.sweep(
+        grace_period=payload.get("gracePeriod", DEFAULT_GRACE_PERIOD),
+        dry_run=payload.get("dryRun", False)
+    )
+    report.pop("directories")
+    return report
@@ -0,0 +1,182 @@
+"""
+后台任务队列 Service
+
+任务存放在 PostgreSQL 的 jobs 表中，worker 用 SELECT ... FOR UPDATE SKIP LOCKED 出队，
+多个 worker 进程（可在不同机器上）并发领取互不阻塞。领取后设置可见性超时，
+worker 崩溃时任务在超时后被重新领取；长任务执行期间由 worker 定期续期（heartbeat）。
+完成、失败和续期都只在任务仍由本 worker 持有时生效，被其他 worker 接管后的结果直接丢弃。
+失败按指数退避重试，超过次数后标记为失败。
+
+任务至少执行一次，处理函数需要幂等。
+"""
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job
+
+# 任务类型 → 处理函数(db, payload) -> 结果字典（可为 None）
+JOB_HANDLERS: Dict[str, Callable[[Session, dict], Optional[dict]]] = {}
+
+# 重试退避上限（秒）
+MAX_RETRY_DELAY = 3600
+
+
+class JobError(Exception):
+    """任务无法完成且重试也不会成功（如输入数据无效），直接标记为失败"""
+
+
+def job_handler(job_type: str):
+    """注册任务处理函数"""
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+class JobService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(self, job_type: str, payload: Optional[dict] = None, priority: int = 0,
+                max_attempts: Optional[int] = None, delay: int = 0, commit: bool = True) -> Job:
+        """
+        加入任务
+
+        Args:
+            job_type: 任务类型（需已注册处理函数）
+            payload: 任务参数（JSON）
+            priority: 优先级，越大越先执行
+            max_attempts: 最大执行次数，默认 JOB_MAX_ATTEMPTS
+            delay: 延迟执行秒数
+            commit: 是否立即提交；传 False 时与调用方的写入在同一事务中生效
+        """
+        job = Job(
+            type=job_type,
+            payload=payload or {},
+            priority=priority,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS
+        )
+        if delay:
+            job.run_at = func.now() + timedelta(seconds=delay)
+        self.db.add(job)
+        if commit:
+            self.db.commit()
+            self.db.refresh(job)
+        else:
+            self.db.flush()
+        return job
+
+    def get_job(self, job_id: int) -> Optional[dict]:
+        """获取任务状态"""
+        job = self.db.query(Job).filter(Job.id == job_id).first()
+        return job.to_dict() if job else None
+
+    def dequeue(self, worker_id: str, visibility_timeout: Optional[int] = None) -> Optional[Job]:
+        """
+        领取一个可执行的任务
+
+        可执行：已到执行时间的排队任务，或可见性超时已过期的运行中任务（worker 崩溃）。
+        按 优先级降序、执行时间、id 的顺序领取，被其他 worker 锁定的行直接跳过。
+
+        Returns:
+            已标记为 running 的任务，没有可执行任务时返回 None
+        """
+        timeout = visibility_timeout or settings.JOB_VISIBILITY_TIMEOUT
+        while True:
+            candidate = (
+                select(Job.id)
+                .where(or_(
+                    and_(Job.status == "queued", Job.run_at <= func.now()),
+                    and_(Job.status == "running", Job.locked_until < func.now())
+                ))
+                .order_by(Job.priority.desc(), Job.run_at, Job.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            job = self.db.scalars(
+                update(Job)
+                .where(Job.id == candidate)
+                .values(
+                    status="running",
+                    attempts=Job.attempts + 1,
+                    locked_by=worker_id,
+                    locked_until=func.now() + timedelta(seconds=timeout),
+                    updated_at=func.now()
+                )
+                .returning(Job),
+                execution_options={"synchronize_session": False}
+            ).first()
+            if job is None:
+                self.db.commit()
+                return None
+
+            if job.attempts > job.max_attempts:
+                # 超时被重新领取且已用完次数
+                self._finish(job.id, worker_id, "failed", error=job.last_error or "执行超时，超过最大重试次数")
+                continue
+
+            self.db.commit()
+            return job
+
+    def heartbeat(self, job_id: int, worker_id: str, visibility_timeout: Optional[int] = None) -> bool:
+        """
+        延长任务的可见性超时（长任务执行期间定期调用）
+
+        Returns:
+            是否仍持有任务；False 表示已被其他 worker 接管
+        """
+        timeout = visibility_timeout or settings.JOB_VISIBILITY_TIMEOUT
+        return self._update_owned(job_id, worker_id, locked_until=func.now() + timedelta(seconds=timeout))
+
+    def complete(self, job: Job, worker_id: str, result: Optional[dict] = None) -> bool:
+        """标记任务成功，返回是否仍持有任务"""
+        return self._finish(job.id, worker_id, "succeeded", result=result)
+
+    def fail(self, job: Job, worker_id: str, error: str, retry: bool = True) -> bool:
+        """
+        记录任务失败：可重试且未用完次数时按指数退避重新排队，否则标记为失败
+
+        Returns:
+            是否仍持有任务
+        """
+        if retry and job.attempts < job.max_attempts:
+            delay = min(settings.JOB_RETRY_BASE_DELAY * 2 ** (job.attempts - 1), MAX_RETRY_DELAY)
+            return self._update_owned(
+                job.id,
+                worker_id,
+                status="queued",
+                run_at=func.now() + timedelta(seconds=delay),
+                locked_by=None,
+                locked_until=None,
+                last_error=error
+            )
+        return self._finish(job.id, worker_id, "failed", error=error)
+
+    def _finish(self, job_id: int, worker_id: str, status: str,
+                result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        values = {
+            "status": status,
+            "result": result,
+            "locked_by": None,
+            "locked_until": None,
+            "finished_at": func.now()
+        }
+        if error is not None:
+            values["last_error"] = error
+        return self._update_owned(job_id, worker_id, **values)
+
+    def _update_owned(self, job_id: int, worker_id: str, **values) -> bool:
+        """只在任务仍由 worker_id 持有（运行中且未被其他 worker 重新领取）时更新并提交"""
+        updated = self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "running", Job.locked_by == worker_id)
+            .values(updated_at=func.now(), **values),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        self.db.commit()
+        return updated == 1
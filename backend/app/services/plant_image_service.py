@@ -2,8 +2,17 @@
 植物图片 Service
 """
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import func
+from typing import Dict, List, Optional
+from pathlib import Path
+from app.core.upload_files import versioned_url
+from app.models.plant import Plant
 from app.models.plant_image import PlantImage
+from app.models.plant_image_variant import PlantImageVariant
+from app.models.blob import Blob
+from app.services.blob_service import BlobService, blob_dir, blob_thumbnail_path
+from app.services.job_service import JobError
+from app.utils.image_utils import probe_image
 
 
 class PlantImageService:
@@ -17,28 +26,104 @@ class PlantImageService:
         ).order_by(PlantImage.sort_order, PlantImage.created_at).all()
         return [img.to_dict() for img in images]
 
-    def get_primary_image(self, plant_id: int) -> Optional[dict]:
-        """获取植物的主图"""
-        image = self.db.query(PlantImage).filter(
-            PlantImage.plant_id == plant_id,
-            PlantImage.is_primary == True
+    def count_images(self, plant_ids: List[int]) -> Dict[int, int]:
+        """
+        批量统计多个植物的图片数量（单次查询）
+
+        Returns:
+            {plant_id: 图片数量}，没有图片的植物不在结果中
+        """
+        if not plant_ids:
+            return {}
+        rows = (
+            self.db.query(PlantImage.plant_id, func.count(PlantImage.id))
+            .filter(PlantImage.plant_id.in_(plant_ids))
+            .group_by(PlantImage.plant_id)
+            .all()
+        )
+        return dict(rows)
+
+    def find_by_blob(self, sha256: str) -> Optional[PlantImage]:
+        """查找引用同一 blob 的已有图片（用于复用缩略图和衍生图）"""
+        return self.db.query(PlantImage).filter(
+            PlantImage.blob_sha256 == sha256,
+            PlantImage.thumbnail_url.isnot(None)
         ).first()
+
+    def reuse_probe(self, sha256: str) -> Optional[dict]:
+        """
+        同一内容已处理过时，复用已有图片的尺寸、缩略图和衍生图
+
+        Returns:
+            与 probe_image 返回格式相同的字典，没有可复用的图片时返回 None
+        """
+        image = self.find_by_blob(sha256)
+        if not image:
+            return None
+        return {
+            "width": image.width,
+            "height": image.height,
+            "takenAt": image.taken_at,
+            "thumbnail": True,
+            "variants": [{**variant.to_dict(), "path": variant.url.lstrip("/").split("?")[0]} for variant in image.variants]
+        }
+
+    def count_blob_refs(self, plant_ids: List[int]) -> Dict[str, int]:
+        """
+        统计多个植物的图片对各 blob 的引用数
+
+        植物被永久删除时图片随外键级联删除，需按此结果释放 blob 引用。
+        """
+        if not plant_ids:
+            return {}
+        rows = (
+            self.db.query(PlantImage.blob_sha256, func.count(PlantImage.id))
+            .filter(PlantImage.plant_id.in_(plant_ids), PlantImage.blob_sha256.isnot(None))
+            .group_by(PlantImage.blob_sha256)
+            .all()
+        )
+        return dict(rows)
+
+    def get_primary_image(self, plant_id: int) -> Optional[dict]:
+        """获取植物的主图（没有标记主图时为最早的图片）"""
+        image = (
+            self.db.query(PlantImage)
+            .join(Plant, Plant.primary_image_id == PlantImage.id)
+            .filter(Plant.id == plant_id)
+            .first()
+        )
         return image.to_dict() if image else None
 
-    def create_image(self, plant_id: int, image_data) -> dict:
-        """创建图片记录"""
+    def create_image(self, plant_id: int, image_data, variants: Optional[List[dict]] = None,
+                     blob_sha256: Optional[str] = None, commit: bool = True) -> dict:
+        """创建图片记录（blob_sha256 为已由 BlobService 计入引用的原图）"""
+        new_image = PlantImage(**image_data.dict(), plant_id=plant_id, blob_sha256=blob_sha256)
+        return self.add_image(new_image, variants, commit=commit).to_dict()
+
+    def add_image(self, image: PlantImage, variants: Optional[List[dict]] = None,
+                  commit: bool = True) -> PlantImage:
+        """
+        保存图片记录并同步植物封面
+
+        Args:
+            image: 未保存的图片对象（需已设置 plant_id）
+            variants: probe_image / create_variants 生成的衍生图
+            commit: 是否立即提交；传 False 时只 flush，由调用方在同一事务中提交
+        """
+        image.variants = self._build_variants(variants)
+
         # 如果设置为primary，先取消其他primary
-        if hasattr(image_data, 'is_primary') and image_data.is_primary:
-            self.db.query(PlantImage).filter(
-                PlantImage.plant_id == plant_id,
-                PlantImage.is_primary == True
-            ).update({"is_primary": False})
-
-        new_image = PlantImage(**image_data.dict(), plant_id=plant_id)
-        self.db.add(new_image)
-        self.db.commit()
-        self.db.refresh(new_image)
-        return new_image.to_dict()
+        if image.is_primary:
+            self._unset_primary(image.plant_id)
+
+        self.db.add(image)
+        self._sync_cover(image.plant_id)
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
+        self.db.refresh(image)
+        return image
 
     def update_image(self, image_id: int, image_data) -> Optional[dict]:
         """更新图片信息"""
@@ -46,8 +131,29 @@ class PlantImageService:
         if not image:
             return None
 
-        for key, value in image_data.dict(exclude_unset=True).items():
+        updates = image_data.dict(exclude_unset=True)
+        if updates.get("is_primary"):
+            self._unset_primary(image.plant_id)
+        for key, value in updates.items():
             setattr(image, key, value)
+        if {"is_primary", "url"} & updates.keys():
+            self._sync_cover(image.plant_id)
+        self.db.commit()
+        self.db.refresh(image)
+        return image.to_dict()
+
+    def set_primary_image(self, plant_id: int, image_id: int) -> Optional[dict]:
+        """设置为主图"""
+        image = self.db.query(PlantImage).filter(
+            PlantImage.id == image_id,
+            PlantImage.plant_id == plant_id
+        ).first()
+        if not image:
+            return None
+
+        self._unset_primary(plant_id)
+        image.is_primary = True
+        self._sync_cover(plant_id)
         self.db.commit()
         self.db.refresh(image)
         return image.to_dict()
@@ -57,6 +163,81 @@ class PlantImageService:
         image = self.db.query(PlantImage).filter(PlantImage.id == image_id).first()
         if not image:
             return False
+        plant_id, blob_sha256 = image.plant_id, image.blob_sha256
+        blob_service = BlobService(self.db)
         self.db.delete(image)
+        self._sync_cover(plant_id)
+        released = bool(blob_sha256) and blob_service.release(blob_sha256)
         self.db.commit()
+        if released:
+            blob_service.purge(blob_sha256)
         return True
+
+    def process_image(self, image_id: int) -> Optional[dict]:
+        """
+        为已保存的图片生成缩略图、衍生图并写入尺寸和拍摄时间（后台任务 process_image）
+
+        Raises:
+            JobError: 图片无法解析（不重试）
+        """
+        image = self.db.query(PlantImage).filter(PlantImage.id == image_id).first()
+        if not image or not image.blob_sha256:
+            return None
+
+        sha256 = image.blob_sha256
+        probe = self.reuse_probe(sha256)
+        if probe is None:
+            blob_path = self.db.query(Blob.path).filter(Blob.sha256 == sha256).scalar()
+            if blob_path is None:
+                raise JobError("图片文件不存在")
+            try:
+                probe = probe_image(Path(blob_path), blob_thumbnail_path(sha256), blob_dir(sha256))
+            except ValueError as e:
+                raise JobError(str(e))
+
+        image.width = probe["width"]
+        image.height = probe["height"]
+        if image.taken_at is None:
+            image.taken_at = probe["takenAt"]
+        image.thumbnail_url = versioned_url(blob_thumbnail_path(sha256)) if probe["thumbnail"] else None
+        image.variants = self._build_variants(probe["variants"])
+        self._sync_cover(image.plant_id)
+        self.db.commit()
+        return {"width": image.width, "height": image.height, "variants": len(probe["variants"])}
+
+    def _build_variants(self, variants: Optional[List[dict]]) -> List[PlantImageVariant]:
+        return [
+            PlantImageVariant(
+                format=variant["format"],
+                width=variant["width"],
+                height=variant["height"],
+                url=versioned_url(Path(variant["path"])),
+                file_size=variant["fileSize"]
+            )
+            for variant in variants or []
+        ]
+
+    def _unset_primary(self, plant_id: int) -> None:
+        """取消植物当前的主图标记"""
+        self.db.query(PlantImage).filter(
+            PlantImage.plant_id == plant_id,
+            PlantImage.is_primary == True
+        ).update({"is_primary": False})
+
+    def _sync_cover(self, plant_id: int) -> None:
+        """
+        重新计算并写入植物封面（主图，否则最早的图片）
+
+        只 flush 不提交，与调用方的图片写入在同一事务中生效。
+        """
+        self.db.flush()
+        cover = (
+            self.db.query(PlantImage)
+            .filter(PlantImage.plant_id == plant_id)
+            .order_by(PlantImage.is_primary.desc(), PlantImage.created_at, PlantImage.id)
+            .first()
+        )
+        self.db.query(Plant).filter(Plant.id == plant_id).update({
+            "primary_image_id": cover.id if cover else None,
+            "primary_thumbnail_url": (cover.thumbnail_url or cover.url) if cover else None
+        })
@@ -1,59 +1,113 @@
 """
 植物Service
 """
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Numeric, cast, func, insert
 from typing import List, Optional
 from app.models.plant import Plant
+from app.models.plant_image import PlantImage
 from app.models.plant_shelf import PlantShelf
+from app.services.blob_service import BlobService
+from app.services.plant_image_service import PlantImageService
+from app.utils.pagination import apply_cursor, split_page
+from app.schemas.plant import PlantCreate, PlantBulkUpdate
+from app.utils.search_utils import build_search_query, build_search_vector
+
+# 批量写入每条 INSERT 的行数（控制绑定参数数量）
+BULK_CHUNK_SIZE = 500
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
 
 
 class PlantService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _apply_filters(self, query, room_id: Optional[int] = None, health_status: Optional[str] = None,
+                       search_query=None, is_active: bool = True):
+        """添加列表/统计共用的筛选条件"""
+        query = query.filter(Plant.is_active == is_active)
+        if room_id:
+            query = query.filter(Plant.room_id == room_id)
+        if health_status:
+            query = query.filter(Plant.health_status == health_status)
+        if search_query is not None:
+            # 走 GIN 索引的全文匹配（名称、学名、描述）
+            query = query.filter(Plant.search_vector.op("@@")(search_query))
+        return query
+
     def get_plants(self, room_id: Optional[int] = None, health_status: Optional[str] = None,
                    search: Optional[str] = None, skip: int = 0, limit: int = 20,
-                   is_active: bool = True) -> List[dict]:
-        """获取植物列表（包含主图和房间名称）"""
-        from sqlalchemy.orm import joinedload
+                   is_active: bool = True, cursor: Optional[str] = None) -> dict:
+        """
+        获取植物列表（包含主图和房间名称）
+
+        传入 cursor 时按游标分页（忽略 skip），否则按 skip 偏移分页。
+        有搜索关键词时按相关度排序（名称命中优先于学名、描述）。
+
+        Returns:
+            {"items": [...], "nextCursor": str | None}
+        """
         from app.models.room import Room
 
-        # 使用 JOIN 来获取房间名称，避免 N+1 查询
+        search_query = build_search_query(search) if search else None
+        if search and search_query is None:
+            return {"items": [], "nextCursor": None}
+
+        # 使用 JOIN 来获取房间名称和封面图，避免 N+1 查询
+        cover_image = aliased(PlantImage)
         query = self.db.query(
-            Plant, Room.name.label('room_name')
+            Plant, Room.name.label('room_name'), cover_image
         ).join(
             Room, Plant.room_id == Room.id
-        ).filter(Plant.is_active == is_active)
+        ).outerjoin(
+            cover_image, Plant.primary_image_id == cover_image.id
+        )
+        query = self._apply_filters(query, room_id, health_status, search_query, is_active)
 
-        if room_id:
-            query = query.filter(Plant.room_id == room_id)
-        if health_status:
-            query = query.filter(Plant.health_status == health_status)
-        if search:
-            query = query.filter(Plant.name.ilike(f"%{search}%"))
+        if search_query is not None:
+            # ts_rank 为 float4，转为 numeric 后游标中的值能精确还原，同分的行不会在翻页时丢失
+            rank = func.round(cast(func.ts_rank(Plant.search_vector, search_query), Numeric), 6)
+            query = query.add_columns(rank.label('rank')).order_by(rank.desc(), Plant.id.desc())
+            sort_columns = [rank, Plant.id]
+            sort_key = lambda row: [row.rank, row[0].id]
+        else:
+            # 按最后修改顺序排序（使用ID倒序，ID越大表示越新）
+            query = query.order_by(Plant.id.desc())
+            sort_columns = [Plant.id]
+            sort_key = lambda row: [row[0].id]
 
-        # 按最后修改顺序排序（使用ID倒序，ID越大表示越新）
-        query = query.order_by(Plant.id.desc()).offset(skip).limit(limit)
-        results = query.all()
+        if cursor:
+            query = apply_cursor(query, sort_columns, cursor)
+        elif skip:
+            query = query.offset(skip)
+        # 多取一行用于判断是否还有下一页
+        results, next_cursor = split_page(query.limit(limit + 1).all(), limit, key=sort_key)
 
-        # 为每个植物对象传递 db session
-        result = []
-        for plant, room_name in results:
-            # 临时绑定 db session 到 plant 对象
-            plant.db = self.db
-            result.append(plant.to_dict(include_images=True, room_name=room_name))
-        return result
+        # 一次查询批量获取本页所有植物的图片数量
+        image_counts = PlantImageService(self.db).count_images([row[0].id for row in results])
+
+        items = []
+        for row in results:
+            plant, cover = row[0], row[2]
+            items.append(plant.to_dict(include_images=True, room_name=row.room_name, cover={
+                "primaryImage": cover.to_dict() if cover else None,
+                "imageCount": image_counts.get(plant.id, 0)
+            }))
+        return {"items": items, "nextCursor": next_cursor}
 
     def count_plants(self, room_id: Optional[int] = None, health_status: Optional[str] = None,
                      search: Optional[str] = None, is_active: bool = True) -> int:
         """统计植物数量"""
-        query = self.db.query(Plant).filter(Plant.is_active == is_active)
-        if room_id:
-            query = query.filter(Plant.room_id == room_id)
-        if health_status:
-            query = query.filter(Plant.health_status == health_status)
-        if search:
-            query = query.filter(Plant.name.ilike(f"%{search}%"))
+        search_query = build_search_query(search) if search else None
+        if search and search_query is None:
+            return 0
+        query = self._apply_filters(self.db.query(Plant), room_id, health_status, search_query, is_active)
         return query.count()
 
     def get_plant(self, plant_id: int) -> Optional[dict]:
@@ -91,6 +145,124 @@ class PlantService:
         self.db.refresh(new_plant)
         return new_plant.to_dict()
 
+    def bulk_create_plants(self, items: List[dict]) -> dict:
+        """
+        批量创建植物（单个事务）
+
+        逐项校验，默认花架和排序起点按花架只查询一次，校验通过的植物
+        以多行 INSERT ... RETURNING 分批写入，最后统一提交。
+
+        Args:
+            items: 植物数据列表（字段同 PlantCreate）
+
+        Returns:
+            {"created": [植物字典], "errors": [{"index", "message"}]}
+        """
+        from app.models.room import Room
+
+        errors = []
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, PlantCreate(**item)))
+            except ValidationError as e:
+                errors.append({"index": index, "message": _format_validation_error(e)})
+
+        # 一次查询校验房间，一次查询获取默认花架
+        room_ids = {plant.room_id for _, plant in valid}
+        existing_rooms = {
+            room_id for (room_id,) in
+            self.db.query(Room.id).filter(Room.id.in_(room_ids)).all()
+        } if room_ids else set()
+        default_shelves = dict(
+            self.db.query(PlantShelf.room_id, PlantShelf.id)
+            .filter(PlantShelf.room_id.in_(existing_rooms), PlantShelf.is_default == True)
+            .all()
+        ) if existing_rooms else {}
+
+        # 每个默认花架的当前植物数量作为排序起点
+        next_orders = dict(
+            self.db.query(Plant.shelf_id, func.count(Plant.id))
+            .filter(Plant.shelf_id.in_(default_shelves.values()))
+            .group_by(Plant.shelf_id)
+            .all()
+        ) if default_shelves else {}
+
+        rows = []
+        for index, plant in valid:
+            if plant.room_id not in existing_rooms:
+                errors.append({"index": index, "message": f"房间不存在: {plant.room_id}"})
+                continue
+            shelf_id = default_shelves.get(plant.room_id)
+            shelf_order = 0
+            if shelf_id is not None:
+                shelf_order = next_orders.get(shelf_id, 0)
+                next_orders[shelf_id] = shelf_order + 1
+            rows.append({
+                **plant.dict(),
+                "shelf_id": shelf_id,
+                "shelf_order": shelf_order,
+                "source": "manual",
+                "is_active": True,
+                # 批量 INSERT 不触发 mapper 事件，需显式写入搜索向量
+                "search_vector": build_search_vector(plant.name, plant.scientific_name, plant.description)
+            })
+
+        created = []
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            chunk = rows[start:start + BULK_CHUNK_SIZE]
+            created.extend(self.db.scalars(insert(Plant).values(chunk).returning(Plant)).all())
+
+        result = [plant.to_dict() for plant in created]
+        self.db.commit()
+        errors.sort(key=lambda error: error["index"])
+        return {"created": result, "errors": errors}
+
+    def bulk_update_plants(self, items: List[dict]) -> dict:
+        """
+        批量更新/归档植物（单个事务）
+
+        Args:
+            items: 更新数据列表（字段同 PlantBulkUpdate，is_active=false 即归档）
+
+        Returns:
+            {"updated": [植物字典], "errors": [{"index", "message"}]}
+        """
+        errors = []
+        updates = []
+        for index, item in enumerate(items):
+            try:
+                updates.append((index, PlantBulkUpdate(**item)))
+            except ValidationError as e:
+                errors.append({"index": index, "message": _format_validation_error(e)})
+
+        plant_ids = {update.id for _, update in updates}
+        plants = {
+            plant.id: plant for plant in
+            self.db.query(Plant).filter(Plant.id.in_(plant_ids)).all()
+        } if plant_ids else {}
+
+        updated_ids = []
+        for index, update in updates:
+            plant = plants.get(update.id)
+            if not plant:
+                errors.append({"index": index, "message": f"植物不存在: {update.id}"})
+                continue
+            for key, value in update.dict(exclude_unset=True, exclude={"id"}).items():
+                setattr(plant, key, value)
+            updated_ids.append(plant.id)
+
+        self.db.commit()
+
+        # 一次查询重新加载提交后过期的对象
+        if updated_ids:
+            self.db.query(Plant).filter(Plant.id.in_(updated_ids)).all()
+        errors.sort(key=lambda error: error["index"])
+        return {
+            "updated": [plants[plant_id].to_dict() for plant_id in dict.fromkeys(updated_ids)],
+            "errors": errors
+        }
+
     def update_plant(self, plant_id: int, plant_data) -> Optional[dict]:
         """更新植物"""
         plant = self.db.query(Plant).filter(Plant.id == plant_id).first()
@@ -126,6 +298,13 @@ class PlantService:
         plant = self.db.query(Plant).filter(Plant.id == plant_id).first()
         if not plant:
             return False
+        blob_refs = PlantImageService(self.db).count_blob_refs([plant_id])
         self.db.delete(plant)
+        self.db.flush()
+        blob_service = BlobService(self.db)
+        released = [sha256 for sha256, count in blob_refs.items() if blob_service.release(sha256, count)]
         self.db.commit()
+        # 提交后再删除不再被引用的文件
+        for sha256 in released:
+            blob_service.purge(sha256)
         return True
@@ -3,22 +3,41 @@
 """
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List, Optional
+from typing import Optional
 from app.models.room import Room
 from app.models.plant import Plant
 from app.models.plant_shelf import PlantShelf
+from app.services.blob_service import BlobService
+from app.services.plant_image_service import PlantImageService
+from app.utils.pagination import apply_cursor, split_page
 
 
 class RoomService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_rooms(self, location_type: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[dict]:
-        """获取房间列表"""
+    def get_rooms(self, location_type: Optional[str] = None, skip: int = 0, limit: int = 100,
+                  cursor: Optional[str] = None) -> dict:
+        """
+        获取房间列表（按 sort_order, id 排序）
+
+        传入 cursor 时按游标分页（忽略 skip），否则按 skip 偏移分页。
+
+        Returns:
+            {"items": [...], "nextCursor": str | None}
+        """
         query = self.db.query(Room)
         if location_type:
             query = query.filter(Room.location_type == location_type)
-        rooms = query.order_by(Room.sort_order).offset(skip).limit(limit).all()
+        sort_key = func.coalesce(Room.sort_order, 0)
+        query = query.order_by(sort_key, Room.id)
+        if cursor:
+            query = apply_cursor(query, [sort_key, Room.id], cursor, descending=False)
+        elif skip:
+            query = query.offset(skip)
+        rooms, next_cursor = split_page(
+            query.limit(limit + 1).all(), limit, key=lambda r: [r.sort_order or 0, r.id]
+        )
 
         # 获取所有房间的植物数量
         room_ids = [room.id for room in rooms]
@@ -37,7 +56,7 @@ class RoomService:
             room_dict['plantCount'] = plant_count_map.get(room.id, 0)
             result.append(room_dict)
 
-        return result
+        return {"items": result, "nextCursor": next_cursor}
 
     def count_rooms(self, location_type: Optional[str] = None) -> int:
         """统计房间数量"""
@@ -98,6 +117,15 @@ class RoomService:
         room = self.db.query(Room).filter(Room.id == room_id).first()
         if not room:
             return False
+        # 房间删除会级联删除植物及其图片，先统计要释放的 blob 引用
+        plant_ids = [plant_id for (plant_id,) in self.db.query(Plant.id).filter(Plant.room_id == room_id)]
+        blob_refs = PlantImageService(self.db).count_blob_refs(plant_ids)
         self.db.delete(room)
+        self.db.flush()
+        blob_service = BlobService(self.db)
+        released = [sha256 for sha256, count in blob_refs.items() if blob_service.release(sha256, count)]
         self.db.commit()
+        # 提交后再删除不再被引用的文件
+        for sha256 in released:
+            blob_service.purge(sha256)
         return True
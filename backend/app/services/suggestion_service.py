@@ -2,19 +2,38 @@
 建议 Service
 """
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 from app.models.suggestion import Suggestion
+from app.utils.pagination import apply_cursor, split_page
 
 
 class SuggestionService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_suggestions(self, skip: int = 0, limit: int = 50, is_active: bool = True) -> List[dict]:
-        """获取建议列表"""
+    def get_suggestions(self, skip: int = 0, limit: int = 50, is_active: bool = True,
+                        cursor: Optional[str] = None) -> dict:
+        """
+        获取建议列表（按 created_at, id 倒序）
+
+        传入 cursor 时按游标分页（忽略 skip），否则按 skip 偏移分页。
+
+        Returns:
+            {"items": [...], "nextCursor": str | None}
+        """
         query = self.db.query(Suggestion).filter(Suggestion.is_active == is_active)
-        suggestions = query.order_by(Suggestion.created_at.desc()).offset(skip).limit(limit).all()
-        return [suggestion.to_dict() for suggestion in suggestions]
+        query = query.order_by(Suggestion.created_at.desc(), Suggestion.id.desc())
+        if cursor:
+            query = apply_cursor(query, [Suggestion.created_at, Suggestion.id], cursor)
+        elif skip:
+            query = query.offset(skip)
+        suggestions, next_cursor = split_page(
+            query.limit(limit + 1).all(), limit, key=lambda s: [s.created_at, s.id]
+        )
+        return {
+            "items": [suggestion.to_dict() for suggestion in suggestions],
+            "nextCursor": next_cursor
+        }
 
     def count_suggestions(self, is_active: bool = True) -> int:
         """统计建议数量"""
@@ -0,0 +1,217 @@
+"""
+上传目录孤儿文件清理（标记-清除）
+
+标记：流式读取数据库中所有被引用的文件路径，以 8 字节摘要存入集合；
+清除：用 os.scandir 遍历上传目录，分批删除未被引用且修改时间早于宽限期的文件。
+宽限期保护正在上传、数据库记录尚未提交的文件。
+
+blob 目录下以 <sha256> 开头的文件（原图、缩略图、衍生图）按 blobs 表判断是否被引用，
+删除前在 blob 锁内再确认一次，避免与同一内容的并发上传交错。
+"""
+import hashlib
+import os
+import re
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.blob import Blob
+from app.models.plant import Plant
+from app.models.plant_identification import PlantIdentification
+from app.models.plant_image import PlantImage
+from app.models.plant_image_variant import PlantImageVariant
+from app.services.blob_service import BLOB_ROOT, BlobService
+
+# 保存文件 URL 的列
+REFERENCE_COLUMNS = (
+    PlantImage.url,
+    PlantImage.thumbnail_url,
+    PlantImageVariant.url,
+    PlantIdentification.image_url,
+    Plant.primary_thumbnail_url,
+)
+
+# 默认宽限期：24 小时内修改过的文件不删除
+DEFAULT_GRACE_PERIOD = 24 * 3600
+
+# 流式读取引用时每次取的行数
+STREAM_BATCH_SIZE = 10000
+
+_BLOB_FILE = re.compile(r"^([0-9a-f]{64})[._]")
+
+
+def _digest(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def upload_relative_path(url: str) -> Optional[str]:
+    """把文件 URL（相对或带域名）转为相对上传目录的路径，不在上传目录下时返回 None"""
+    path = url.split("?")[0]
+    index = path.find("/uploads/")
+    if index != -1:
+        return path[index + len("/uploads/"):]
+    if path.startswith("uploads/"):
+        return path[len("uploads/"):]
+    return None
+
+
+class UploadSweeper:
+    def __init__(self, db: Session, upload_dir: str = settings.UPLOAD_DIR):
+        self.db = db
+        self.root = Path(upload_dir)
+        self.blob_root = os.path.relpath(BLOB_ROOT, self.root).replace(os.sep, "/") + "/"
+        self._referenced: Set[int] = set()
+        self._blobs: Set[int] = set()
+
+    def mark(self) -> int:
+        """
+        收集被引用的文件路径和 blob
+
+        Returns:
+            引用数（路径和 blob 合计，已去重）
+        """
+        self._referenced.clear()
+        self._blobs.clear()
+        for column in REFERENCE_COLUMNS:
+            for url in self._stream(select(column).where(column.isnot(None))):
+                relative_path = upload_relative_path(url)
+                if relative_path:
+                    self._referenced.add(_digest(relative_path))
+        for sha256 in self._stream(select(Blob.sha256)):
+            self._blobs.add(_digest(sha256))
+        return len(self._referenced) + len(self._blobs)
+
+    def sweep(
+        self,
+        grace_period: int = DEFAULT_GRACE_PERIOD,
+        batch_size: int = 500,
+        dry_run: bool = False,
+        pause: float = 0.0,
+        orphan_log: Optional[TextIO] = None
+    ) -> Dict:
+        """
+        删除孤儿文件（需先调用 mark）
+
+        Args:
+            grace_period: 宽限期（秒），修改时间在此之内的孤儿文件保留
+            batch_size: 每批删除的文件数
+            dry_run: 只统计不删除
+            pause: 每批之间暂停的秒数，降低对磁盘的冲击
+            orphan_log: 逐行写入孤儿文件路径（报告用）
+
+        Returns:
+            统计报告，含按顶层目录汇总的文件数和字节数
+        """
+        cutoff = time.time() - grace_period
+        report = {
+            "dryRun": dry_run,
+            "scanned": 0,
+            "scannedBytes": 0,
+            "orphaned": 0,
+            "orphanedBytes": 0,
+            "withinGracePeriod": 0,
+            "deleted": 0,
+            "deletedBytes": 0,
+            "errors": 0,
+            "directories": defaultdict(lambda: {"files": 0, "bytes": 0, "orphaned": 0, "orphanedBytes": 0}),
+        }
+        batch: List[Tuple[str, str, int]] = []
+
+        for entry, relative_path in self._walk():
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            directory = report["directories"][relative_path.split("/")[0] if "/" in relative_path else "."]
+            report["scanned"] += 1
+            report["scannedBytes"] += stat.st_size
+            directory["files"] += 1
+            directory["bytes"] += stat.st_size
+
+            if self._is_referenced(relative_path):
+                continue
+            if stat.st_mtime > cutoff:
+                report["withinGracePeriod"] += 1
+                continue
+
+            report["orphaned"] += 1
+            report["orphanedBytes"] += stat.st_size
+            directory["orphaned"] += 1
+            directory["orphanedBytes"] += stat.st_size
+            if orphan_log is not None:
+                orphan_log.write(f"{relative_path}\t{stat.st_size}\n")
+            if dry_run:
+                continue
+
+            batch.append((entry.path, relative_path, stat.st_size))
+            if len(batch) >= batch_size:
+                self._delete_batch(batch, report)
+                batch = []
+                if pause:
+                    time.sleep(pause)
+
+        if batch:
+            self._delete_batch(batch, report)
+        report["directories"] = dict(report["directories"])
+        return report
+
+    def _is_referenced(self, relative_path: str) -> bool:
+        if _digest(relative_path) in self._referenced:
+            return True
+        sha256 = self._blob_sha(relative_path)
+        return sha256 is not None and _digest(sha256) in self._blobs
+
+    def _blob_sha(self, relative_path: str) -> Optional[str]:
+        if not relative_path.startswith(self.blob_root):
+            return None
+        match = _BLOB_FILE.match(relative_path.rsplit("/", 1)[-1])
+        return match.group(1) if match else None
+
+    def _delete_batch(self, batch: List[Tuple[str, str, int]], report: Dict) -> None:
+        """删除一批文件；blob 文件在锁内确认仍无记录后才删除，整批结束时提交释放锁"""
+        blob_service = BlobService(self.db)
+        confirmed: Dict[str, bool] = {}
+        try:
+            for path, relative_path, size in batch:
+                sha256 = self._blob_sha(relative_path)
+                if sha256 is not None:
+                    if sha256 not in confirmed:
+                        confirmed[sha256] = blob_service.is_orphan(sha256)
+                    if not confirmed[sha256]:
+                        continue
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+                except OSError:
+                    report["errors"] += 1
+                    continue
+                report["deleted"] += 1
+                report["deletedBytes"] += size
+        finally:
+            self.db.commit()
+
+    def _walk(self) -> Iterator[Tuple[os.DirEntry, str]]:
+        """遍历上传目录下的所有文件（不跟随符号链接），返回 (目录项, 相对路径)"""
+        stack = [""]
+        while stack:
+            prefix = stack.pop()
+            try:
+                iterator = os.scandir(self.root / prefix if prefix else self.root)
+            except FileNotFoundError:
+                continue
+            with iterator:
+                for entry in iterator:
+                    relative_path = f"{prefix}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(relative_path + "/")
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry, relative_path
+
+    def _stream(self, statement) -> Iterator[str]:
+        return self.db.execute(statement.execution_options(yield_per=STREAM_BATCH_SIZE)).scalars()
@@ -1,10 +1,39 @@
 """
 图片处理工具
 """
-from PIL import Image
+from PIL import Image, ImageOps
 from pathlib import Path
-from typing import Optional
+from datetime import datetime
+from typing import Iterable, List, Optional, Union
 import io
+import math
+import os
+
+try:
+    # 可选依赖：Pillow 10 本身不支持 AVIF 编码
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+# 解压炸弹防护：超过此像素数的图片不解码（约 7000x7000）
+MAX_IMAGE_PIXELS = 50_000_000
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+# EXIF 标签
+_EXIF_ORIENTATION = 0x0112
+_EXIF_DATETIME = 0x0132
+_EXIF_IFD = 0x8769
+_EXIF_DATETIME_ORIGINAL = 0x9003
+
+# 响应式衍生图的宽度档位
+VARIANT_WIDTHS = (150, 300, 800, 1600)
+
+# 格式 → (Pillow 格式名, 扩展名, 保存参数)
+_VARIANT_FORMATS = {
+    "avif": ("AVIF", "avif", {"quality": 60}),
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
 
 
 def create_thumbnail(
@@ -28,6 +57,8 @@ def create_thumbnail(
     try:
         # 打开图片
         with Image.open(image_path) as img:
+            # JPEG 直接按缩小比例解码
+            img.draft('RGB', size)
             # 转换为RGB（处理RGBA等格式）
             if img.mode in ('RGBA', 'LA', 'P'):
                 img = img.convert('RGB')
@@ -102,3 +133,292 @@ def get_image_dimensions(image_path: Path) -> Optional[tuple]:
             return img.size
     except:
         return None
+
+
+def avif_supported() -> bool:
+    """当前 Pillow 是否可以编码 AVIF"""
+    return ".avif" in Image.registered_extensions()
+
+
+def _variant_targets(width: int, widths: Iterable[int]) -> List[int]:
+    """不放大：只保留小于原图宽度的档位，原图比所有档位都小时按原尺寸输出一档"""
+    return [target for target in sorted(set(widths), reverse=True) if target < width] or [width]
+
+
+def _write_variants(img: Image.Image, stem: str, output_dir: Path, targets: List[int]) -> List[dict]:
+    """从已解码（已摆正、RGB）的图片从大到小逐级缩放并保存各格式衍生图"""
+    formats = [fmt for fmt in _VARIANT_FORMATS if fmt != "avif" or avif_supported()]
+    variants = []
+    output_dir.mkdir(parents=True, exist_ok=True)
+    current = img
+    try:
+        for width in targets:
+            if width < current.width:
+                height = max(1, round(current.height * width / current.width))
+                current = current.resize((width, height), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                pil_format, ext, options = _VARIANT_FORMATS[fmt]
+                path = output_dir / f"{stem}_{width}w.{ext}"
+                current.save(path, pil_format, **options)
+                variants.append({
+                    "format": fmt,
+                    "width": current.width,
+                    "height": current.height,
+                    "path": str(path),
+                    "fileSize": path.stat().st_size
+                })
+    except Exception:
+        for variant in variants:
+            Path(variant["path"]).unlink(missing_ok=True)
+        raise
+    return variants
+
+
+def create_variants(
+    image_path: Path,
+    output_dir: Path,
+    widths: Iterable[int] = VARIANT_WIDTHS
+) -> List[dict]:
+    """
+    生成多尺寸、多格式的响应式衍生图（WebP、JPEG，可用时还有 AVIF）
+
+    只解码一次，从大到小逐级缩放；不放大，原图比所有档位都小时只按原尺寸输出一档。
+    文件名为 <原文件名>_<宽度>w.<扩展名>。
+
+    Args:
+        image_path: 原图路径
+        output_dir: 衍生图保存目录
+        widths: 宽度档位
+
+    Returns:
+        [{"format", "width", "height", "path", "fileSize"}]，失败时返回空列表
+    """
+    try:
+        with Image.open(image_path) as img:
+            # 按 EXIF 方向摆正（衍生图不保留 EXIF）
+            current = ImageOps.exif_transpose(img)
+            if current.mode != 'RGB':
+                current = current.convert('RGB')
+            return _write_variants(current, image_path.stem, output_dir, _variant_targets(current.width, widths))
+    except Exception as e:
+        print(f"生成衍生图失败: {e}")
+        return []
+
+
+def _capture_time(exif: Image.Exif) -> Optional[datetime]:
+    """读取 EXIF 拍摄时间（DateTimeOriginal，缺失时用 DateTime）"""
+    value = exif.get_ifd(_EXIF_IFD).get(_EXIF_DATETIME_ORIGINAL) or exif.get(_EXIF_DATETIME)
+    try:
+        return datetime.strptime(str(value).strip("\x00 "), "%Y:%m:%d %H:%M:%S") if value else None
+    except ValueError:
+        return None
+
+
+def probe_image(
+    image_path: Path,
+    thumbnail_path: Path,
+    variant_dir: Optional[Path] = None,
+    thumbnail_size: tuple = (300, 300),
+    thumbnail_quality: int = 85,
+    widths: Iterable[int] = VARIANT_WIDTHS
+) -> dict:
+    """
+    一次解码完成图片探测：尺寸、格式、EXIF 方向和拍摄时间、缩略图及衍生图
+
+    先只读文件头检查像素数（防解压炸弹），JPEG 再用 draft() 直接按
+    1/2、1/4、1/8 比例解码到够用的最小尺寸，内存和 CPU 开销与原图分辨率基本无关。
+
+    Args:
+        image_path: 原图路径
+        thumbnail_path: 缩略图保存路径（JPEG）
+        variant_dir: 衍生图保存目录，None 表示不生成
+        thumbnail_size: 缩略图尺寸 (width, height)
+        thumbnail_quality: 缩略图 JPEG 质量
+        widths: 衍生图宽度档位
+
+    Returns:
+        {"width", "height", "format", "orientation", "takenAt", "thumbnail", "variants"}，
+        宽高为按 EXIF 方向摆正后的尺寸
+
+    Raises:
+        ValueError: 无法解析或像素数超过上限
+    """
+    try:
+        with Image.open(image_path) as img:
+            if img.width * img.height > MAX_IMAGE_PIXELS:
+                raise ValueError(f"图片像素过多（最多 {MAX_IMAGE_PIXELS // 1000000} 百万像素）")
+
+            exif = img.getexif()
+            orientation = exif.get(_EXIF_ORIENTATION, 1)
+            width, height = img.size
+            if orientation in (5, 6, 7, 8):
+                width, height = height, width
+            result = {
+                "width": width,
+                "height": height,
+                "format": img.format,
+                "orientation": orientation,
+                "takenAt": _capture_time(exif),
+                "thumbnail": False,
+                "variants": []
+            }
+
+            targets = _variant_targets(width, widths) if variant_dir else []
+            if img.format == "JPEG":
+                # 衍生图只约束宽度，缩略图按框等比缩放：按原图宽高比求出够用的最小尺寸，
+                # 再换回未摆正的方向交给 draft()，宽高都不小于此尺寸时才按比例缩小解码
+                scale = min(1.0, max(
+                    max(targets, default=0) / width,
+                    min(thumbnail_size[0] / width, thumbnail_size[1] / height)
+                ))
+                box = (math.ceil(width * scale), math.ceil(height * scale))
+                if orientation in (5, 6, 7, 8):
+                    box = box[::-1]
+                img.draft("RGB", box)
+
+            current = ImageOps.exif_transpose(img)
+            if current.mode != 'RGB':
+                current = current.convert('RGB')
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"图片无法解析: {e}")
+
+    if variant_dir:
+        result["variants"] = _write_variants(current, image_path.stem, variant_dir, targets)
+
+    thumbnail = current.copy()
+    thumbnail.thumbnail(thumbnail_size, Image.Resampling.LANCZOS)
+    thumbnail_path.parent.mkdir(parents=True, exist_ok=True)
+    thumbnail.save(thumbnail_path, 'JPEG', quality=thumbnail_quality, optimize=True)
+    result["thumbnail"] = True
+    return result
+
+
+# 按需缩放支持的输出格式 → Pillow 格式名
+RENDER_FORMATS = {"jpeg": "JPEG", "webp": "WEBP", "avif": "AVIF", "png": "PNG"}
+
+
+def render_image(
+    image_path: Path,
+    output_path: Path,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    fmt: str = "webp",
+    quality: int = 80
+) -> bool:
+    """
+    按尺寸上限等比缩放并转码（不放大）
+
+    先写入同目录的临时文件再原子替换，读取方不会看到写了一半的文件。
+
+    Args:
+        image_path: 原图路径
+        output_path: 输出路径
+        width: 最大宽度，None 表示不限
+        height: 最大高度，None 表示不限
+        fmt: 输出格式（RENDER_FORMATS 的键）
+        quality: 有损格式的质量 (1-100)
+
+    Returns:
+        bool: 是否成功
+    """
+    temp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.part")
+    try:
+        with Image.open(image_path) as img:
+            current = ImageOps.exif_transpose(img)
+            if fmt == "jpeg" or not current.has_transparency_data:
+                if current.mode != 'RGB':
+                    current = current.convert('RGB')
+            elif current.mode != 'RGBA':
+                current = current.convert('RGBA')
+
+            current.thumbnail((width or current.width, height or current.height), Image.Resampling.LANCZOS)
+
+            options = {"optimize": True} if fmt == "png" else {"quality": quality}
+            current.save(temp_path, RENDER_FORMATS[fmt], **options)
+        os.replace(temp_path, output_path)
+        return True
+    except Exception as e:
+        print(f"缩放图片失败: {e}")
+        temp_path.unlink(missing_ok=True)
+        return False
+
+
+# 识别前重新压缩时 JPEG 质量的下限，低于此仍超出字节预算时改为继续缩小尺寸
+_IDENTIFICATION_MIN_QUALITY = 60
+
+
+def prepare_identification_image(
+    image: Union[bytes, Path],
+    max_edge: int = 1024,
+    max_bytes: int = 307200,
+    quality: int = 85
+) -> dict:
+    """
+    缩小并重新压缩待识别的图片（在图片进程池中调用）
+
+    只解码一次（JPEG 按目标尺寸缩小解码），按 EXIF 方向摆正，长边缩到 max_edge 以内，
+    编码为 JPEG；超出 max_bytes 时逐步降低质量，到下限后继续缩小尺寸。
+    原图已是尺寸和大小都在范围内、无需旋转的 JPEG 时直接使用原图。
+
+    Args:
+        image: 原图字节数据或文件路径
+        max_edge: 长边上限（像素）
+        max_bytes: 编码后的字节预算
+        quality: 初始 JPEG 质量 (1-100)
+
+    Returns:
+        {"data": 待发送的字节, "width", "height", "quality": None 表示使用原图,
+         "originalBytes": 原图字节数, "bytes": 待发送字节数}
+
+    Raises:
+        ValueError: 无法解析或像素数超过上限
+    """
+    original_bytes = len(image) if isinstance(image, bytes) else os.path.getsize(image)
+    try:
+        with Image.open(io.BytesIO(image) if isinstance(image, bytes) else image) as img:
+            if img.width * img.height > MAX_IMAGE_PIXELS:
+                raise ValueError(f"图片像素过多（最多 {MAX_IMAGE_PIXELS // 1000000} 百万像素）")
+            if (
+                img.format == "JPEG"
+                and max(img.size) <= max_edge
+                and original_bytes <= max_bytes
+                and img.getexif().get(_EXIF_ORIENTATION, 1) == 1
+            ):
+                # 已经足够小且无需旋转的 JPEG 不解码，重新编码只会损失画质
+                data = image if isinstance(image, bytes) else Path(image).read_bytes()
+                return {"data": data, "width": img.width, "height": img.height, "quality": None,
+                        "originalBytes": original_bytes, "bytes": original_bytes}
+            if img.format == "JPEG":
+                # 只约束长边：按宽高比请求，短边不会阻止按比例缩小解码
+                scale = min(1.0, max_edge / max(img.size))
+                img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+
+            current = ImageOps.exif_transpose(img)
+            if current.mode != 'RGB':
+                current = current.convert('RGB')
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"图片无法解析: {e}")
+
+    current.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    data = _encode_jpeg(current, quality)
+    while len(data) > max_bytes and quality > _IDENTIFICATION_MIN_QUALITY:
+        quality = max(quality - 10, _IDENTIFICATION_MIN_QUALITY)
+        data = _encode_jpeg(current, quality)
+    while len(data) > max_bytes and min(current.size) > 64:
+        current = current.resize(
+            (current.width * 3 // 4, current.height * 3 // 4), Image.Resampling.LANCZOS
+        )
+        data = _encode_jpeg(current, quality)
+
+    return {"data": data, "width": current.width, "height": current.height, "quality": quality,
+            "originalBytes": original_bytes, "bytes": len(data)}
+
+
+def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
@@ -0,0 +1,107 @@
+"""
+游标（keyset）分页工具
+
+游标对客户端是不透明的字符串，内容为排序键值的 base64 编码。
+按排序键做范围过滤代替 OFFSET，翻到多深的页面都只需扫描 limit 行。
+"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        # 按字符串保存，避免经过 float 后与数据库中的值不再相等
+        return {"$dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    if isinstance(value, dict) and "$dec" in value:
+        try:
+            return Decimal(value["$dec"])
+        except ArithmeticError:
+            raise ValueError("无效的分页游标")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    将排序键值编码为游标
+
+    Args:
+        values: 排序键值（与排序列一一对应）
+
+    Returns:
+        URL 安全的游标字符串
+    """
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    解码游标
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("无效的分页游标")
+    if not isinstance(values, list):
+        raise ValueError("无效的分页游标")
+    return [_decode_value(v) for v in values]
+
+
+def apply_cursor(query, columns: Sequence, cursor: Optional[str], descending: bool = True):
+    """
+    为查询添加游标范围过滤
+
+    Args:
+        query: SQLAlchemy 查询（排序方式须与 columns/descending 一致）
+        columns: 排序列，最后一列须唯一（通常为主键）
+        cursor: 上一页返回的 nextCursor，为空时不过滤
+        descending: 是否为降序
+
+    Raises:
+        ValueError: 游标无效
+    """
+    if not cursor:
+        return query
+    values = decode_cursor(cursor)
+    if len(values) != len(columns):
+        raise ValueError("无效的分页游标")
+    key = tuple_(*columns)
+    bound = tuple_(*values)
+    return query.filter(key < bound if descending else key > bound)
+
+
+def split_page(rows: list, limit: int, key: Callable[[Any], Sequence[Any]]) -> Tuple[list, Optional[str]]:
+    """
+    拆分多取一行的查询结果
+
+    查询时应取 limit + 1 行，多出的一行说明还有下一页。
+
+    Args:
+        rows: 查询结果
+        limit: 每页数量
+        key: 从行中提取排序键值的函数
+
+    Returns:
+        (本页数据, 下一页游标或 None)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
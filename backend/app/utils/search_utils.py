@@ -0,0 +1,91 @@
+"""
+植物搜索分词工具
+
+PostgreSQL 自带的分词器和 pg_trgm 三元组都不适合中文植物名（如“绿萝”只有两个字），
+这里在应用层分词：拉丁字母/数字按单词切分，中文按单字 + 相邻二字（bigram）切分。
+词元直接以 tsvector/tsquery 字面量写入，不经过数据库分词器，
+因此结果与数据库 locale 无关，可以由 GIN 索引支撑。
+"""
+import re
+import unicodedata
+from typing import List, Optional
+
+from sqlalchemy import cast
+from sqlalchemy.dialects.postgresql import TSQUERY, TSVECTOR
+
+# tsvector 的位置上限和单个词元的位置数上限
+_MAX_POSITION = 16383
+_MAX_POSITIONS_PER_LEXEME = 256
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+
+def _normalize(text: Optional[str]) -> str:
+    # NFKC 将全角字母数字转为半角
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def _cjk_bigrams(run: str) -> List[str]:
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def document_tokens(text: Optional[str]) -> List[str]:
+    """
+    提取文档词元（用于建立索引）
+
+    中文同时保留单字和二字词元，单字查询也能命中。
+    """
+    tokens = []
+    for run in _TOKEN_RE.findall(_normalize(text)):
+        if run.isascii():
+            tokens.append(run)
+        else:
+            tokens.extend(run)
+            tokens.extend(_cjk_bigrams(run))
+    return tokens
+
+
+def search_vector_text(name: Optional[str], scientific_name: Optional[str], description: Optional[str]) -> str:
+    """
+    生成植物加权搜索向量的 tsvector 文本表示
+
+    权重：名称 A，学名 B，描述 C。每个词元带有位置信息，ts_rank 才能按权重排序。
+    文本形式可直接用于 COPY 或转换为 tsvector。
+    """
+    positions = {}
+    position = 0
+    for text, weight in ((name, "A"), (scientific_name, "B"), (description, "C")):
+        for token in document_tokens(text):
+            position = min(position + 1, _MAX_POSITION)
+            entries = positions.setdefault(token, [])
+            if len(entries) < _MAX_POSITIONS_PER_LEXEME:
+                entries.append(f"{position}{weight}")
+    # 词元只包含字母数字和汉字，无需转义引号
+    return " ".join(f"'{token}':{','.join(entries)}" for token, entries in positions.items())
+
+
+def build_search_vector(name: Optional[str], scientific_name: Optional[str], description: Optional[str]):
+    """构建植物加权搜索向量的 SQL 表达式"""
+    return cast(search_vector_text(name, scientific_name, description), TSVECTOR)
+
+
+def build_search_query(term: Optional[str]):
+    """
+    将搜索关键词转换为 tsquery 表达式
+
+    所有词元需同时命中；拉丁词元按前缀匹配，支持边输入边搜索。
+
+    Returns:
+        tsquery 表达式，关键词中没有可搜索的字符时返回 None
+    """
+    parts = []
+    for run in _TOKEN_RE.findall(_normalize(term)):
+        if run.isascii():
+            parts.append(f"'{run}':*")
+        elif len(run) == 1:
+            parts.append(f"'{run}'")
+        else:
+            parts.extend(f"'{bigram}'" for bigram in _cjk_bigrams(run))
+    if not parts:
+        return None
+    return cast(" & ".join(parts), TSQUERY)
@@ -0,0 +1,179 @@
+"""
+上传文件流式保存工具
+
+按固定大小分块读取上传内容，边读边计算哈希并写入临时文件，
+超过大小限制立即中止；写入完成后原子重命名到目标位置，
+不会出现只写了一半的文件，单个请求的内存占用与文件大小无关。
+
+识别等按内容查缓存的场景可用 hash_upload 先分块计算哈希（不保留内容），
+命中缓存时完全不写盘，未命中时再调用 save 流式写盘。
+"""
+import hashlib
+import os
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+# 每次读取的块大小
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# 文件头魔数 → 扩展名
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+)
+
+
+class UploadError(ValueError):
+    """上传文件不符合要求（类型或大小）"""
+
+
+class StoredUpload:
+    """已保存的上传文件"""
+
+    def __init__(self, path: Path, size: int, md5: str, sha256: str, image_type: str):
+        self.path = path
+        self.size = size
+        self.md5 = md5
+        self.sha256 = sha256
+        self.image_type = image_type
+
+    @property
+    def filename(self) -> str:
+        return self.path.name
+
+
+class HashedUpload:
+    """已校验类型和大小、计算了哈希的上传文件，内容仍在 UploadFile 中，需要保留时再调用 save 写盘"""
+
+    def __init__(self, file: UploadFile, size: int, md5: str, sha256: str, image_type: str):
+        self.file = file
+        self.size = size
+        self.md5 = md5
+        self.sha256 = sha256
+        self.image_type = image_type
+
+    async def save(self, target_dir: Path) -> StoredUpload:
+        """从头流式写入 target_dir/<uuid>.<类型>"""
+        await self.file.seek(0)
+        return await save_upload(self.file, target_dir, self.size, [self.image_type])
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    根据文件头魔数判断图片类型
+
+    Returns:
+        扩展名（jpg/png/gif/webp/bmp），无法识别时返回 None
+    """
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, image_type in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_type
+    return None
+
+
+def _write_chunk(out, chunk: bytes, md5, sha256) -> None:
+    # 哈希计算在大块数据上会释放 GIL，与写盘一起放到线程池
+    md5.update(chunk)
+    sha256.update(chunk)
+    out.write(chunk)
+
+
+def _update_digests(chunk: bytes, md5, sha256) -> None:
+    md5.update(chunk)
+    sha256.update(chunk)
+
+
+async def hash_upload(
+    file: UploadFile,
+    max_size: int,
+    allowed_types: Iterable[str]
+) -> HashedUpload:
+    """
+    分块读取上传的图片并计算哈希（不写盘，内存占用与文件大小无关）
+
+    Args:
+        file: 上传文件
+        max_size: 最大字节数
+        allowed_types: 允许的图片类型（扩展名）
+
+    Raises:
+        UploadError: 文件类型不支持或超过大小限制
+    """
+    head = await file.read(UPLOAD_CHUNK_SIZE)
+    image_type = sniff_image_type(head)
+    allowed_types = set(allowed_types)
+    if image_type not in allowed_types:
+        raise UploadError(f"不支持的文件类型。允许的类型: {', '.join(sorted(allowed_types))}")
+
+    md5, sha256 = hashlib.md5(), hashlib.sha256()
+    size = 0
+    chunk = head
+    while chunk:
+        size += len(chunk)
+        if size > max_size:
+            raise UploadError(f"文件大小超过限制 (最大 {max_size // (1024*1024)}MB)")
+        await run_in_threadpool(_update_digests, chunk, md5, sha256)
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+
+    return HashedUpload(file, size, md5.hexdigest(), sha256.hexdigest(), image_type)
+
+
+async def save_upload(
+    file: UploadFile,
+    target_dir: Path,
+    max_size: int,
+    allowed_types: Iterable[str]
+) -> StoredUpload:
+    """
+    流式保存上传的图片
+
+    Args:
+        file: 上传文件
+        target_dir: 保存目录
+        max_size: 最大字节数
+        allowed_types: 允许的图片类型（扩展名）
+
+    Returns:
+        StoredUpload，文件名为 uuid + 实际图片类型的扩展名
+
+    Raises:
+        UploadError: 文件类型不支持或超过大小限制
+    """
+    head = await file.read(UPLOAD_CHUNK_SIZE)
+    image_type = sniff_image_type(head)
+    allowed_types = set(allowed_types)
+    if image_type not in allowed_types:
+        raise UploadError(f"不支持的文件类型。允许的类型: {', '.join(sorted(allowed_types))}")
+
+    target_dir.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=target_dir, prefix=".upload-", suffix=".part")
+    temp_path = Path(temp_name)
+    md5, sha256 = hashlib.md5(), hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadError(f"文件大小超过限制 (最大 {max_size // (1024*1024)}MB)")
+                await run_in_threadpool(_write_chunk, out, chunk, md5, sha256)
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+
+        final_path = target_dir / f"{uuid.uuid4()}.{image_type}"
+        os.replace(temp_path, final_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    return StoredUpload(final_path, size, md5.hexdigest(), sha256.hexdigest(), image_type)
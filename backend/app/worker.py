@@ -0,0 +1,141 @@
+"""
+后台任务 worker
+
+用法:
+    python -m app.worker                  # 持续运行，队列为空时轮询
+    python -m app.worker --once           # 处理完当前队列后退出
+
+可以同时运行多个进程（或部署在多台机器上），任务通过 SKIP LOCKED 分配，互不重复。
+执行任务期间每隔 JOB_VISIBILITY_TIMEOUT / 3 秒续期一次，长任务不会被其他 worker 重复领取。
+收到 SIGTERM / SIGINT 时执行完当前任务再退出。
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.image_executor import image_executor
+from app.services import job_handlers  # noqa: F401  注册任务处理函数
+from app.services.job_service import JOB_HANDLERS, JobError, JobService
+
+logger = logging.getLogger("app.worker")
+
+
+class Heartbeat:
+    """任务执行期间在后台线程中定期续期（使用独立的数据库会话）"""
+
+    def __init__(self, job_id: int, worker_id: str, interval: float):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job_id}", daemon=True)
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            db = SessionLocal()
+            try:
+                if not JobService(db).heartbeat(self.job_id, self.worker_id):
+                    logger.warning(f"任务 {self.job_id} 已被其他 worker 接管，停止续期")
+                    return
+            except Exception:
+                logger.exception(f"任务 {self.job_id} 续期失败")
+            finally:
+                db.close()
+
+
+class Worker:
+    def __init__(self, poll_interval: float):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.stopping = False
+
+    def stop(self, *args) -> None:
+        if not self.stopping:
+            logger.info("收到退出信号，当前任务完成后退出")
+        self.stopping = True
+
+    def run(self, once: bool = False) -> None:
+        logger.info(f"Worker {self.worker_id} 已启动，任务类型: {', '.join(sorted(JOB_HANDLERS))}")
+        while not self.stopping:
+            if self.run_one():
+                continue
+            if once:
+                break
+            time.sleep(self.poll_interval)
+        logger.info(f"Worker {self.worker_id} 已退出")
+
+    def run_one(self) -> bool:
+        """领取并执行一个任务，队列为空时返回 False"""
+        db = SessionLocal()
+        try:
+            service = JobService(db)
+            job = service.dequeue(self.worker_id)
+            if job is None:
+                return False
+
+            handler = JOB_HANDLERS.get(job.type)
+            if handler is None:
+                service.fail(job, self.worker_id, f"未知的任务类型: {job.type}", retry=False)
+                return True
+
+            job_id, job_type = job.id, job.type
+            started = time.monotonic()
+            try:
+                with Heartbeat(job_id, self.worker_id, settings.JOB_VISIBILITY_TIMEOUT / 3):
+                    result = handler(db, job.payload)
+            except JobError as e:
+                db.rollback()
+                owned = service.fail(job, self.worker_id, str(e), retry=False)
+                logger.warning(f"任务 {job_id} ({job_type}) 失败: {e}")
+            except Exception:
+                db.rollback()
+                owned = service.fail(job, self.worker_id, traceback.format_exc(limit=5))
+                logger.exception(f"任务 {job_id} ({job_type}) 出错，第 {job.attempts} 次")
+            else:
+                owned = service.complete(job, self.worker_id, result)
+                logger.info(f"任务 {job_id} ({job_type}) 完成，耗时 {time.monotonic() - started:.2f}s")
+            if not owned:
+                logger.warning(f"任务 {job_id} ({job_type}) 已被其他 worker 接管，本次结果未记录")
+            return True
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后台任务 worker")
+    parser.add_argument("--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL,
+                        help="队列为空时的轮询间隔（秒）")
+    parser.add_argument("--once", action="store_true", help="处理完当前队列后退出")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    worker = Worker(args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    try:
+        worker.run(once=args.once)
+    finally:
+        image_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
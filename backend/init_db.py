@@ -4,7 +4,7 @@
 """
 from sqlalchemy import create_engine, text
 from app.core.config import settings
-from app.models import room, plant, task_type, plant_image, plant_config
+from app.models import room, plant, task_type, blob, plant_image, plant_image_variant, plant_config, table_version, job, identification_lease
 from app.core.database import Base
 
 
@@ -0,0 +1,62 @@
+"""
+添加内容寻址文件存储迁移
+
+创建 blobs 表（按 SHA-256 存储、带引用计数），
+为 plant_images 和 plant_identifications 添加 blob_sha256 引用字段。
+已有图片保持原路径（blob_sha256 为空），新上传的图片写入 uploads/blobs/。
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+import sys
+
+
+def migrate():
+    """执行数据库迁移"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("开始数据库迁移...")
+
+            print("创建 blobs 表...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256 VARCHAR(64) PRIMARY KEY,
+                    path VARCHAR(500) NOT NULL,
+                    size BIGINT NOT NULL,
+                    image_type VARCHAR(10),
+                    ref_count INTEGER DEFAULT 0 NOT NULL,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL
+                )
+            """))
+
+            print("添加 blob 引用字段...")
+            for table in ("plant_images", "plant_identifications"):
+                conn.execute(text(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN IF NOT EXISTS blob_sha256 VARCHAR(64) REFERENCES blobs(sha256)
+                """))
+
+            print("创建索引...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_plant_images_blob_sha256
+                ON plant_images(blob_sha256)
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_identifications_blob_sha256
+                ON plant_identifications(blob_sha256)
+            """))
+
+            trans.commit()
+            print("\n✅ 数据库迁移完成！")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"\n❌ 迁移失败: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate()
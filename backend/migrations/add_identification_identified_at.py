@@ -0,0 +1,53 @@
+"""
+识别结果缓存刷新迁移
+
+为 plant_identifications 添加 identified_at（识别结果获取时间）：
+缓存 TTL 从此时间计算，过期后重新识别时在原记录上刷新结果和时间（按 image_hash upsert），
+不再因 image_hash 唯一约束插入失败。已有记录用 created_at 回填。
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+import sys
+
+
+def migrate():
+    """执行数据库迁移"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("开始数据库迁移...")
+
+            print("添加 identified_at 字段...")
+            conn.execute(text("""
+                ALTER TABLE plant_identifications
+                ADD COLUMN IF NOT EXISTS identified_at TIMESTAMP
+            """))
+
+            print("回填已有记录...")
+            result = conn.execute(text("""
+                UPDATE plant_identifications
+                SET identified_at = created_at
+                WHERE identified_at IS NULL
+            """))
+            print(f"  ✅ 回填 {result.rowcount} 条记录")
+
+            conn.execute(text("""
+                ALTER TABLE plant_identifications
+                ALTER COLUMN identified_at SET DEFAULT NOW(),
+                ALTER COLUMN identified_at SET NOT NULL
+            """))
+
+            trans.commit()
+            print("\n✅ 数据库迁移完成！")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"\n❌ 迁移失败: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate()
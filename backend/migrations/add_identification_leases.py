@@ -0,0 +1,41 @@
+"""
+添加识别租约表迁移
+
+创建 identification_leases 表：多个 worker 进程同时识别同一图片时，
+只有持有租约的进程调用百度 AI，其他进程等待其结果。
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+import sys
+
+
+def migrate():
+    """执行数据库迁移"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("开始数据库迁移...")
+
+            print("创建 identification_leases 表...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS identification_leases (
+                    image_hash VARCHAR(64) PRIMARY KEY,
+                    owner VARCHAR(100) NOT NULL,
+                    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+                )
+            """))
+
+            trans.commit()
+            print("\n✅ 数据库迁移完成！")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"\n❌ 迁移失败: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate()
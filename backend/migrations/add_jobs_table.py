@@ -0,0 +1,59 @@
+"""
+添加后台任务队列表迁移
+
+创建 jobs 表及只覆盖未完成任务的部分索引，供 worker 用 FOR UPDATE SKIP LOCKED 出队。
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+import sys
+
+
+def migrate():
+    """执行数据库迁移"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("开始数据库迁移...")
+
+            print("创建 jobs 表...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id BIGSERIAL PRIMARY KEY,
+                    type VARCHAR(50) NOT NULL,
+                    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 5,
+                    run_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+                    locked_by VARCHAR(100),
+                    locked_until TIMESTAMP WITH TIME ZONE,
+                    last_error TEXT,
+                    result JSONB,
+                    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+                    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+                    finished_at TIMESTAMP WITH TIME ZONE
+                )
+            """))
+
+            print("创建出队索引...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_jobs_dequeue
+                ON jobs (status, priority, run_at)
+                WHERE status IN ('queued', 'running')
+            """))
+
+            trans.commit()
+            print("\n✅ 数据库迁移完成！")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"\n❌ 迁移失败: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,43 @@
+"""
+添加游标分页索引迁移
+
+为按 (created_at, id) 游标分页的列表创建复合索引
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+import sys
+
+
+def migrate():
+    """执行数据库迁移"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("开始数据库迁移...")
+
+            print("创建 suggestions 游标分页索引...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_suggestions_created_at_id
+                ON suggestions(created_at, id)
+            """))
+
+            print("创建 plant_identifications 游标分页索引...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_identifications_created_at_id
+                ON plant_identifications(created_at, id)
+            """))
+
+            trans.commit()
+            print("\n✅ 数据库迁移完成！")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"\n❌ 迁移失败: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate()
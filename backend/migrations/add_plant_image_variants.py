@@ -0,0 +1,47 @@
+"""
+添加植物图片衍生图表迁移
+
+创建 plant_image_variants 表，记录每张图片的多尺寸、多格式（WebP/AVIF/JPEG）衍生图。
+已有图片的衍生图由后台任务补齐，本迁移只建表。
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+import sys
+
+
+def migrate():
+    """执行数据库迁移"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("开始数据库迁移...")
+
+            print("创建 plant_image_variants 表...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS plant_image_variants (
+                    id SERIAL PRIMARY KEY,
+                    image_id INTEGER NOT NULL REFERENCES plant_images(id) ON DELETE CASCADE,
+                    format VARCHAR(10) NOT NULL,
+                    width INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    url VARCHAR(500) NOT NULL,
+                    file_size INTEGER,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL,
+                    CONSTRAINT uq_plant_image_variants_image_format_width UNIQUE (image_id, format, width)
+                )
+            """))
+
+            trans.commit()
+            print("\n✅ 数据库迁移完成！")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"\n❌ 迁移失败: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,63 @@
+"""
+添加植物封面图指针迁移
+
+为 plants 表添加 primary_image_id / primary_thumbnail_url 字段，
+为 plant_images.plant_id 创建索引，并按“主图，否则最早的图片”规则回填已有数据
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+import sys
+
+
+def migrate():
+    """执行数据库迁移"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("开始数据库迁移...")
+
+            print("为 plants 表添加封面图字段...")
+            conn.execute(text("""
+                ALTER TABLE plants
+                ADD COLUMN IF NOT EXISTS primary_image_id INTEGER
+                REFERENCES plant_images(id) ON DELETE SET NULL
+            """))
+            conn.execute(text("""
+                ALTER TABLE plants
+                ADD COLUMN IF NOT EXISTS primary_thumbnail_url VARCHAR(500)
+            """))
+
+            print("创建索引...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_plant_images_plant_id
+                ON plant_images(plant_id)
+            """))
+
+            print("回填封面图...")
+            result = conn.execute(text("""
+                UPDATE plants p
+                SET primary_image_id = c.id,
+                    primary_thumbnail_url = COALESCE(c.thumbnail_url, c.url)
+                FROM (
+                    SELECT DISTINCT ON (plant_id) id, plant_id, url, thumbnail_url
+                    FROM plant_images
+                    ORDER BY plant_id, is_primary DESC, created_at, id
+                ) c
+                WHERE p.id = c.plant_id
+            """))
+            print(f"  已回填 {result.rowcount} 株植物")
+
+            trans.commit()
+            print("\n✅ 数据库迁移完成！")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"\n❌ 迁移失败: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,74 @@
+"""
+添加植物搜索向量迁移
+
+为 plants 表添加 search_vector 列和 GIN 索引，并为已有植物回填搜索向量
+"""
+from sqlalchemy import create_engine, text, select, update
+from app.core.config import settings
+from app.models.plant import Plant
+from app.utils.search_utils import build_search_vector
+import sys
+
+BATCH_SIZE = 500
+
+
+def migrate():
+    """执行数据库迁移"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("开始数据库迁移...")
+
+            print("为 plants 表添加 search_vector 字段...")
+            conn.execute(text("""
+                ALTER TABLE plants
+                ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+            """))
+
+            print("创建 GIN 索引...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_plants_search_vector
+                ON plants USING GIN (search_vector)
+            """))
+
+            # 分批回填（中文分词在应用层完成，无法用单条 SQL 回填）
+            print("回填搜索向量...")
+            last_id = 0
+            total = 0
+            while True:
+                rows = conn.execute(
+                    select(Plant.id, Plant.name, Plant.scientific_name, Plant.description)
+                    .where(Plant.id > last_id)
+                    .order_by(Plant.id)
+                    .limit(BATCH_SIZE)
+                ).all()
+                if not rows:
+                    break
+                for row in rows:
+                    conn.execute(
+                        update(Plant.__table__)
+                        .where(Plant.__table__.c.id == row.id)
+                        .values(
+                            search_vector=build_search_vector(row.name, row.scientific_name, row.description),
+                            # 保持 updated_at 不变
+                            updated_at=Plant.__table__.c.updated_at
+                        )
+                    )
+                last_id = rows[-1].id
+                total += len(rows)
+                print(f"  已回填 {total} 条")
+
+            trans.commit()
+            print("\n✅ 数据库迁移完成！")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"\n❌ 迁移失败: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate()
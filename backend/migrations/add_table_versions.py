@@ -0,0 +1,39 @@
+"""
+添加数据表版本号迁移
+
+创建 table_versions 表，用于读接口的 ETag 条件请求
+"""
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+import sys
+
+
+def migrate():
+    """执行数据库迁移"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("开始数据库迁移...")
+
+            print("创建 table_versions 表...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS table_versions (
+                    table_name VARCHAR(64) PRIMARY KEY,
+                    version BIGINT NOT NULL DEFAULT 0
+                )
+            """))
+
+            trans.commit()
+            print("\n✅ 数据库迁移完成！")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"\n❌ 迁移失败: {e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    migrate()
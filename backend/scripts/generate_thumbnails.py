@@ -1,6 +1,15 @@
 #!/usr/bin/env python3
 """
-为现有图片生成缩略图的脚本
+批量（重新）生成图片缩略图和响应式衍生图
+
+按 id 键集分页流式读取图片记录（不一次性载入全部），在进程池中并行缩放，
+每批提交一次数据库。进度写入检查点文件，中断后重新运行同样的命令即可从上次位置继续。
+
+用法:
+    python scripts/generate_thumbnails.py                          # 为缺少缩略图的图片生成缩略图
+    python scripts/generate_thumbnails.py --size 400 --force       # 调整尺寸后全部重新生成
+    python scripts/generate_thumbnails.py --target variants        # 为缺少衍生图的图片生成衍生图
+    python scripts/generate_thumbnails.py --target variants --widths 150,300,800,1600,2400 --force
 """
 import sys
 from pathlib import Path
@@ -8,66 +17,280 @@ from pathlib import Path
 # 添加项目路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, exists, func, insert, select, text, update
+
+from app.core.config import settings
 from app.core.database import SessionLocal
-from app.models.plant_image import PlantImage
+from app.core.image_executor import ImageExecutor
+from app.core.upload_files import versioned_url
+from app.core.versioning import mark_tables_changed
+from app.models.blob import Blob
 from app.models.plant import Plant  # 确保导入Plant模型以建立外键关系
-from app.utils.image_utils import create_thumbnail
-import urllib.request
+from app.models.plant_image import PlantImage
+from app.models.plant_image_variant import PlantImageVariant
+from app.services.blob_service import blob_dir, blob_thumbnail_path
+from app.utils.image_utils import VARIANT_WIDTHS, create_thumbnail, create_variants
 
+THUMBNAIL_DIR = Path("uploads/plants/thumbnails")
+VARIANT_DIR = Path("uploads/plants/variants")
+# 记住的已处理 blob 数上限：共享同一 blob 的图片通常 id 相近，超出后淘汰最久未用的
+DONE_BLOBS_LIMIT = 10000
 
-def generate_thumbnails_for_existing_images():
-    """为所有没有缩略图的图片生成缩略图"""
-    db = SessionLocal()
-    try:
-        # 查询所有没有缩略图的图片（匹配相对路径和完整URL）
-        images = db.query(PlantImage).filter(
-            PlantImage.thumbnail_url == None,
-            PlantImage.url.like('%uploads/plants/%')
+
+def source_path(url: str, blob_path: Optional[str]) -> Optional[Path]:
+    """原图文件路径：blob 存储的图片取 blob 路径，旧数据从 URL 中的 /uploads/ 部分推出"""
+    if blob_path:
+        return Path(blob_path)
+    index = url.find("/uploads/")
+    if index == -1:
+        return None
+    return Path(url[index + 1:].split("?")[0])
+
+
+def thumbnail_target(path: Path, sha256: Optional[str]) -> Path:
+    return blob_thumbnail_path(sha256) if sha256 else THUMBNAIL_DIR / f"thumb_{path.name}.jpg"
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class Checkpoint:
+    """检查点文件：记录已处理到的最大图片 id 和累计统计，每批提交后原子写入"""
+
+    def __init__(self, path: Path, params: dict):
+        self.path = path
+        self.params = params
+        self.state = {"params": params, "lastId": 0, "succeeded": 0, "failed": 0, "skipped": 0}
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        state = json.loads(self.path.read_text())
+        if state.get("params") != self.params:
+            raise SystemExit(f"检查点 {self.path} 的参数与本次不同，使用 --restart 重新开始")
+        self.state = state
+        return True
+
+    def save(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.state, indent=2))
+        os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class Backfill:
+    def __init__(self, args, executor: ImageExecutor):
+        self.args = args
+        self.executor = executor
+        # 在途任务数：保证进程池满载，同时不超过其排队上限
+        self.window = executor.max_workers * 2
+        self.widths = args.widths
+        # 同一 blob 被多张图片引用时只处理一次（LRU，内存占用不随图片总数增长）
+        self.done_blobs: "OrderedDict[str, object]" = OrderedDict()
+
+    def candidates(self):
+        """候选图片查询（不含 id 范围和排序）"""
+        query = (
+            select(PlantImage.id, PlantImage.url, PlantImage.blob_sha256, Blob.path)
+            .outerjoin(Blob, Blob.sha256 == PlantImage.blob_sha256)
+            .where(PlantImage.url.like("%/uploads/%"))
+        )
+        if not self.args.force:
+            if self.args.target == "thumbnails":
+                query = query.where(PlantImage.thumbnail_url.is_(None))
+            else:
+                query = query.where(~exists().where(PlantImageVariant.image_id == PlantImage.id))
+        return query
+
+    def count(self, db, last_id: int) -> int:
+        query = self.candidates().where(PlantImage.id > last_id).subquery()
+        return db.scalar(select(func.count()).select_from(query))
+
+    def fetch(self, db, last_id: int) -> list:
+        return db.execute(
+            self.candidates()
+            .where(PlantImage.id > last_id)
+            .order_by(PlantImage.id)
+            .limit(self.args.batch_size)
         ).all()
 
-        print(f"找到 {len(images)} 张需要生成缩略图的图片")
+    def submit(self, path: Path, sha256: Optional[str]):
+        if self.args.target == "thumbnails":
+            size = (self.args.size, self.args.size)
+            return self.executor.submit(
+                create_thumbnail, path, thumbnail_target(path, sha256), size, self.args.quality
+            )
+        output_dir = blob_dir(sha256) if sha256 else VARIANT_DIR
+        return self.executor.submit(create_variants, path, output_dir, self.widths)
 
-        success_count = 0
-        failed_count = 0
+    def remember_blob(self, sha256: str, result) -> None:
+        self.done_blobs[sha256] = result
+        self.done_blobs.move_to_end(sha256)
+        while len(self.done_blobs) > DONE_BLOBS_LIMIT:
+            self.done_blobs.popitem(last=False)
 
-        for image in images:
-            try:
-                # 提取文件名
-                filename = image.url.split('/')[-1]
-                original_path = Path('uploads/plants') / filename
+    def process_batch(self, rows: list) -> Dict[int, object]:
+        """
+        并行处理一批图片
 
-                if not original_path.exists():
-                    print(f"  ⚠️  文件不存在: {original_path}")
-                    failed_count += 1
+        Returns:
+            {图片 id: 处理结果}，结果为 None 表示跳过（原图不存在），False / [] 表示失败
+        """
+        results: Dict[int, object] = {}
+        futures = {}
+        queue = deque(rows)
+        while queue or futures:
+            while queue and len(futures) < self.window:
+                image_id, url, sha256, blob_path = queue.popleft()
+                if sha256 and sha256 in self.done_blobs:
+                    self.done_blobs.move_to_end(sha256)
+                    results[image_id] = self.done_blobs[sha256]
+                    continue
+                path = source_path(url, blob_path)
+                if path is None or not path.exists():
+                    print(f"  ⚠️  文件不存在: 图片 {image_id} {url}")
+                    results[image_id] = None
                     continue
+                futures[self.submit(path, sha256)] = (image_id, path, sha256)
+            if not futures:
+                continue
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                image_id, path, sha256 = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"  ❌ 处理失败 {image_id}: {e}")
+                    result = False
+                if self.args.target == "thumbnails" and result:
+                    result = versioned_url(thumbnail_target(path, sha256))
+                if sha256 and result:
+                    self.remember_blob(sha256, result)
+                results[image_id] = result
+        return results
+
+    def save_batch(self, db, results: Dict[int, object]) -> None:
+        """写入一批结果并提交"""
+        succeeded = {image_id: result for image_id, result in results.items() if result}
+        if not succeeded:
+            return
+        if self.args.target == "thumbnails":
+            db.execute(
+                update(PlantImage),
+                [{"id": image_id, "thumbnail_url": url} for image_id, url in succeeded.items()]
+            )
+        else:
+            db.execute(delete(PlantImageVariant).where(PlantImageVariant.image_id.in_(succeeded)))
+            db.execute(insert(PlantImageVariant), [
+                {
+                    "image_id": image_id,
+                    "format": variant["format"],
+                    "width": variant["width"],
+                    "height": variant["height"],
+                    "url": versioned_url(Path(variant["path"])),
+                    "file_size": variant["fileSize"]
+                }
+                for image_id, variants in succeeded.items()
+                for variant in variants
+            ])
+        # 封面是这些图片的植物同步更新封面缩略图
+        db.execute(text("""
+            UPDATE plants SET primary_thumbnail_url = COALESCE(pi.thumbnail_url, pi.url)
+            FROM plant_images pi
+            WHERE plants.primary_image_id = pi.id AND pi.id = ANY(:ids)
+        """), {"ids": list(succeeded)})
+        mark_tables_changed(db, ["plants"])
+        db.commit()
+
+    def run(self, checkpoint: Checkpoint) -> None:
+        state = checkpoint.state
+        db = SessionLocal()
+        try:
+            total = self.count(db, state["lastId"])
+            print(f"找到 {total} 张需要处理的图片（从 id > {state['lastId']} 开始）")
+            done = 0
+            started = time.monotonic()
+            while True:
+                rows = self.fetch(db, state["lastId"])
+                if not rows:
+                    break
+                results = self.process_batch(rows)
+                self.save_batch(db, results)
 
-                # 生成缩略图文件名
-                thumbnail_filename = f"thumb_{filename}.jpg"
-                thumbnail_path = Path('uploads/plants/thumbnails') / thumbnail_filename
-
-                # 生成缩略图
-                if create_thumbnail(original_path, thumbnail_path, size=(300, 300), quality=85):
-                    # 更新数据库
-                    base_url = "http://82.156.213.38:12801"
-                    image.thumbnail_url = f"{base_url}/uploads/plants/thumbnails/{thumbnail_filename}"
-                    db.commit()
-                    success_count += 1
-                    print(f"  ✅ 生成缩略图: {thumbnail_filename}")
-                else:
-                    failed_count += 1
-                    print(f"  ❌ 生成失败: {filename}")
-
-            except Exception as e:
-                failed_count += 1
-                print(f"  ❌ 处理失败 {image.id}: {e}")
-
-        print(f"\n✅ 成功: {success_count}")
-        print(f"❌ 失败: {failed_count}")
-        print(f"📊 总计: {len(images)}")
+                state["lastId"] = rows[-1][0]
+                state["succeeded"] += sum(1 for result in results.values() if result)
+                state["skipped"] += sum(1 for result in results.values() if result is None)
+                state["failed"] += sum(1 for result in results.values() if result is not None and not result)
+                checkpoint.save()
 
+                done += len(rows)
+                elapsed = time.monotonic() - started
+                rate = done / elapsed if elapsed else 0
+                eta = format_duration((total - done) / rate) if rate and total > done else "0:00"
+                print(f"  [{done}/{total}] {rate:.1f} 张/秒，预计剩余 {eta}")
+        finally:
+            db.close()
+
+        print(f"\n✅ 成功: {state['succeeded']}")
+        print(f"⚠️  跳过: {state['skipped']}")
+        print(f"❌ 失败: {state['failed']}")
+
+
+def parse_widths(value: str) -> List[int]:
+    return sorted({int(width) for width in value.split(",") if width.strip()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量（重新）生成图片缩略图和衍生图")
+    parser.add_argument("--target", choices=["thumbnails", "variants"], default="thumbnails",
+                        help="生成缩略图或响应式衍生图（默认缩略图）")
+    parser.add_argument("--size", type=int, default=300, help="缩略图最大边长（默认 300）")
+    parser.add_argument("--quality", type=int, default=85, help="缩略图 JPEG 质量（默认 85）")
+    parser.add_argument("--widths", type=parse_widths, default=list(VARIANT_WIDTHS),
+                        help="衍生图宽度档位，逗号分隔（默认 150,300,800,1600）")
+    parser.add_argument("--force", action="store_true", help="已有缩略图/衍生图的图片也重新生成")
+    parser.add_argument("--batch-size", type=int, default=500, help="每批处理并提交的图片数（默认 500）")
+    parser.add_argument("--workers", type=int, default=settings.IMAGE_WORKERS,
+                        help="进程数（默认 IMAGE_WORKERS，0 表示 CPU 核数）")
+    parser.add_argument("--checkpoint", type=Path, default=None,
+                        help="检查点文件（默认 .generate_thumbnails.<target>.json）")
+    parser.add_argument("--restart", action="store_true", help="忽略已有检查点，从头开始")
+    args = parser.parse_args()
+
+    params = {"target": args.target, "force": args.force}
+    if args.target == "thumbnails":
+        params.update(size=args.size, quality=args.quality)
+    else:
+        params.update(widths=args.widths)
+    checkpoint = Checkpoint(args.checkpoint or Path(f".generate_thumbnails.{args.target}.json"), params)
+    if args.restart:
+        checkpoint.remove()
+    elif checkpoint.load():
+        print(f"从检查点继续: {checkpoint.path}")
+
+    executor = ImageExecutor(args.workers, max_pending=(args.workers or os.cpu_count() or 1) * 4)
+    try:
+        Backfill(args, executor).run(checkpoint)
+    except KeyboardInterrupt:
+        print(f"\n已中断，进度保存在 {checkpoint.path}，重新运行同样的命令即可继续")
+        sys.exit(130)
     finally:
-        db.close()
+        executor.shutdown()
+    checkpoint.remove()
 
 
 if __name__ == "__main__":
-    generate_thumbnails_for_existing_images()
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+批量导入数据的脚本
+
+用法：
+    python scripts/import_data.py export.ndjson
+    python scripts/import_data.py plants.csv --format csv --type plant
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.import_service import ENTITY_BY_TYPE, ImportService, iter_csv_records, iter_ndjson_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从 CSV/NDJSON 批量导入数据")
+    parser.add_argument("path", help="数据文件路径（UTF-8）")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="文件格式，默认按扩展名判断")
+    parser.add_argument("--type", choices=list(ENTITY_BY_TYPE), help="CSV 文件的记录类型")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    file_format = args.format or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+    if file_format == "csv" and not args.type:
+        parser.error("CSV 导入需要指定 --type")
+
+    db = SessionLocal()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            if file_format == "csv":
+                records = iter_csv_records(f, args.type)
+            else:
+                records = iter_ndjson_records(f)
+            result = ImportService(db).import_records(records)
+    except Exception as e:
+        print(f"❌ 导入失败: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    for record_type, count in result["imported"].items():
+        print(f"✅ {record_type}: {count} 条")
+    if result["errorCount"]:
+        print(f"❌ {result['errorCount']} 条记录未导入：")
+        for error in result["errors"]:
+            print(f"   第 {error['line']} 行 [{error['type']}] {error['message']}")
+
+
+if __name__ == "__main__":
+    main()
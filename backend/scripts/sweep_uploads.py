@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+清理上传目录中未被数据库引用的文件（标记-清除）
+
+用法:
+    python scripts/sweep_uploads.py --dry-run                     # 只统计，不删除
+    python scripts/sweep_uploads.py --dry-run --list orphans.tsv  # 输出孤儿文件清单
+    python scripts/sweep_uploads.py --grace-hours 72 --report sweep.json
+"""
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import json
+import time
+
+from app.core.database import SessionLocal
+from app.services.upload_sweeper import DEFAULT_GRACE_PERIOD, UploadSweeper
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="清理上传目录中未被引用的文件")
+    parser.add_argument("--grace-hours", type=float, default=DEFAULT_GRACE_PERIOD / 3600,
+                        help="宽限期（小时），最近修改过的文件不删除（默认 24）")
+    parser.add_argument("--batch-size", type=int, default=500, help="每批删除的文件数（默认 500）")
+    parser.add_argument("--pause", type=float, default=0.0, help="每批之间暂停的秒数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不删除")
+    parser.add_argument("--report", type=Path, help="将统计报告写入 JSON 文件")
+    parser.add_argument("--list", type=Path, help="将孤儿文件清单（路径\\t字节数）写入文件")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    orphan_log = open(args.list, "w") if args.list else None
+    try:
+        sweeper = UploadSweeper(db)
+        started = time.monotonic()
+        print("标记被引用的文件...")
+        print(f"  {sweeper.mark()} 个引用")
+
+        print("扫描上传目录..." + ("（试运行，不删除）" if args.dry_run else ""))
+        report = sweeper.sweep(
+            grace_period=int(args.grace_hours * 3600),
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            pause=args.pause,
+            orphan_log=orphan_log
+        )
+        report["elapsedSeconds"] = round(time.monotonic() - started, 2)
+    finally:
+        if orphan_log:
+            orphan_log.close()
+        db.close()
+
+    for name, directory in sorted(report["directories"].items()):
+        print(f"  {name}: {directory['files']} 个文件 {format_bytes(directory['bytes'])}，"
+              f"孤儿 {directory['orphaned']} 个 {format_bytes(directory['orphanedBytes'])}")
+    print(f"\n📊 扫描: {report['scanned']} 个文件 {format_bytes(report['scannedBytes'])}")
+    print(f"⏳ 宽限期内保留: {report['withinGracePeriod']}")
+    print(f"🗑️  孤儿文件: {report['orphaned']} 个 {format_bytes(report['orphanedBytes'])}")
+    if not args.dry_run:
+        print(f"✅ 已删除: {report['deleted']} 个 {format_bytes(report['deletedBytes'])}")
+        if report["errors"]:
+            print(f"❌ 删除失败: {report['errors']}")
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"报告已写入 {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+单元测试公共配置
+
+tests/test_api.py 等脚本需要运行中的服务，这里的单元测试只测纯逻辑，
+不连接数据库：只为 Settings 提供必填项，引擎创建时不会建立连接。
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/plant_test")
+
+# 接口测试脚本按 `python tests/test_xxx.py` 运行，不由 pytest 收集
+collect_ignore = ["test_api.py", "test_identification_full.py"]
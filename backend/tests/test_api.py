@@ -231,6 +231,32 @@ class APITester:
         if success:
             self.test_data["plant_id_2"] = data["data"]["id"]
 
+        # 7. 批量创建植物（含一条无效数据）
+        success, data = self.request("POST", "/plants/bulk", [
+            {"room_id": room_id, "name": "批量植物1"},
+            {"room_id": room_id, "name": "批量植物2"},
+            {"room_id": room_id}
+        ])
+        result = data.get("data", {})
+        self.test(
+            "批量创建植物",
+            success and len(result.get("created", [])) == 2
+            and [e["index"] for e in result.get("errors", [])] == [2],
+            f"响应: {data}"
+        )
+
+        # 8. 批量归档植物
+        bulk_ids = [plant["id"] for plant in result.get("created", [])]
+        success, data = self.request("PATCH", "/plants/bulk", [
+            {"id": plant_id, "is_active": False} for plant_id in bulk_ids
+        ])
+        self.test(
+            "批量归档植物",
+            success and all(not p["isActive"] for p in data.get("data", {}).get("updated", []))
+            and len(data.get("data", {}).get("updated", [])) == len(bulk_ids),
+            f"响应: {data}"
+        )
+
     def test_images(self):
         """测试图片管理模块"""
         self.log("\n=== 测试图片管理模块 ===", "INFO")
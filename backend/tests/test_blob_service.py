@@ -0,0 +1,135 @@
+"""
+内容寻址文件引用计数单元测试（用内存中的会话代替数据库）
+"""
+import hashlib
+
+import pytest
+
+from app.services import blob_service as blob_service_module
+from app.services.blob_service import BlobService, blob_dir, blob_thumbnail_path
+from app.utils.upload_utils import StoredUpload
+
+
+class _Query:
+    def __init__(self, session):
+        self.session = session
+        self.sha256 = None
+
+    def filter(self, condition):
+        # 只支持 Blob.sha256 == 值
+        self.sha256 = condition.right.value
+        return self
+
+    def first(self):
+        return self.session.blobs.get(self.sha256)
+
+
+class _FakeSession:
+    def __init__(self):
+        self.blobs = {}
+        self.locks = []
+        self.commits = 0
+
+    def execute(self, statement, params=None):
+        self.locks.append(params["key"])
+
+    def query(self, *entities):
+        return _Query(self)
+
+    def add(self, blob):
+        self.blobs[blob.sha256] = blob
+
+    def delete(self, blob):
+        del self.blobs[blob.sha256]
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def blob_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_service_module, "BLOB_ROOT", tmp_path / "blobs")
+    return tmp_path / "blobs"
+
+
+def _upload(tmp_path, content: bytes, name: str) -> StoredUpload:
+    path = tmp_path / name
+    path.write_bytes(content)
+    return StoredUpload(
+        path, len(content), hashlib.md5(content).hexdigest(), hashlib.sha256(content).hexdigest(), "jpg"
+    )
+
+
+def test_same_content_is_stored_once(tmp_path):
+    db = _FakeSession()
+    service = BlobService(db)
+    first, second = _upload(tmp_path, b"image", "a.jpg"), _upload(tmp_path, b"image", "b.jpg")
+
+    blob, created = service.store(first)
+    assert created
+    again, created = service.store(second)
+    assert not created
+    assert again is blob
+    assert blob.ref_count == 2
+
+    assert not first.path.exists() and not second.path.exists()
+    assert (blob_dir(blob.sha256) / f"{blob.sha256}.jpg").read_bytes() == b"image"
+    assert db.locks == [f"blob:{blob.sha256}"] * 2
+
+
+def test_release_last_reference_then_purge(tmp_path):
+    db = _FakeSession()
+    service = BlobService(db)
+    blob, _ = service.store(_upload(tmp_path, b"image", "a.jpg"))
+    service.store(_upload(tmp_path, b"image", "b.jpg"))
+    sha256 = blob.sha256
+    original = blob_dir(sha256) / f"{sha256}.jpg"
+    thumbnail = blob_thumbnail_path(sha256)
+    thumbnail.write_bytes(b"thumb")
+
+    assert service.release(sha256) is False
+    assert blob.ref_count == 1
+
+    assert service.release(sha256) is True
+    assert sha256 not in db.blobs
+    # 记录已删除，但文件要等事务提交后 purge 才删除
+    assert original.exists()
+
+    assert service.purge(sha256) is True
+    assert not original.exists()
+    assert not thumbnail.exists()
+
+
+def test_purge_keeps_files_of_recreated_blob(tmp_path):
+    db = _FakeSession()
+    service = BlobService(db)
+    blob, _ = service.store(_upload(tmp_path, b"image", "a.jpg"))
+    sha256 = blob.sha256
+    assert service.release(sha256) is True
+
+    # 提交后、purge 前同一内容被重新上传
+    service.store(_upload(tmp_path, b"image", "b.jpg"))
+
+    assert service.purge(sha256) is False
+    assert (blob_dir(sha256) / f"{sha256}.jpg").exists()
+
+
+def test_discard_undoes_store(tmp_path):
+    db = _FakeSession()
+    service = BlobService(db)
+    blob, _ = service.store(_upload(tmp_path, b"image", "a.jpg"))
+
+    service.discard(blob.sha256)
+
+    assert blob.sha256 not in db.blobs
+    assert not (blob_dir(blob.sha256) / f"{blob.sha256}.jpg").exists()
+
+
+def test_release_unknown_blob():
+    assert BlobService(_FakeSession()).release("0" * 64) is False
@@ -0,0 +1,124 @@
+"""
+ETag 条件请求和表版本号单元测试
+"""
+import pytest
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.dialects import postgresql
+
+from app.core import etag as etag_module
+from app.core import versioning
+from app.core.etag import conditional_get
+
+
+def _request(path: str = "/api/v1/rooms", query: str = "", if_none_match: str = None) -> Request:
+    headers = [(b"host", b"testserver")]
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "root_path": "",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": headers,
+    })
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """模拟数据库中的 table_versions"""
+    versions = {"rooms": 3, "plants": 5}
+    monkeypatch.setattr(
+        etag_module,
+        "current_table_versions",
+        lambda db, tables: {table: versions.get(table, 0) for table in tables}
+    )
+    return versions
+
+
+def _etag(dependency, **kwargs) -> str:
+    response = Response()
+    dependency(_request(**kwargs), response, db=None)
+    assert response.headers["Cache-Control"] == "no-cache"
+    return response.headers["ETag"]
+
+
+def test_matching_etag_returns_304(versions):
+    dependency = conditional_get("rooms", "plants").dependency
+    etag = _etag(dependency)
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        with pytest.raises(HTTPException) as exc_info:
+            dependency(_request(if_none_match=header), Response(), db=None)
+        assert exc_info.value.status_code == 304
+        assert exc_info.value.headers["ETag"] == etag
+
+
+def test_etag_changes_with_version_and_query(versions):
+    dependency = conditional_get("rooms", "plants").dependency
+    etag = _etag(dependency)
+
+    assert _etag(dependency) == etag
+    assert _etag(dependency, query="limit=5") != etag
+
+    versions["plants"] += 1
+    bumped = _etag(dependency)
+    assert bumped != etag
+    # 旧 ETag 不再命中，返回完整响应
+    assert _etag(dependency, if_none_match=etag) == bumped
+
+
+class _FakeSession:
+    """只记录语句的会话，用于检查提交前的版本号更新"""
+
+    def __init__(self):
+        self.info = {}
+        self.statements = []
+
+    def flush(self):
+        pass
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+
+def test_commit_bumps_changed_tables(monkeypatch):
+    committed = []
+    monkeypatch.setattr(versioning, "_commit_listeners", [committed.append])
+    session = _FakeSession()
+
+    versioning.mark_tables_changed(session, ["plants", "rooms", "jobs"])
+    versioning._before_commit(session)
+    versioning._after_commit(session)
+
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (table_name) DO UPDATE SET version = " in sql
+    assert "table_versions.version +" in sql
+    # 任务队列不参与版本号跟踪
+    assert committed == [{"plants", "rooms"}]
+
+
+def test_rollback_discards_changes(monkeypatch):
+    committed = []
+    monkeypatch.setattr(versioning, "_commit_listeners", [committed.append])
+    session = _FakeSession()
+
+    versioning.mark_tables_changed(session, ["rooms"])
+    versioning._discard_changes(session)
+    versioning._before_commit(session)
+    versioning._after_commit(session)
+
+    assert session.statements == []
+    assert committed == []
+
+
+def test_delete_cascades_to_child_tables():
+    session = _FakeSession()
+    versioning._mark_changed(session, "rooms", deleted=True)
+    assert session.info[versioning._INFO_KEY] == {
+        "rooms", "plant_shelves", "plants", "plant_images", "plant_configs",
+        "plant_identifications", "plant_image_variants"
+    }
@@ -0,0 +1,106 @@
+"""
+识别结果两级缓存单元测试：进程内 LRU 和数据库 upsert
+"""
+import re
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.core.identification_cache import IdentificationCache
+from app.models.plant_identification import PlantIdentification
+from app.services.identification_service import IdentificationService
+
+RESULT = {"requestId": "r1", "predictions": [{"name": "绿萝", "score": 0.9}], "identificationId": 1}
+
+
+def test_memory_cache_returns_copies():
+    cache = IdentificationCache(max_entries=10, ttl=3600)
+    cache.set("md5", RESULT, datetime.now())
+
+    hit = cache.get("md5")
+    hit["predictions"].append({"name": "篡改"})
+
+    assert cache.get("md5") == RESULT
+    assert cache.stats()["memoryHits"] == 2
+
+
+def test_memory_entry_expires_with_database_record():
+    cache = IdentificationCache(max_entries=10, ttl=3600)
+
+    # 数据库记录已经存在 59 分钟，进程内条目只剩 1 分钟
+    cache.set("fresh", RESULT, datetime.now() - timedelta(minutes=59))
+    cache.set("stale", RESULT, datetime.now() - timedelta(hours=2))
+
+    assert cache.get("fresh") == RESULT
+    assert 0 < cache._entries["fresh"][1] - time.time() <= 61
+    assert cache.get("stale") is None
+    assert "stale" not in cache._entries
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = IdentificationCache(max_entries=2, ttl=3600)
+    now = datetime.now()
+    cache.set("a", RESULT, now)
+    cache.set("b", RESULT, now)
+    cache.get("a")
+    cache.set("c", RESULT, now)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate():
+    cache = IdentificationCache(max_entries=10, ttl=3600)
+    cache.set("md5", RESULT, datetime.now())
+    cache.invalidate("md5")
+    cache.invalidate(None)
+    assert cache.get("md5") is None
+
+
+class _Row(tuple):
+    def one(self):
+        return self
+
+
+class _FakeSession:
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement.compile(dialect=postgresql.dialect()))
+        return _Row(self.row)
+
+
+def test_upsert_refreshes_result_on_existing_hash():
+    identified_at = datetime.now()
+    db = _FakeSession((42, identified_at, False))
+    api_result = {"request_id": "r2", "predictions": [{"name": "绿萝"}], "processing_time": 0.3}
+
+    row = IdentificationService(db)._upsert_identification("md5", "/uploads/a.jpg", "f" * 64, 7, api_result)
+
+    assert row == (42, identified_at, False)
+    compiled = db.statements[0]
+    sql = " ".join(str(compiled).split())
+    assert "ON CONFLICT (image_hash) DO UPDATE SET" in sql
+    assert "RETURNING plant_identifications.id, plant_identifications.identified_at, xmax = 0" in sql
+    # 刷新识别结果和时间，不改写原记录的用户和图片
+    updated = set(re.findall(r"(\w+) = ", sql.split("DO UPDATE SET", 1)[1].split("RETURNING")[0]))
+    assert updated == {"request_id", "predictions", "processing_time", "cached", "identified_at", "updated_at"}
+    assert compiled.params["image_hash"] == "md5"
+    assert compiled.params["user_id"] == 7
+
+
+def test_is_fresh(monkeypatch):
+    monkeypatch.setattr(settings, "IDENTIFICATION_CACHE_TTL", 3600)
+    now = datetime.now()
+
+    assert IdentificationService._is_fresh(PlantIdentification(identified_at=now - timedelta(minutes=30)))
+    assert not IdentificationService._is_fresh(PlantIdentification(identified_at=now - timedelta(hours=2)))
+    # 旧记录没有 identified_at 时按创建时间
+    assert IdentificationService._is_fresh(
+        PlantIdentification(identified_at=None, created_at=now - timedelta(minutes=5))
+    )
@@ -0,0 +1,36 @@
+"""
+图片处理进程池单元测试
+"""
+import asyncio
+
+import pytest
+
+from app.core.image_executor import ImageExecutor, ImageQueueFull
+
+
+def test_rejects_when_queue_is_full():
+    executor = ImageExecutor(1, max_pending=0)
+
+    with pytest.raises(ImageQueueFull):
+        executor.submit(pow, 2, 10)
+
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["submitted"] == 0
+    assert stats["pending"] == 0
+
+
+def test_runs_in_worker_process():
+    executor = ImageExecutor(1, max_pending=2)
+    try:
+        assert executor.call(pow, 2, 10) == 1024
+        assert asyncio.run(executor.run(pow, 3, 3)) == 27
+        with pytest.raises(ZeroDivisionError):
+            executor.call(divmod, 1, 0)
+    finally:
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert stats["completed"] == 2
+    assert stats["failed"] == 1
+    assert stats["pending"] == 0
@@ -0,0 +1,108 @@
+"""
+批量导入单元测试（记录解析、校验和跳过，不连接数据库）
+"""
+import csv
+import io
+import json
+
+from app.services.import_service import ImportService, iter_csv_records, iter_ndjson_records
+
+
+class _FakeCursor:
+    """记录执行的 SQL 和 COPY 的数据"""
+
+    rowcount = 0
+
+    def __init__(self):
+        self.statements = []
+        self.copied = {}
+
+    def execute(self, sql, params=None):
+        self.statements.append(" ".join(sql.split()))
+
+    def fetchall(self):
+        return []
+
+    def copy_expert(self, sql, buffer):
+        table = sql.split()[1]
+        self.copied[table] = list(csv.reader(io.StringIO(buffer.read())))
+
+    def close(self):
+        pass
+
+
+class _FakeSession:
+    def __init__(self):
+        self.cursor = _FakeCursor()
+        self.info = {}
+        self.committed = False
+
+    def connection(self):
+        session = self
+
+        class _Connection:
+            class connection:
+                @staticmethod
+                def cursor():
+                    return session.cursor
+
+        return _Connection()
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+def _ndjson(*records) -> list:
+    return [json.dumps(record, ensure_ascii=False) for record in records]
+
+
+def test_export_only_records_are_skipped():
+    db = _FakeSession()
+    lines = _ndjson(
+        {"type": "room", "data": {"id": 1, "name": "客厅"}},
+        {"type": "image", "data": {"id": 9, "plantId": 1, "url": "/uploads/plants/a.jpg"}},
+        {"type": "identification", "data": {"id": 3}},
+        {"type": "identification", "data": {"id": 4}},
+    )
+
+    result = ImportService(db).import_records(iter_ndjson_records(lines))
+
+    assert result["skipped"] == {"image": 1, "identification": 2}
+    assert result["errors"] == []
+    assert db.committed
+    assert [row[:3] for row in db.cursor.copied["import_rooms"]] == [["1", "1", "客厅"]]
+
+
+def test_invalid_records_are_reported_by_line():
+    db = _FakeSession()
+    lines = _ndjson(
+        {"type": "room", "data": {"id": 1}},
+        {"type": "bogus", "data": {}},
+        {"type": "plant", "data": {"roomId": "abc", "name": "绿萝"}},
+    ) + ["{not json"]
+
+    result = ImportService(db).import_records(iter_ndjson_records(lines))
+
+    assert [(error["line"], error["type"]) for error in result["errors"]] == [
+        (1, "room"), (2, "bogus"), (3, "plant"), (4, None)
+    ]
+    assert result["errorCount"] == 4
+    assert db.cursor.copied == {}
+
+
+def test_plants_without_shelf_order_get_running_order():
+    db = _FakeSession()
+    rows = ["room_id,name", "1,绿萝", "1,龟背竹"]
+
+    ImportService(db).import_records(iter_csv_records(rows, "plant"))
+
+    # shelf_order 为空，由 upsert 按花架接在现有植物之后编号
+    shelf_order_index = 4
+    assert [row[shelf_order_index] for row in db.cursor.copied["import_plants"]] == ["", ""]
+    assert any(
+        "row_number() OVER (PARTITION BY t.shelf_id ORDER BY t.line)" in sql
+        for sql in db.cursor.statements
+    )
@@ -0,0 +1,101 @@
+"""
+任务队列租约单元测试：完成、失败和续期只在任务仍由本 worker 持有时生效
+"""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.models.job import Job
+from app.services.job_service import JobService
+
+
+class _Result:
+    def __init__(self, rowcount: int):
+        self.rowcount = rowcount
+
+
+class _FakeSession:
+    """记录 UPDATE 语句，rowcount 模拟 WHERE 条件是否命中"""
+
+    def __init__(self, rowcount: int = 1):
+        self.rowcount = rowcount
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, statement, params=None, execution_options=None):
+        self.statements.append(statement.compile(dialect=postgresql.dialect()))
+        return _Result(self.rowcount)
+
+    def commit(self):
+        self.commits += 1
+
+
+def _job(attempts: int = 1, max_attempts: int = 3) -> Job:
+    return Job(id=7, type="process_image", payload={}, attempts=attempts, max_attempts=max_attempts)
+
+
+def _assert_fenced(compiled, worker_id: str) -> None:
+    sql = str(compiled)
+    assert "WHERE jobs.id = %(id_1)s AND jobs.status = %(status_1)s AND jobs.locked_by = %(locked_by_1)s" in sql
+    assert compiled.params["id_1"] == 7
+    assert compiled.params["status_1"] == "running"
+    assert compiled.params["locked_by_1"] == worker_id
+
+
+def test_complete_is_fenced_by_owner():
+    db = _FakeSession()
+
+    assert JobService(db).complete(_job(), "worker-a", {"ok": True}) is True
+
+    compiled = db.statements[0]
+    _assert_fenced(compiled, "worker-a")
+    assert compiled.params["status"] == "succeeded"
+    assert compiled.params["locked_by"] is None
+    assert db.commits == 1
+
+
+def test_result_of_taken_over_job_is_discarded():
+    # 租约过期后已被其他 worker 重新领取，UPDATE 不命中
+    db = _FakeSession(rowcount=0)
+    service = JobService(db)
+
+    assert service.complete(_job(), "worker-a") is False
+    assert service.fail(_job(), "worker-a", "boom") is False
+    assert service.heartbeat(7, "worker-a") is False
+    assert db.commits == 3
+
+
+@pytest.mark.parametrize("attempts, delay", [(1, 1), (2, 2), (3, 4)])
+def test_retry_backs_off_exponentially(monkeypatch, attempts, delay):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_DELAY", 1)
+    db = _FakeSession()
+
+    assert JobService(db).fail(_job(attempts=attempts, max_attempts=5), "worker-a", "boom") is True
+
+    compiled = db.statements[0]
+    _assert_fenced(compiled, "worker-a")
+    assert compiled.params["status"] == "queued"
+    assert compiled.params["last_error"] == "boom"
+    assert timedelta(seconds=delay) in compiled.params.values()
+
+
+def test_fail_without_retry_or_attempts_left():
+    db = _FakeSession()
+    service = JobService(db)
+
+    service.fail(_job(attempts=3, max_attempts=3), "worker-a", "boom")
+    service.fail(_job(attempts=1), "worker-a", "bad input", retry=False)
+
+    assert [compiled.params["status"] for compiled in db.statements] == ["failed", "failed"]
+
+
+def test_heartbeat_extends_lease():
+    db = _FakeSession()
+
+    assert JobService(db).heartbeat(7, "worker-a", visibility_timeout=90) is True
+
+    compiled = db.statements[0]
+    _assert_fenced(compiled, "worker-a")
+    assert timedelta(seconds=90) in compiled.params.values()
@@ -0,0 +1,76 @@
+"""
+游标分页工具单元测试
+"""
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, select
+from sqlalchemy.dialects import postgresql
+
+from app.utils.pagination import apply_cursor, decode_cursor, encode_cursor, split_page
+
+_items = Table(
+    "items", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("created_at", DateTime(timezone=True)),
+)
+
+
+def test_datetime_round_trip():
+    values = [datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=timezone.utc), 42]
+    cursor = encode_cursor(values)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+@pytest.mark.parametrize("cursor", [
+    "不是游标",
+    "!!!!",
+    base64.urlsafe_b64encode(b"{not json").decode(),
+    base64.urlsafe_b64encode(json.dumps({"id": 1}).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([{"$dt": "yesterday"}]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([{"$dec": "abc"}]).encode()).decode(),
+])
+def test_tampered_cursor_raises_value_error(cursor):
+    # 路由把 ValueError 转为 400
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_apply_cursor_rejects_wrong_length():
+    query = select(_items)
+    with pytest.raises(ValueError):
+        apply_cursor(query, [_items.c.created_at, _items.c.id], encode_cursor([1]))
+
+
+def test_apply_cursor_compares_row_tuple():
+    query = select(_items)
+    cursor = encode_cursor([datetime(2024, 5, 1, tzinfo=timezone.utc), 7])
+
+    descending = str(apply_cursor(query, [_items.c.created_at, _items.c.id], cursor)
+                     .compile(dialect=postgresql.dialect()))
+    ascending = str(apply_cursor(query, [_items.c.created_at, _items.c.id], cursor, descending=False)
+                    .compile(dialect=postgresql.dialect()))
+
+    assert "(items.created_at, items.id) <" in descending
+    assert "(items.created_at, items.id) >" in ascending
+
+
+def test_apply_cursor_without_cursor_is_noop():
+    query = select(_items)
+    assert apply_cursor(query, [_items.c.id], None) is query
+
+
+def test_split_page():
+    rows = [{"id": i} for i in range(5, 0, -1)]
+
+    page, next_cursor = split_page(rows, 4, key=lambda row: [row["id"]])
+    assert [row["id"] for row in page] == [5, 4, 3, 2]
+    assert decode_cursor(next_cursor) == [2]
+
+    page, next_cursor = split_page(rows[:4], 4, key=lambda row: [row["id"]])
+    assert len(page) == 4
+    assert next_cursor is None
@@ -0,0 +1,100 @@
+"""
+令牌桶限流器单元测试
+"""
+import asyncio
+
+import pytest
+
+from app.core.rate_limiter import RateLimitExceeded, TokenBucketLimiter
+
+
+def test_burst_is_granted_without_queueing():
+    async def scenario():
+        limiter = TokenBucketLimiter(rate=1, burst=3, max_queue=10)
+        return [await limiter.acquire("a") for _ in range(3)], limiter.stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert [result["position"] for result in results] == [0, 0, 0]
+    assert stats["granted"] == 3
+    assert stats["queued"] == 0
+
+
+def test_queue_is_served_round_robin_by_client():
+    async def scenario():
+        limiter = TokenBucketLimiter(rate=200, burst=1, max_queue=10)
+        await limiter.acquire("a")
+        order = []
+
+        async def request(client_id, label):
+            await limiter.acquire(client_id)
+            order.append(label)
+
+        # 客户端 a 先排了 3 个请求，b 和 c 随后各 1 个，不应排在 a 的全部请求之后
+        tasks = [asyncio.ensure_future(request("a", f"a{i}")) for i in range(3)]
+        tasks += [asyncio.ensure_future(request("b", "b0")), asyncio.ensure_future(request("c", "c0"))]
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["a0", "b0", "c0", "a1", "a2"]
+
+
+def test_position_accounts_for_fair_scheduling():
+    async def scenario():
+        limiter = TokenBucketLimiter(rate=0.001, burst=1, max_queue=10)
+        await limiter.acquire("a")
+        waiters = [asyncio.ensure_future(limiter.acquire(client)) for client in ("a", "a", "a")]
+        await asyncio.sleep(0)
+        positions = (limiter._position("a"), limiter._position("b"))
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        return positions
+
+    # a 再排一个是第 4 位；b 的第一个请求只需等 a 的下一个请求
+    assert asyncio.run(scenario()) == (4, 2)
+
+
+def test_rejects_when_queue_is_full():
+    async def scenario():
+        limiter = TokenBucketLimiter(rate=0.5, burst=1, max_queue=2)
+        await limiter.acquire("a")
+        waiters = [asyncio.ensure_future(limiter.acquire("a")) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(RateLimitExceeded) as exc_info:
+                await limiter.acquire("b")
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+        return exc_info.value, limiter.stats()
+
+    error, stats = asyncio.run(scenario())
+
+    # 前面还有 2 个排队请求，每 2 秒一个令牌
+    assert 5 <= error.retry_after <= 6
+    assert error.retry_after_header == "6"
+    assert stats["rejected"] == 1
+
+
+def test_retry_after_header_is_at_least_one_second():
+    assert RateLimitExceeded(0.2).retry_after_header == "1"
+    assert RateLimitExceeded(1.5).retry_after_header == "2"
+
+
+def test_cancelled_waiter_is_skipped():
+    async def scenario():
+        limiter = TokenBucketLimiter(rate=100, burst=1, max_queue=10)
+        await limiter.acquire("a")
+        cancelled = asyncio.ensure_future(limiter.acquire("a"))
+        served = asyncio.ensure_future(limiter.acquire("b"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        result = await asyncio.wait_for(served, timeout=1)
+        return result, limiter.stats()
+
+    result, stats = asyncio.run(scenario())
+
+    assert result["position"] == 2
+    assert stats["queueLength"] == 0
@@ -0,0 +1,70 @@
+"""
+响应缓存单元测试
+"""
+import asyncio
+
+from sqlalchemy.orm import Session
+
+from app.core import response_cache as response_cache_module
+from app.core.response_cache import ResponseCache, cached_response
+
+
+def _setup(monkeypatch):
+    """替换全局缓存和版本号查询，versions 模拟数据库中的 table_versions"""
+    versions = {"rooms": 1}
+    monkeypatch.setattr(response_cache_module, "response_cache", ResponseCache(1 << 20, 60))
+    monkeypatch.setattr(
+        response_cache_module,
+        "current_table_versions",
+        lambda db, tables: {table: versions.get(table, 0) for table in tables}
+    )
+    calls = []
+
+    @cached_response("rooms")
+    async def get_rooms(limit: int = 10, db: Session = None):
+        calls.append(limit)
+        return {"items": len(calls)}
+
+    return versions, calls, get_rooms
+
+
+def test_hit_until_table_version_changes(monkeypatch):
+    versions, calls, get_rooms = _setup(monkeypatch)
+    db = Session()
+
+    first = asyncio.run(get_rooms(limit=10, db=db))
+    assert asyncio.run(get_rooms(limit=10, db=db)) == first
+    assert len(calls) == 1
+
+    # 其他进程写入：本进程没有收到提交回调，只有数据库中的版本号变化
+    versions["rooms"] = 2
+    second = asyncio.run(get_rooms(limit=10, db=db))
+    assert len(calls) == 2
+    assert second != first
+
+
+def test_local_commit_invalidates_by_tag(monkeypatch):
+    versions, calls, get_rooms = _setup(monkeypatch)
+    db = Session()
+
+    asyncio.run(get_rooms(limit=10, db=db))
+    response_cache_module.response_cache.invalidate_tags({"rooms"})
+    asyncio.run(get_rooms(limit=10, db=db))
+    assert len(calls) == 2
+
+
+def test_parameters_are_part_of_key(monkeypatch):
+    versions, calls, get_rooms = _setup(monkeypatch)
+    db = Session()
+
+    asyncio.run(get_rooms(limit=10, db=db))
+    asyncio.run(get_rooms(limit=20, db=db))
+    assert calls == [10, 20]
+
+
+def test_write_during_read_is_not_cached():
+    cache = ResponseCache(1 << 20, 60)
+    generations = cache.generations(("rooms",))
+    cache.invalidate_tags({"rooms"})
+    cache.set("key", {"stale": True}, ("rooms",), generations=generations)
+    assert cache.get("key") is None
@@ -0,0 +1,67 @@
+"""
+植物搜索分词和按相关度翻页单元测试
+"""
+from decimal import Decimal
+
+from sqlalchemy.dialects import postgresql
+
+from app.utils.pagination import decode_cursor, encode_cursor, split_page
+from app.utils.search_utils import build_search_query, document_tokens, search_vector_text
+
+
+def _query_text(term: str) -> str:
+    """build_search_query 生成的 tsquery 文本（绑定参数的值）"""
+    compiled = build_search_query(term).compile(dialect=postgresql.dialect())
+    return next(iter(compiled.params.values()))
+
+
+def test_cjk_unigrams_and_bigrams():
+    assert document_tokens("绿萝") == ["绿", "萝", "绿萝"]
+    assert document_tokens("龟背竹") == ["龟", "背", "竹", "龟背", "背竹"]
+
+
+def test_latin_words_are_normalized():
+    # 全角字母转半角并小写，标点作为分隔符
+    assert document_tokens("Epipremnum ＡＵＲＥＵＭ, v2") == ["epipremnum", "aureum", "v2"]
+    assert document_tokens("绿萝Pothos") == ["绿", "萝", "绿萝", "pothos"]
+
+
+def test_search_vector_weights_and_positions():
+    text = search_vector_text("绿萝", "Epipremnum", "绿色")
+    assert text == "'绿':1A,5C '萝':2A '绿萝':3A 'epipremnum':4B '色':6C '绿色':7C"
+
+
+def test_search_query():
+    assert _query_text("绿萝") == "'绿萝'"
+    # 单字按单字词元匹配，多字按相邻二字全部命中，拉丁词按前缀匹配
+    assert _query_text("绿") == "'绿'"
+    assert _query_text("龟背竹") == "'龟背' & '背竹'"
+    assert _query_text("Pot 绿萝") == "'pot':* & '绿萝'"
+    assert build_search_query("  ,.!  ") is None
+
+
+def test_decimal_rank_round_trip():
+    rank = Decimal("0.060793")
+    values = decode_cursor(encode_cursor([rank, 12]))
+    assert values == [rank, 12]
+    assert isinstance(values[0], Decimal)
+
+
+def test_tied_ranks_page_without_gaps():
+    # 多行同分时按 (rank, id) 降序翻页，游标还原的 rank 与原值相等，不丢行也不重复
+    rows = sorted(
+        [(Decimal("0.060793"), plant_id) for plant_id in range(1, 8)] + [(Decimal("0.1"), 8)],
+        reverse=True
+    )
+    seen = []
+    cursor = None
+    while True:
+        remaining = rows
+        if cursor:
+            bound = tuple(decode_cursor(cursor))
+            remaining = [row for row in rows if row < bound]
+        page, cursor = split_page(remaining[:4], 3, key=list)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert seen == rows
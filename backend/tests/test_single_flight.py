@@ -0,0 +1,114 @@
+"""
+请求合并（single-flight）单元测试
+"""
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+def test_concurrent_calls_are_coalesced():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def identify():
+            calls.append(1)
+            await release.wait()
+            return {"name": "绿萝"}
+
+        tasks = [asyncio.ensure_future(flight.do("md5", identify)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks), calls, flight.stats()
+
+    results, calls, stats = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert [coalesced for _, coalesced in results] == [False, True, True, True, True]
+    assert all(result == {"name": "绿萝"} for result, _ in results)
+    assert stats == {"leaders": 1, "coalesced": 4, "takeovers": 0, "inflight": 0}
+
+
+def test_different_keys_run_independently():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def identify(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(
+            flight.do("a", lambda: identify(1)),
+            flight.do("b", lambda: identify(2)),
+        )
+
+    assert asyncio.run(scenario()) == [(1, False), (2, False)]
+
+
+def test_error_is_shared_with_waiters():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def identify():
+            await release.wait()
+            raise RuntimeError("识别失败")
+
+        tasks = [asyncio.ensure_future(flight.do("md5", identify)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True), flight.stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stats["inflight"] == 0
+
+
+def test_waiter_takes_over_when_leader_is_cancelled():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def identify():
+            calls.append(1)
+            await asyncio.sleep(0.01 if len(calls) > 1 else 10)
+            return len(calls)
+
+        leader = asyncio.ensure_future(flight.do("md5", identify))
+        waiter = asyncio.ensure_future(flight.do("md5", identify))
+        await asyncio.sleep(0)
+        # 执行者的客户端断开
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter, flight.stats()
+
+    result, stats = asyncio.run(scenario())
+
+    assert result == (2, False)
+    assert stats["takeovers"] == 1
+    assert stats["inflight"] == 0
+
+
+def test_cancelled_waiter_does_not_cancel_leader():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def identify():
+            await release.wait()
+            return "ok"
+
+        leader = asyncio.ensure_future(flight.do("md5", identify))
+        waiter = asyncio.ensure_future(flight.do("md5", identify))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        release.set()
+        return await leader
+
+    assert asyncio.run(scenario()) == ("ok", False)
@@ -0,0 +1,125 @@
+"""
+/uploads 静态文件服务单元测试：Range 解析、条件请求和 immutable 缓存
+"""
+import asyncio
+import os
+
+import pytest
+
+from app.core.upload_files import (
+    IMMUTABLE_CACHE_CONTROL,
+    RangeNotSatisfiable,
+    UploadFiles,
+    parse_range,
+    versioned_url,
+)
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    (" bytes=5-5 ", (5, 5)),
+    # 多区间、格式错误按完整文件返回
+    ("bytes=0-1,5-6", None),
+    ("bytes=-", None),
+    ("items=0-10", None),
+    ("bytes=a-b", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, len(CONTENT)) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1024-", 1024),
+    ("bytes=10-5", 1024),
+    ("bytes=-0", 1024),
+    ("bytes=0-", 0),
+])
+def test_unsatisfiable_range(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    (tmp_path / "thumb.jpg").write_bytes(CONTENT)
+    return tmp_path
+
+
+def _respond(upload_dir, name="thumb.jpg", query="", headers=None):
+    path = upload_dir / name
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "query_string": query.encode(),
+        "headers": [(key.encode(), value.encode()) for key, value in (headers or {}).items()],
+    }
+    response = UploadFiles(directory=str(upload_dir)).file_response(path, os.stat(path), scope)
+    return response, scope
+
+
+def _body(response, scope) -> bytes:
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(response(scope, None, send))
+    return b"".join(message.get("body", b"") for message in messages)
+
+
+def test_only_matching_fingerprint_is_immutable(upload_dir):
+    fingerprint = versioned_url(upload_dir / "thumb.jpg").split("?v=")[1]
+
+    response, _ = _respond(upload_dir, query=f"v={fingerprint}")
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+
+    for query in ("", "v=anything"):
+        response, _ = _respond(upload_dir, query=query)
+        assert response.headers["Cache-Control"] == "public, max-age=0"
+
+
+def test_content_hash_name_is_immutable(upload_dir):
+    name = "a" * 64 + ".jpg"
+    (upload_dir / name).write_bytes(CONTENT)
+
+    response, _ = _respond(upload_dir, name=name)
+
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["ETag"] == f'"{"a" * 64}"'
+
+
+def test_if_none_match_returns_304(upload_dir):
+    response, _ = _respond(upload_dir)
+    etag = response.headers["ETag"]
+
+    response, _ = _respond(upload_dir, headers={"if-none-match": f"W/{etag}"})
+    assert response.status_code == 304
+
+
+def test_range_request(upload_dir):
+    response, scope = _respond(upload_dir, headers={"range": "bytes=10-19"})
+
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == "bytes 10-19/1024"
+    assert response.headers["Content-Length"] == "10"
+    assert _body(response, scope) == CONTENT[10:20]
+
+
+def test_range_not_satisfiable(upload_dir):
+    response, _ = _respond(upload_dir, headers={"range": "bytes=2000-"})
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */1024"
+
+
+def test_stale_if_range_returns_full_file(upload_dir):
+    response, scope = _respond(upload_dir, headers={"range": "bytes=10-19", "if-range": '"stale"'})
+
+    assert response.status_code == 200
+    assert _body(response, scope) == CONTENT
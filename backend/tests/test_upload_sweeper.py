@@ -0,0 +1,117 @@
+"""
+上传目录孤儿文件清理单元测试（引用集合直接填充，不连接数据库）
+"""
+import os
+import time
+
+import pytest
+
+from app.services import upload_sweeper as upload_sweeper_module
+from app.services.upload_sweeper import UploadSweeper, _digest, upload_relative_path
+
+SHA_KEPT = "a" * 64
+SHA_ORPHAN = "b" * 64
+SHA_REUPLOADED = "c" * 64
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("/uploads/plants/a.jpg", "plants/a.jpg"),
+    ("/uploads/plants/thumbnails/a.jpg?v=0123456789ab", "plants/thumbnails/a.jpg"),
+    ("https://cdn.example.com/uploads/blobs/aa/bb/x.jpg", "blobs/aa/bb/x.jpg"),
+    ("uploads/plants/a.jpg", "plants/a.jpg"),
+    ("https://example.com/static/a.jpg", None),
+])
+def test_upload_relative_path(url, expected):
+    assert upload_relative_path(url) == expected
+
+
+class _FakeBlobService:
+    """blob 锁内的复查：SHA_REUPLOADED 模拟标记之后被重新上传"""
+
+    checked = []
+
+    def __init__(self, db):
+        pass
+
+    def is_orphan(self, sha256: str) -> bool:
+        self.checked.append(sha256)
+        return sha256 != SHA_REUPLOADED
+
+
+class _FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def _write(root, relative_path: str, age: float) -> None:
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * 10)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def sweeper(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_sweeper_module, "BlobService", _FakeBlobService)
+    _FakeBlobService.checked = []
+    sweeper = UploadSweeper(_FakeSession(), upload_dir=str(tmp_path))
+    sweeper.blob_root = "blobs/"
+    sweeper._referenced = {_digest("plants/kept.jpg")}
+    sweeper._blobs = {_digest(SHA_KEPT)}
+    return sweeper
+
+
+def test_is_referenced(sweeper):
+    assert sweeper._is_referenced("plants/kept.jpg")
+    assert not sweeper._is_referenced("plants/other.jpg")
+    # blob 目录下的原图和衍生图都按 blobs 表判断
+    assert sweeper._is_referenced(f"blobs/aa/aa/{SHA_KEPT}.jpg")
+    assert sweeper._is_referenced(f"blobs/aa/aa/{SHA_KEPT}_w300.webp")
+    assert not sweeper._is_referenced(f"blobs/bb/bb/{SHA_ORPHAN}.jpg")
+    # blob 目录外同名的文件不算 blob
+    assert not sweeper._is_referenced(f"plants/{SHA_KEPT}.jpg")
+
+
+def test_sweep_respects_grace_period_and_blob_lock(sweeper, tmp_path):
+    day = 24 * 3600
+    _write(tmp_path, "plants/kept.jpg", age=2 * day)
+    _write(tmp_path, "plants/orphan.jpg", age=2 * day)
+    _write(tmp_path, "plants/uploading.jpg", age=60)
+    _write(tmp_path, f"blobs/aa/aa/{SHA_KEPT}.jpg", age=2 * day)
+    _write(tmp_path, f"blobs/bb/bb/{SHA_ORPHAN}.jpg", age=2 * day)
+    _write(tmp_path, f"blobs/bb/bb/{SHA_ORPHAN}_thumb.jpg", age=2 * day)
+    _write(tmp_path, f"blobs/cc/cc/{SHA_REUPLOADED}.jpg", age=2 * day)
+
+    report = sweeper.sweep(grace_period=day)
+
+    assert report["scanned"] == 7
+    assert report["withinGracePeriod"] == 1
+    assert report["orphaned"] == 4
+    assert report["deleted"] == 3
+    remaining = sorted(
+        str(path.relative_to(tmp_path)).replace(os.sep, "/")
+        for path in tmp_path.rglob("*") if path.is_file()
+    )
+    assert remaining == [
+        f"blobs/aa/aa/{SHA_KEPT}.jpg",
+        f"blobs/cc/cc/{SHA_REUPLOADED}.jpg",
+        "plants/kept.jpg",
+        "plants/uploading.jpg",
+    ]
+    # 同一 blob 的多个文件只在锁内复查一次
+    assert sorted(_FakeBlobService.checked) == [SHA_ORPHAN, SHA_REUPLOADED]
+    assert sweeper.db.commits == 1
+
+
+def test_dry_run_deletes_nothing(sweeper, tmp_path):
+    _write(tmp_path, "plants/orphan.jpg", age=2 * 24 * 3600)
+
+    report = sweeper.sweep(dry_run=True)
+
+    assert report["orphaned"] == 1
+    assert report["deleted"] == 0
+    assert (tmp_path / "plants/orphan.jpg").exists()